@@ -3,7 +3,8 @@ Admin API Endpoints
 Full control panel for managing the platform
 """
 
-from fastapi import APIRouter, HTTPException, status, Header
+import asyncio
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, status, Header
 from typing import List, Optional
 from datetime import timedelta
 
@@ -17,7 +18,7 @@ from models.admin import (
     ActivityLogResponse
 )
 from models.user import UserResponse
-from core.security import hash_password, verify_password, create_access_token
+from core.security import hash_password, verify_password, password_needs_rehash, upgrade_password_hash, create_access_token
 from core.admin_auth import get_admin_from_token, require_super_admin, log_admin_activity
 from core.database import (
     get_admin_by_email,
@@ -36,6 +37,8 @@ from core.database import (
     get_user_by_email
 )
 from core.config import settings
+from core.rate_limit import check_rate_limit
+from services.skill_taxonomy import tag_fields
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -45,10 +48,13 @@ router = APIRouter(prefix="/admin", tags=["Admin"])
 # ========================================
 
 @router.post("/login", response_model=AdminToken)
-async def admin_login(credentials: AdminLogin):
+async def admin_login(credentials: AdminLogin, request: Request, background_tasks: BackgroundTasks):
     """
     Admin login - returns JWT token with admin privileges
     """
+    # Throttle before any hashing or DB work
+    await check_rate_limit(request, "admin.login", account=credentials.email)
+    
     # Find admin by email
     admin = await get_admin_by_email(credentials.email)
     
@@ -67,13 +73,18 @@ async def admin_login(credentials: AdminLogin):
         )
     
     # Verify password
-    if not verify_password(credentials.password, admin["hashed_password"]):
+    if not await asyncio.to_thread(verify_password, credentials.password, admin["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Move legacy or out-of-policy hashes to the current Argon2 costs
+    if password_needs_rehash(admin["hashed_password"]):
+        save = lambda new_hash: update_admin_in_db(admin["id"], {"hashed_password": new_hash})
+        background_tasks.add_task(upgrade_password_hash, credentials.password, save)
+    
     # Update last login
     await update_admin_last_login(admin["id"])
     
@@ -295,7 +306,8 @@ async def create_user_by_admin(
         "latitude": user_data.latitude,
         "longitude": user_data.longitude,
         "hashed_password": hashed_password,
-        "is_active": user_data.is_active
+        "is_active": user_data.is_active,
+        **tag_fields(user_data.bio)
     }
     
     created_user = await create_user_in_db(new_user_data)
@@ -357,6 +369,9 @@ async def update_user_by_admin(
             detail="User not found"
         )
     
+    if "bio" in update_data:
+        update_data.update(tag_fields(update_data["bio"]))
+    
     # Update user
     updated_user = await update_user_in_db(user_id, update_data)
     
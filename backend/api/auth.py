@@ -3,20 +3,22 @@ Authentication API Endpoints
 Now connected to REAL Supabase database!
 """
 
-from fastapi import APIRouter, HTTPException, status
+import asyncio
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Request, status
 from datetime import timedelta
 
 from models.user import UserRegistration, UserLogin, Token, UserResponse
-from core.security import hash_password, verify_password, create_access_token
+from core.security import hash_password, verify_password, password_needs_rehash, upgrade_password_hash, create_access_token
 from core.config import settings
-from core.database import create_user_in_db, get_user_by_email, get_all_users
+from core.database import create_user_in_db, get_user_by_email, get_all_users, update_user_in_db
+from core.rate_limit import check_rate_limit
 
 # Create router
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register_user(user_data: UserRegistration):
+async def register_user(user_data: UserRegistration, request: Request):
     """
     Register a new user in the REAL database
     
@@ -26,6 +28,9 @@ async def register_user(user_data: UserRegistration):
     - Saves to Supabase PostgreSQL
     - Returns user data (no password)
     """
+    # Throttle before any hashing or DB work
+    await check_rate_limit(request, "auth.signup")
+    
     # Check if email already exists
     existing_user = await get_user_by_email(user_data.email)
     if existing_user:
@@ -60,7 +65,7 @@ async def register_user(user_data: UserRegistration):
 
 
 @router.post("/login", response_model=Token)
-async def login_user(credentials: UserLogin):
+async def login_user(credentials: UserLogin, request: Request, background_tasks: BackgroundTasks):
     """
     User login - returns JWT access token
     
@@ -68,6 +73,9 @@ async def login_user(credentials: UserLogin):
     - Returns token for authenticated requests
     - Token expires in 30 minutes (configurable)
     """
+    # Throttle before any hashing or DB work
+    await check_rate_limit(request, "auth.login", account=credentials.email)
+    
     # Find user in database
     user = await get_user_by_email(credentials.email)
     
@@ -80,13 +88,18 @@ async def login_user(credentials: UserLogin):
         )
     
     # Verify password
-    if not verify_password(credentials.password, user["hashed_password"]):
+    if not await asyncio.to_thread(verify_password, credentials.password, user["hashed_password"]):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    # Move legacy or out-of-policy hashes to the current Argon2 costs
+    if password_needs_rehash(user["hashed_password"]):
+        save = lambda new_hash: update_user_in_db(user["id"], {"hashed_password": new_hash})
+        background_tasks.add_task(upgrade_password_hash, credentials.password, save)
+    
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -10,9 +10,12 @@ from pydantic import BaseModel, Field
 from models.user import UserResponse
 from core.database import (
     get_user_by_id,
-    update_profile_completeness
+    note_write
 )
 from core.security import decode_access_token
+from core.events import publish_event
+from core.jobs import enqueue_job
+from services.skill_taxonomy import tag_fields
 
 router = APIRouter(prefix="/profile", tags=["Profile"])
 
@@ -123,6 +126,7 @@ async def update_my_profile(
         update_data["phone"] = profile_data.phone
     if profile_data.bio is not None:
         update_data["bio"] = profile_data.bio
+        update_data.update(tag_fields(profile_data.bio))
     if profile_data.latitude is not None:
         update_data["latitude"] = profile_data.latitude
     if profile_data.longitude is not None:
@@ -132,6 +136,7 @@ async def update_my_profile(
     
     # Update user
     response = supabase.table("users").update(update_data).eq("id", user_id).execute()
+    note_write(user_id)
     
     if not response.data:
         raise HTTPException(
@@ -139,8 +144,9 @@ async def update_my_profile(
             detail="Failed to update profile"
         )
     
-    # Recalculate profile completeness
-    await update_profile_completeness(user_id)
+    # Recalculate profile completeness in the background
+    await enqueue_job("profile.completeness", dedupe=True, user_id=user_id)
+    await publish_event("profile.updated", user_id, user_id, fields=list(update_data))
     
     # Get updated user data
     updated_user = await get_user_by_id(user_id)
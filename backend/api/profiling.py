@@ -0,0 +1,167 @@
+"""
+Profiling API Endpoints
+CPU sampling, request profiles and tracemalloc snapshots (Super Admin only)
+"""
+
+import asyncio
+import threading
+import time
+import tracemalloc
+
+from fastapi import APIRouter, HTTPException, status, Header
+from fastapi.responses import Response
+from typing import Optional
+
+from core.admin_auth import require_super_admin
+from core.profiling import (
+    ProfileArtifact,
+    StackSampler,
+    artifacts,
+    snapshots,
+    new_artifact_id,
+    take_snapshot,
+    top_stats,
+    try_acquire_profiler,
+    release_profiler
+)
+
+router = APIRouter(prefix="/admin/profiling", tags=["Admin Profiling"])
+
+
+# ========================================
+# CPU
+# ========================================
+
+@router.post("/sample")
+async def sample_cpu(
+    seconds: float = 10,
+    interval_ms: float = 5,
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Sample the event loop thread for a time window
+    Returns folded stacks, ready for flamegraph.pl or speedscope
+    """
+    require_super_admin(authorization)
+    
+    if not 0 < seconds <= 120:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="seconds must be between 0 and 120")
+    
+    if not try_acquire_profiler():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="A profile is already running")
+    
+    try:
+        sampler = StackSampler(threading.get_ident(), interval=max(interval_ms, 1) / 1000)
+        sampler.start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            data = sampler.stop()
+    finally:
+        release_profiler()
+    
+    artifact_id = new_artifact_id()
+    artifacts.add(artifact_id, ProfileArtifact(artifact_id, "folded", f"window {seconds}s", time.time(), data))
+    return Response(data, media_type="text/plain", headers={"X-Profile-Id": artifact_id})
+
+
+@router.get("/artifacts")
+async def list_artifacts(authorization: Optional[str] = Header(None)):
+    """
+    List stored profile artifacts, newest last
+    """
+    require_super_admin(authorization)
+    return [
+        {"id": a.id, "kind": a.kind, "label": a.label, "created_at": a.created_at, "size_bytes": len(a.data)}
+        for a in artifacts.items.values()
+    ]
+
+
+@router.get("/artifacts/{artifact_id}")
+async def download_artifact(artifact_id: str, authorization: Optional[str] = Header(None)):
+    """
+    Download a profile: .prof (load with pstats or snakeviz) or .folded
+    """
+    require_super_admin(authorization)
+    
+    artifact = artifacts.get(artifact_id)
+    if not artifact:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    
+    return Response(
+        artifact.data,
+        media_type=artifact.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{artifact.filename}"'}
+    )
+
+
+# ========================================
+# MEMORY
+# ========================================
+
+@router.post("/tracemalloc/start")
+async def start_tracemalloc(frames: int = 1, authorization: Optional[str] = Header(None)):
+    """
+    Start tracing allocations (adds memory and CPU overhead until stopped)
+    """
+    require_super_admin(authorization)
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(max(1, min(frames, 25)))
+    return {"tracing": True, "frames": tracemalloc.get_traceback_limit()}
+
+
+@router.post("/tracemalloc/stop")
+async def stop_tracemalloc(authorization: Optional[str] = Header(None)):
+    """
+    Stop tracing allocations
+    """
+    require_super_admin(authorization)
+    tracemalloc.stop()
+    return {"tracing": False}
+
+
+@router.post("/tracemalloc/snapshot")
+async def create_snapshot(limit: int = 20, authorization: Optional[str] = Header(None)):
+    """
+    Take a snapshot and return the largest allocation sites
+    """
+    require_super_admin(authorization)
+    
+    if not tracemalloc.is_tracing():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="tracemalloc is not running")
+    
+    snapshot_id = take_snapshot()
+    _, snapshot = snapshots.get(snapshot_id)
+    current, peak = tracemalloc.get_traced_memory()
+    return {
+        "id": snapshot_id,
+        "traced_kb": round(current / 1024, 1),
+        "peak_kb": round(peak / 1024, 1),
+        "top": top_stats(snapshot.statistics("lineno"), limit)
+    }
+
+
+@router.get("/tracemalloc/diff")
+async def diff_snapshots(
+    base: str,
+    target: str,
+    limit: int = 20,
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Compare two snapshots: allocation sites that grew the most
+    """
+    require_super_admin(authorization)
+    
+    base_entry = snapshots.get(base)
+    target_entry = snapshots.get(target)
+    if not base_entry or not target_entry:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Snapshot not found")
+    
+    stats = target_entry[1].compare_to(base_entry[1], "lineno")
+    return {
+        "base": base,
+        "target": target,
+        "seconds_between": round(target_entry[0] - base_entry[0], 1),
+        "top": top_stats(stats, limit)
+    }
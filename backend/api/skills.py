@@ -9,20 +9,25 @@ from typing import List, Optional
 from models.skill import (
     SkillCategoryResponse,
     UserSkillCreate,
+    UserSkillBatchCreate,
     UserSkillResponse,
     UserSkillUpdate
 )
 from core.database import (
     get_all_skill_categories,
     get_skill_category_by_id,
+    get_skill_categories_by_ids,
     create_user_skill,
+    create_user_skills,
     get_user_skills,
     get_skill_by_id,
     update_user_skill,
     delete_user_skill,
-    update_profile_completeness
 )
 from core.security import decode_access_token
+from core.events import publish_event
+from core.jobs import enqueue_job
+from services.skill_taxonomy import tag_skill_fields
 
 router = APIRouter(prefix="/skills", tags=["Skills"])
 
@@ -110,6 +115,7 @@ async def add_skill(
         "currency": skill_data.currency,
         "is_available": skill_data.is_available
     }
+    new_skill_data.update(tag_skill_fields(new_skill_data))
     
     # Create skill
     created_skill = await create_user_skill(new_skill_data)
@@ -120,12 +126,67 @@ async def add_skill(
             detail="Failed to create skill"
         )
     
-    # Update profile completeness
-    await update_profile_completeness(user_id)
+    # Update profile completeness in the background
+    await enqueue_job("profile.completeness", dedupe=True, user_id=user_id)
+    await publish_event("skill.created", created_skill["id"], user_id)
     
     return created_skill
 
 
+@router.post("/batch", response_model=List[UserSkillResponse], status_code=status.HTTP_201_CREATED)
+async def add_skills_batch(
+    batch: UserSkillBatchCreate,
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Add several skills to user's profile at once
+    One category lookup, one insert and one completeness job for the whole batch
+    """
+    user_id = get_user_from_token(authorization)
+    
+    # Verify all categories exist
+    category_ids = {skill.category_id for skill in batch.skills}
+    categories = await get_skill_categories_by_ids(list(category_ids))
+    missing = category_ids - {category["id"] for category in categories}
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Skill category not found: {', '.join(sorted(missing))}"
+        )
+    
+    # Prepare skill data
+    new_skills_data = [
+        {
+            "user_id": user_id,
+            "category_id": skill.category_id,
+            "skill_name": skill.skill_name,
+            "description": skill.description,
+            "experience_years": skill.experience_years,
+            "hourly_rate": float(skill.hourly_rate) if skill.hourly_rate else None,
+            "currency": skill.currency,
+            "is_available": skill.is_available
+        }
+        for skill in batch.skills
+    ]
+    for new_skill in new_skills_data:
+        new_skill.update(tag_skill_fields(new_skill))
+    
+    # Create skills
+    created_skills = await create_user_skills(new_skills_data)
+    
+    if len(created_skills) != len(new_skills_data):
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create skills"
+        )
+    
+    # Update profile completeness in the background
+    await enqueue_job("profile.completeness", dedupe=True, user_id=user_id)
+    await publish_event("skill.created", None, user_id, skills=[skill["id"] for skill in created_skills])
+    
+    return created_skills
+
+
 @router.get("/my-skills", response_model=List[UserSkillResponse])
 async def get_my_skills(authorization: Optional[str] = Header(None)):
     """
@@ -186,6 +247,8 @@ async def update_skill(
         update_data["currency"] = skill_data.currency
     if skill_data.is_available is not None:
         update_data["is_available"] = skill_data.is_available
+    if "skill_name" in update_data or "description" in update_data:
+        update_data.update(tag_skill_fields({**skill, **update_data}))
     
     # Update skill
     updated_skill = await update_user_skill(skill_id, update_data)
@@ -196,6 +259,8 @@ async def update_skill(
             detail="Failed to update skill"
         )
     
+    await publish_event("skill.updated", skill_id, user_id)
+    
     return updated_skill
 
 
@@ -233,7 +298,8 @@ async def remove_skill(
             detail="Failed to delete skill"
         )
     
-    # Update profile completeness
-    await update_profile_completeness(user_id)
+    # Update profile completeness in the background
+    await enqueue_job("profile.completeness", dedupe=True, user_id=user_id)
+    await publish_event("skill.deleted", skill_id, user_id)
     
     return None
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+Password hashing benchmark
+Measures Argon2 hash throughput per core and in aggregate across worker
+processes, and optionally calibrates costs for this machine
+
+Run from the backend directory:
+    python -m benchmarks.hashing --processes 4
+    python -m benchmarks.hashing --calibrate --target-ms 250
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYmVuY2gifQ.benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+
+from core.config import settings
+from core.security import build_password_hasher, calibrate_argon2
+
+
+def _hash_for(seconds: float, time_cost: int, memory_cost: int, parallelism: int) -> int:
+    """
+    Hash repeatedly for a fixed wall time in one process
+    Returns: Number of hashes completed
+    """
+    hasher = build_password_hasher(time_cost, memory_cost, parallelism)
+    done = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        hasher.hash("benchmark-password")
+        done += 1
+    return done
+
+
+def measure(seconds: float, processes: int, time_cost: int, memory_cost: int, parallelism: int) -> dict:
+    """
+    Run one hashing loop per process
+    Returns: Aggregate and per-process hashes per second
+    """
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(_hash_for, seconds, time_cost, memory_cost, parallelism) for _ in range(processes)]
+        counts = [future.result() for future in futures]
+    total = sum(counts) / seconds
+    return {"processes": processes, "hashes_per_second": total, "per_process": total / processes}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Argon2 password hashing on this machine")
+    parser.add_argument("--seconds", type=float, default=5.0, help="measurement time per run")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--time-cost", type=int, default=settings.ARGON2_TIME_COST)
+    parser.add_argument("--memory-cost", type=int, default=settings.ARGON2_MEMORY_COST_KIB, help="KiB")
+    parser.add_argument("--parallelism", type=int, default=settings.ARGON2_PARALLELISM)
+    parser.add_argument("--calibrate", action="store_true", help="pick costs for --target-ms first")
+    parser.add_argument("--target-ms", type=int, default=settings.ARGON2_TARGET_MS)
+    parser.add_argument("--max-memory", type=int, default=settings.ARGON2_MAX_MEMORY_KIB, help="KiB")
+    return parser.parse_args(argv)
+
+
+def main_cli(argv=None) -> int:
+    args = parse_args(argv)
+    time_cost, memory_cost, parallelism = args.time_cost, args.memory_cost, args.parallelism
+
+    if args.calibrate:
+        params = calibrate_argon2(args.target_ms, args.max_memory, parallelism)
+        time_cost, memory_cost = params.time_cost, params.memory_cost
+        print(f"calibrated for {args.target_ms} ms per hash; add to .env:")
+        print(f"  ARGON2_TIME_COST={time_cost}")
+        print(f"  ARGON2_MEMORY_COST_KIB={memory_cost}")
+        print(f"  ARGON2_PARALLELISM={parallelism}")
+
+    print(f"argon2id t={time_cost} m={memory_cost}KiB p={parallelism}")
+    for processes in sorted({1, args.processes}):
+        result = measure(args.seconds, processes, time_cost, memory_cost, parallelism)
+        print(
+            f"{processes:>3} process(es)  {result['hashes_per_second']:8.2f} hashes/s  "
+            f"{result['per_process']:8.2f} per process  {1000 / result['per_process']:8.1f} ms/hash"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
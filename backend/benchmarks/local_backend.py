@@ -0,0 +1,336 @@
+"""
+In-memory stand-in for the Supabase client
+Implements the subset of the postgrest query builder the app uses
+(table / select / insert / update / upsert / delete, filters, order,
+limit, exact counts) and the app's SQL functions (rpc), so the real app
+can run offline
+"""
+
+import time
+import uuid
+from copy import deepcopy
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+# Column defaults applied on insert, mirroring the database schema
+TABLE_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "users": {"is_active": True, "profile_completeness": 0},
+    "admins": {"is_active": True, "last_login": None},
+    "user_skills": {"is_available": True, "currency": "USD", "experience_years": 0},
+    "messages": {"is_read": False},
+    "conversation_summaries": {"unread_count": 0, "last_read_at": None},
+}
+
+# Tables keyed by something other than a generated id
+COMPOSITE_KEYS: Dict[str, List[str]] = {
+    "conversation_summaries": ["user_id", "partner_id"],
+}
+
+
+class LocalResponse:
+    def __init__(self, data: list, count: Optional[int] = None):
+        self.data = data
+        self.count = count
+
+
+class LocalQuery:
+    """
+    Chainable query against one in-memory table
+    """
+    
+    def __init__(self, backend: "LocalBackend", table: str):
+        self.backend = backend
+        self.table = table
+        self.operation = "select"
+        self.columns: Optional[List[str]] = None
+        self.payload: Any = None
+        self.on_conflict: Optional[List[str]] = None
+        self.filters: List[Callable[[dict], bool]] = []
+        self.ordering: List[tuple] = []
+        self.max_rows: Optional[int] = None
+        self.count_mode: Optional[str] = None
+        self.head = False
+    
+    # --- operations ---
+    
+    def select(self, columns: str = "*", count: Optional[str] = None, head: bool = False):
+        self.operation = "select"
+        self.columns = None if columns.strip() == "*" else [c.strip() for c in columns.split(",")]
+        self.count_mode = count
+        self.head = head
+        return self
+    
+    def insert(self, rows):
+        self.operation, self.payload = "insert", rows
+        return self
+    
+    def upsert(self, rows, on_conflict: str = ""):
+        self.operation, self.payload = "upsert", rows
+        self.on_conflict = [c.strip() for c in on_conflict.split(",") if c.strip()] or None
+        return self
+    
+    def update(self, values: dict):
+        self.operation, self.payload = "update", values
+        return self
+    
+    def delete(self):
+        self.operation = "delete"
+        return self
+    
+    # --- filters ---
+    
+    def _filter(self, column: str, predicate: Callable[[Any], bool]):
+        self.filters.append(lambda row: predicate(row.get(column)))
+        return self
+    
+    def eq(self, column, value):
+        return self._filter(column, lambda v: v == value)
+    
+    def neq(self, column, value):
+        return self._filter(column, lambda v: v != value)
+    
+    def gt(self, column, value):
+        return self._filter(column, lambda v: v is not None and v > value)
+    
+    def gte(self, column, value):
+        return self._filter(column, lambda v: v is not None and v >= value)
+    
+    def lt(self, column, value):
+        return self._filter(column, lambda v: v is not None and v < value)
+    
+    def lte(self, column, value):
+        return self._filter(column, lambda v: v is not None and v <= value)
+    
+    def in_(self, column, values):
+        values = set(values)
+        return self._filter(column, lambda v: v in values)
+    
+    def is_(self, column, value):
+        expected = None if value in (None, "null") else value
+        return self._filter(column, lambda v: v is expected or v == expected)
+    
+    def or_(self, filters: str):
+        """
+        PostgREST logic tree, e.g. 'a.lt.1,and(a.eq.1,b.lt."x")'
+        """
+        predicate = _parse_logic(filters, any)
+        self.filters.append(predicate)
+        return self
+    
+    def ilike(self, column, pattern):
+        needle = pattern.strip("%").lower()
+        return self._filter(column, lambda v: v is not None and needle in str(v).lower())
+    
+    def order(self, column, desc: bool = False):
+        self.ordering.append((column, desc))
+        return self
+    
+    def limit(self, count: int):
+        self.max_rows = count
+        return self
+    
+    # --- execution ---
+    
+    def _matches(self, row: dict) -> bool:
+        return all(f(row) for f in self.filters)
+    
+    def _project(self, row: dict) -> dict:
+        if self.columns is None:
+            return deepcopy(row)
+        return {c: deepcopy(row.get(c)) for c in self.columns}
+    
+    def execute(self) -> LocalResponse:
+        self.backend.round_trip()
+        rows = self.backend.tables.setdefault(self.table, [])
+        handler = getattr(self, f"_execute_{self.operation}")
+        return handler(rows)
+    
+    def _execute_select(self, rows: List[dict]) -> LocalResponse:
+        matched = [row for row in rows if self._matches(row)]
+        for column, desc in reversed(self.ordering):
+            matched.sort(key=lambda r: (r.get(column) is None, r.get(column)), reverse=desc)
+        count = len(matched) if self.count_mode else None
+        if self.max_rows is not None:
+            matched = matched[:self.max_rows]
+        if self.backend.max_rows is not None:
+            matched = matched[:self.backend.max_rows]
+        data = [] if self.head else [self._project(row) for row in matched]
+        return LocalResponse(data, count)
+    
+    def _execute_insert(self, rows: List[dict]) -> LocalResponse:
+        new_rows = [self.backend.new_row(self.table, values) for values in _as_list(self.payload)]
+        rows.extend(new_rows)
+        return LocalResponse([deepcopy(r) for r in new_rows])
+    
+    def _execute_upsert(self, rows: List[dict]) -> LocalResponse:
+        keys = self.on_conflict or COMPOSITE_KEYS.get(self.table) or ["id"]
+        written = []
+        for values in _as_list(self.payload):
+            existing = next((r for r in rows if all(r.get(k) == values.get(k) for k in keys)), None)
+            if existing is not None:
+                existing.update(deepcopy(values))
+                written.append(existing)
+            else:
+                row = self.backend.new_row(self.table, values)
+                rows.append(row)
+                written.append(row)
+        return LocalResponse([deepcopy(r) for r in written])
+    
+    def _execute_update(self, rows: List[dict]) -> LocalResponse:
+        updated = []
+        for row in rows:
+            if self._matches(row):
+                row.update(deepcopy(self.payload))
+                updated.append(deepcopy(row))
+        return LocalResponse(updated)
+    
+    def _execute_delete(self, rows: List[dict]) -> LocalResponse:
+        kept, deleted = [], []
+        for row in rows:
+            (deleted if self._matches(row) else kept).append(row)
+        rows[:] = kept
+        return LocalResponse(deleted)
+
+
+_COMPARISONS: Dict[str, Callable[[Any, Any], bool]] = {
+    "eq": lambda v, x: v == x,
+    "neq": lambda v, x: v != x,
+    "gt": lambda v, x: v is not None and v > x,
+    "gte": lambda v, x: v is not None and v >= x,
+    "lt": lambda v, x: v is not None and v < x,
+    "lte": lambda v, x: v is not None and v <= x,
+    "is": lambda v, x: v is None if x == "null" else v == x,
+}
+
+
+def _split_terms(text: str) -> List[str]:
+    """
+    Split on commas outside parentheses and double quotes
+    """
+    terms, depth, quoted, start = [], 0, False, 0
+    for i, char in enumerate(text):
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            terms.append(text[start:i])
+            start = i + 1
+    terms.append(text[start:])
+    return terms
+
+
+def _parse_logic(text: str, combine: Callable) -> Callable[[dict], bool]:
+    predicates = []
+    for term in _split_terms(text):
+        if term.startswith(("and(", "or(")):
+            name, _, inner = term.partition("(")
+            predicates.append(_parse_logic(inner[:-1], all if name == "and" else any))
+            continue
+        column, op, value = term.split(".", 2)
+        value = value[1:-1] if value.startswith('"') else value
+        compare = _COMPARISONS[op]
+        predicates.append(lambda row, c=column, f=compare, x=value: f(row.get(c), x))
+    return lambda row: combine(p(row) for p in predicates)
+
+
+class LocalRpc:
+    """
+    A call to one of the backend's SQL function stand-ins
+    """
+    
+    def __init__(self, backend: "LocalBackend", fn: str, params: dict):
+        self.backend = backend
+        self.fn = getattr(backend, f"_rpc_{fn}")
+        self.params = params
+    
+    def execute(self) -> LocalResponse:
+        self.backend.round_trip()
+        return LocalResponse(self.fn(**self.params))
+
+
+def _as_list(payload) -> List[dict]:
+    return payload if isinstance(payload, list) else [payload]
+
+
+class LocalBackend:
+    """
+    Drop-in replacement for a supabase Client, holding tables in memory
+    - latency_ms: simulated network round trip added to every execute()
+    - max_rows: cap on rows per response, like PostgREST's db-max-rows
+    """
+    
+    def __init__(self, latency_ms: float = 0.0, max_rows: Optional[int] = 1000):
+        self.tables: Dict[str, List[dict]] = {}
+        self.latency = latency_ms / 1000
+        self.max_rows = max_rows
+        self.round_trips = 0
+    
+    def table(self, name: str) -> LocalQuery:
+        return LocalQuery(self, name)
+    
+    def rpc(self, fn: str, params: Optional[dict] = None) -> LocalRpc:
+        return LocalRpc(self, fn, params or {})
+    
+    def round_trip(self):
+        self.round_trips += 1
+        if self.latency:
+            # The real client is synchronous, so a blocking sleep is faithful
+            time.sleep(self.latency)
+    
+    def new_row(self, table: str, values: dict) -> dict:
+        row = dict(TABLE_DEFAULTS.get(table, {}))
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", datetime.utcnow().isoformat())
+        row.update(deepcopy(values))
+        return row
+    
+    def load(self, table: str, rows: List[dict]):
+        """
+        Bulk-load rows without simulated latency (for seeding)
+        """
+        self.tables.setdefault(table, []).extend(self.new_row(table, r) for r in rows)
+    
+    # --- SQL functions (backend/migrations) ---
+    
+    def _full_name(self, user_id: str) -> str:
+        user = next((u for u in self.tables.get("users", []) if u["id"] == user_id), None)
+        return (user or {}).get("full_name") or "Unknown"
+    
+    def _rpc_record_conversation_message(self, p_sender_id: str, p_receiver_id: str, p_message: str, p_sent_at: str) -> int:
+        summaries = self.tables.setdefault("conversation_summaries", [])
+        shared = {"last_message": p_message, "last_message_time": p_sent_at, "last_sender_id": p_sender_id}
+        pairs = [(p_receiver_id, p_sender_id, True)]
+        if p_sender_id != p_receiver_id:
+            pairs.append((p_sender_id, p_receiver_id, False))
+        unread = 0
+        for user_id, partner_id, receives in pairs:
+            row = next((r for r in summaries if r["user_id"] == user_id and r["partner_id"] == partner_id), None)
+            if row is None:
+                row = self.new_row("conversation_summaries", {"user_id": user_id, "partner_id": partner_id})
+                summaries.append(row)
+            row["partner_name"] = self._full_name(partner_id)
+            # A late commit of an older send never moves the summary back
+            if row.get("last_message_time") is None or p_sent_at >= row["last_message_time"]:
+                row.update(shared)
+            if receives:
+                unread = row["unread_count"] = self._unread_count(user_id, partner_id, row.get("last_read_at"))
+        return unread
+    
+    def _rpc_mark_conversation_read(self, p_user_id: str, p_partner_id: str, p_read_at: str) -> int:
+        row = next((r for r in self.tables.get("conversation_summaries", [])
+                    if r["user_id"] == p_user_id and r["partner_id"] == p_partner_id), None)
+        watermark = max(filter(None, [(row or {}).get("last_read_at"), p_read_at]))
+        remaining = self._unread_count(p_user_id, p_partner_id, watermark)
+        if row is not None:
+            row.update(last_read_at=watermark, unread_count=remaining)
+        return remaining
+    
+    def _unread_count(self, user_id: str, partner_id: str, since: Optional[str]) -> int:
+        return sum(
+            1 for m in self.tables.get("messages", [])
+            if m.get("sender_id") == partner_id and m.get("receiver_id") == user_id
+            and (not m.get("is_read") if since is None else m.get("created_at") > since)
+        )
@@ -0,0 +1,309 @@
+"""
+Endpoint benchmark suite
+Seeds an in-memory backend, drives the real FastAPI app in-process and
+reports throughput and latency percentiles per scenario
+
+Run from the backend directory:
+    python -m benchmarks.run --users 500 --messages-per-pair 50 --save baseline
+    python -m benchmarks.run --compare baseline --max-regression 20
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# The app reads its settings at import time: point it at dummy credentials
+# (never contacted) and switch off per-IP throttling for the load generator
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYmVuY2gifQ.benchmark")
+os.environ.setdefault("SECRET_KEY", "benchmark-secret")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+# Background jobs go to a throwaway queue, never the app's own
+os.environ.setdefault("JOB_QUEUE_PATH", os.path.join(tempfile.mkdtemp(prefix="bench-jobs-"), "jobs.sqlite3"))
+
+import httpx
+
+import core.database as database
+import main
+from benchmarks.local_backend import LocalBackend
+from benchmarks.seed import ADMIN_EMAIL, BENCH_PASSWORD, SeedConfig, SeedResult, seed_backend
+from core.metrics import instrument_client
+from core.security import create_access_token, hash_password
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+
+@dataclass
+class Request:
+    method: str
+    url: str
+    json: Optional[dict] = None
+    headers: Optional[dict] = None
+
+
+@dataclass
+class ScenarioResult:
+    requests: int
+    errors: int
+    throughput_rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    mean_ms: float
+    db_round_trips_per_request: float
+
+
+class Context:
+    """
+    Seeded ids and tokens the scenarios draw from
+    """
+    
+    def __init__(self, seed: SeedResult, rng: random.Random):
+        self.seed = seed
+        self.rng = rng
+        self.user_tokens = {uid: main.create_access_token({"sub": uid}) for uid in seed.user_ids}
+        self.admin_token = create_access_token({
+            "user_id": seed.admin_id,
+            "email": ADMIN_EMAIL,
+            "role": "super_admin",
+            "is_admin": True,
+        })
+    
+    def user(self) -> str:
+        return self.rng.choice(self.seed.user_ids)
+    
+    def auth(self, user_id: str) -> dict:
+        return {"Authorization": f"Bearer {self.user_tokens[user_id]}"}
+
+
+def _login(ctx: Context) -> Request:
+    email = ctx.rng.choice(ctx.seed.emails)
+    return Request("POST", "/auth/login", {"email": email, "password": BENCH_PASSWORD})
+
+
+def _profile_edit(ctx: Context) -> Request:
+    uid = ctx.user()
+    return Request("PUT", "/profile/me", {"bio": f"Updated bio {ctx.rng.random():.6f}"}, ctx.auth(uid))
+
+
+def _skill_add(ctx: Context) -> Request:
+    uid = ctx.user()
+    body = {
+        "skill_name": "Benchmark Skill",
+        "category_name": "Plumbing",
+        "experience_years": 3,
+        "hourly_rate": 25.0,
+    }
+    return Request("POST", "/skills", body, ctx.auth(uid))
+
+
+def _conversations(ctx: Context) -> Request:
+    uid = ctx.user()
+    return Request("GET", "/messages/conversations", headers=ctx.auth(uid))
+
+
+def _conversation_open(ctx: Context) -> Request:
+    # Seeded partners are the next users in the list
+    index = ctx.rng.randrange(len(ctx.seed.user_ids))
+    uid = ctx.seed.user_ids[index]
+    partner = ctx.seed.user_ids[(index + 1) % len(ctx.seed.user_ids)]
+    return Request("GET", f"/messages/conversation/{partner}", headers=ctx.auth(uid))
+
+
+SCENARIOS: Dict[str, Callable[[Context], Request]] = {
+    "login": _login,
+    "categories": lambda ctx: Request("GET", "/skills/categories"),
+    "users_list": lambda ctx: Request("GET", "/users/"),
+    "profile_view": lambda ctx: Request("GET", f"/users/{ctx.user()}"),
+    "profile_skills": lambda ctx: Request("GET", f"/skills/user/{ctx.user()}"),
+    "profile_public": lambda ctx: Request("GET", f"/profile/{ctx.user()}/public"),
+    "profile_similar": lambda ctx: Request("GET", f"/profile/{ctx.user()}/similar"),
+    "search": lambda ctx: Request("GET", "/search/professionals?limit=20"),
+    "skill_suggest": lambda ctx: Request("GET", f"/skills/suggest?q={ctx.rng.choice(('p', 'pl', 'el', 'ca', 're'))}"),
+    "profile_edit": _profile_edit,
+    "skill_add": _skill_add,
+    "conversations": _conversations,
+    "conversation_open": _conversation_open,
+    "admin_stats": lambda ctx: Request("GET", "/admin/stats", headers={"Authorization": f"Bearer {ctx.admin_token}"}),
+}
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[rank - 1]
+
+
+async def run_scenario(client: httpx.AsyncClient, backend: LocalBackend, ctx: Context, make_request, total: int, concurrency: int, warmup: int) -> ScenarioResult:
+    for _ in range(warmup):
+        req = make_request(ctx)
+        await client.request(req.method, req.url, json=req.json, headers=req.headers)
+    
+    latencies: List[float] = []
+    errors = 0
+    remaining = total
+    round_trips_before = backend.round_trips
+    
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            req = make_request(ctx)
+            start = time.perf_counter()
+            response = await client.request(req.method, req.url, json=req.json, headers=req.headers)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    
+    latencies.sort()
+    ms = [v * 1000 for v in latencies]
+    return ScenarioResult(
+        requests=len(ms),
+        errors=errors,
+        throughput_rps=round(len(ms) / wall, 2) if wall else 0.0,
+        p50_ms=round(percentile(ms, 50), 3),
+        p95_ms=round(percentile(ms, 95), 3),
+        p99_ms=round(percentile(ms, 99), 3),
+        mean_ms=round(sum(ms) / len(ms), 3) if ms else 0.0,
+        db_round_trips_per_request=round((backend.round_trips - round_trips_before) / max(1, len(ms)), 2),
+    )
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(current: dict, baseline: dict, max_regression: Optional[float]) -> bool:
+    """
+    Print per-scenario deltas against a baseline
+    Returns: False if any p95 or throughput regressed past max_regression %
+    """
+    ok = True
+    print(f"\n{'scenario':<20}{'p95 ms':>12}{'Δ%':>9}{'rps':>12}{'Δ%':>9}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base:
+            print(f"{name:<20}{result['p95_ms']:>12}{'new':>9}{result['throughput_rps']:>12}{'new':>9}")
+            continue
+        p95_delta = (result["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100 if base["p95_ms"] else 0.0
+        rps_delta = (result["throughput_rps"] - base["throughput_rps"]) / base["throughput_rps"] * 100 if base["throughput_rps"] else 0.0
+        flag = ""
+        if max_regression is not None and (p95_delta > max_regression or -rps_delta > max_regression):
+            flag, ok = "  REGRESSION", False
+        print(f"{name:<20}{result['p95_ms']:>12}{p95_delta:>+9.1f}{result['throughput_rps']:>12}{rps_delta:>+9.1f}{flag}")
+    return ok
+
+
+async def run(args) -> dict:
+    backend = LocalBackend(latency_ms=args.db_latency_ms)
+    config = SeedConfig(
+        users=args.users,
+        skills_per_user=args.skills_per_user,
+        partners_per_user=args.partners_per_user,
+        messages_per_pair=args.messages_per_pair,
+        seed=args.seed,
+    )
+    seed = seed_backend(backend, config, main.hash_password(BENCH_PASSWORD), hash_password(BENCH_PASSWORD))
+    
+    # Route every query from the app to the local backend
+    client_wrapper = instrument_client(backend)
+    database.supabase = client_wrapper
+    main.supabase = client_wrapper
+    
+    ctx = Context(seed, random.Random(args.seed))
+    selected = args.scenarios or list(SCENARIOS)
+    results = {}
+    
+    # Startup hooks start the event bus and job workers, so deferred work is measured too
+    await main.app.router.startup()
+    transport = httpx.ASGITransport(app=main.app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name in selected:
+                total = args.login_requests if name == "login" else args.requests
+                result = await run_scenario(client, backend, ctx, SCENARIOS[name], total, args.concurrency, args.warmup)
+                results[name] = asdict(result)
+                print(f"{name:<20} {result.throughput_rps:>9} rps  p50 {result.p50_ms:>9} ms  p95 {result.p95_ms:>9} ms  "
+                      f"p99 {result.p99_ms:>9} ms  db/req {result.db_round_trips_per_request:>6}  errors {result.errors}")
+    finally:
+        await main.app.router.shutdown()
+    
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "seed": asdict(config),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "db_latency_ms": args.db_latency_ms,
+        },
+        "results": results,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the API against a seeded in-memory backend")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--skills-per-user", type=int, default=3)
+    parser.add_argument("--partners-per-user", type=int, default=3)
+    parser.add_argument("--messages-per-pair", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=500, help="requests per scenario")
+    parser.add_argument("--login-requests", type=int, default=50, help="requests for the (hashing-bound) login scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="simulated round trip per query")
+    parser.add_argument("--scenarios", nargs="*", choices=list(SCENARIOS))
+    parser.add_argument("--verbose", action="store_true", help="keep query tracer warnings")
+    parser.add_argument("--save", metavar="NAME", help="store results as baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="compare against baselines/NAME.json")
+    parser.add_argument("--max-regression", type=float, help="fail if p95 or throughput regress by more than this %%")
+    return parser.parse_args(argv)
+
+
+def main_cli(argv=None) -> int:
+    args = parse_args(argv)
+    if not args.verbose:
+        # N+1 and slow-query warnings would flood the report
+        logging.getLogger("core.query_tracer").setLevel(logging.ERROR)
+    report = asyncio.run(run(args))
+    
+    if args.save:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{args.save}.json"
+        path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"\nSaved baseline to {path}")
+    
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"{args.compare}.json").read_text())
+        if not compare(report, baseline, args.max_regression):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -0,0 +1,150 @@
+"""
+Synthetic data generator for benchmarks
+Produces deterministic users, skills, conversations and an admin
+"""
+
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List
+
+from benchmarks.local_backend import LocalBackend
+from core.database import make_pair_key
+
+BENCH_PASSWORD = "BenchPass123"
+ADMIN_EMAIL = "admin@skillconnector-bench.com"
+
+CATEGORIES = [
+    "Plumbing", "Electrical", "Carpentry", "Tailoring", "Hairdressing",
+    "Tutoring", "Web Development", "Photography", "Catering", "Auto Repair",
+]
+
+SKILL_NAMES = [
+    "Residential Plumbing", "Pipe Fitting", "House Wiring", "Solar Installation",
+    "Furniture Making", "Dress Making", "Braiding", "Math Tutoring",
+    "React Development", "Event Photography", "Pastry", "Engine Diagnostics",
+]
+
+
+@dataclass
+class SeedConfig:
+    users: int = 200
+    skills_per_user: int = 3
+    partners_per_user: int = 3
+    messages_per_pair: int = 20
+    seed: int = 42
+
+
+@dataclass
+class SeedResult:
+    user_ids: List[str]
+    category_ids: List[str]
+    emails: List[str]
+    admin_id: str
+
+
+def seed_backend(backend: LocalBackend, config: SeedConfig, password_hash: str, admin_password_hash: str) -> SeedResult:
+    """
+    Fill an in-memory backend with synthetic data
+    Password hashes are computed once by the caller and shared by all rows
+    """
+    rng = random.Random(config.seed)
+    epoch = datetime(2025, 1, 1)
+    
+    categories = [
+        {"id": str(uuid.UUID(int=rng.getrandbits(128))), "name": name, "description": f"{name} services", "icon": None, "created_at": epoch.isoformat()}
+        for name in CATEGORIES
+    ]
+    backend.load("skill_categories", categories)
+    
+    users = []
+    for i in range(config.users):
+        users.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "email": f"user{i}@skillconnector-bench.com",
+            "password": password_hash,
+            "hashed_password": password_hash,
+            "full_name": f"Bench User {i}",
+            "phone": f"+1555{i:07d}",
+            "bio": "Synthetic benchmark professional" if i % 2 == 0 else None,
+            "latitude": rng.uniform(-60, 60),
+            "longitude": rng.uniform(-180, 180),
+            "is_active": i % 10 != 0,
+            "created_at": (epoch + timedelta(minutes=i)).isoformat(),
+        })
+    backend.load("users", users)
+    
+    skills = []
+    for user in users:
+        for _ in range(config.skills_per_user):
+            category = rng.choice(categories)
+            skills.append({
+                "user_id": user["id"],
+                "category_id": category["id"],
+                "category_name": category["name"],
+                "skill_name": rng.choice(SKILL_NAMES),
+                "description": "Benchmark skill",
+                "experience_years": rng.randint(0, 20),
+                "hourly_rate": round(rng.uniform(5, 150), 2),
+                "currency": "USD",
+                "is_available": rng.random() > 0.2,
+                "created_at": epoch.isoformat(),
+                "updated_at": epoch.isoformat(),
+            })
+    backend.load("user_skills", skills)
+    
+    messages, summaries = [], []
+    for i, user in enumerate(users):
+        for offset in range(1, config.partners_per_user + 1):
+            if offset >= len(users):
+                break
+            partner = users[(i + offset) % len(users)]
+            pair_key = make_pair_key(user["id"], partner["id"])
+            sent_at = epoch
+            last = None
+            for n in range(config.messages_per_pair):
+                sender, receiver = (user, partner) if n % 2 == 0 else (partner, user)
+                sent_at += timedelta(minutes=rng.randint(1, 600))
+                last = {
+                    "sender_id": sender["id"],
+                    "receiver_id": receiver["id"],
+                    "pair_key": pair_key,
+                    "message": f"Benchmark message {n}",
+                    "is_read": n < config.messages_per_pair - 2,
+                    "created_at": sent_at.isoformat(),
+                }
+                messages.append(last)
+            if last is None:
+                continue
+            for owner, other in ((user, partner), (partner, user)):
+                unread = sum(1 for m in messages[-config.messages_per_pair:] if m["receiver_id"] == owner["id"] and not m["is_read"])
+                summaries.append({
+                    "user_id": owner["id"],
+                    "partner_id": other["id"],
+                    "partner_name": other["full_name"],
+                    "last_message": last["message"],
+                    "last_message_time": last["created_at"],
+                    "last_sender_id": last["sender_id"],
+                    "unread_count": unread,
+                })
+    backend.load("messages", messages)
+    backend.load("conversation_summaries", summaries)
+    
+    admin = {
+        "id": str(uuid.UUID(int=rng.getrandbits(128))),
+        "email": ADMIN_EMAIL,
+        "full_name": "Bench Admin",
+        "hashed_password": admin_password_hash,
+        "role": "super_admin",
+        "is_active": True,
+        "created_at": epoch.isoformat(),
+    }
+    backend.load("admins", [admin])
+    
+    return SeedResult(
+        user_ids=[u["id"] for u in users],
+        category_ids=[c["id"] for c in categories],
+        emails=[u["email"] for u in users],
+        admin_id=admin["id"],
+    )
@@ -8,6 +8,7 @@ from datetime import datetime
 
 from core.security import decode_access_token, create_access_token
 from core.config import settings
+from core.jobs import enqueue_job
 
 
 def get_admin_from_token(authorization: Optional[str]) -> dict:
@@ -61,9 +62,8 @@ def require_super_admin(authorization: Optional[str]) -> dict:
 async def log_admin_activity(admin_id: str, action: str, target_type: str, target_id: Optional[str] = None, details: Optional[dict] = None):
     """
     Log admin activity for audit trail
+    The insert runs as a background job
     """
-    from core.database import supabase
-    
     log_entry = {
         "admin_id": admin_id,
         "action": action,
@@ -72,4 +72,4 @@ async def log_admin_activity(admin_id: str, action: str, target_type: str, targe
         "details": details
     }
     
-    supabase.table("admin_activity_log").insert(log_entry).execute()
\ No newline at end of file
+    await enqueue_job("admin.activity_log", log_entry=log_entry)
\ No newline at end of file
@@ -0,0 +1,230 @@
+"""
+Admission control and load shedding
+Caps concurrent work per route group, queues briefly, and answers
+503 + Retry-After when the queue is full instead of piling up requests
+"""
+
+import asyncio
+import json
+import math
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Optional
+
+from core.config import settings
+from core.metrics import registry, CallbackGauge, Counter
+
+admission_shed = registry.register(Counter(
+    "admission_shed_total", "Requests rejected with 503", ("group",)
+))
+
+
+@dataclass(frozen=True)
+class RouteGroup:
+    """
+    Limits for one class of requests
+    - priority: lower is served first when a slot frees up
+    - max_concurrent: requests of this group running at once
+    - max_queue: requests allowed to wait for a slot
+    - queue_timeout: seconds a request may wait before being shed
+    """
+    name: str
+    priority: int
+    max_concurrent: int
+    max_queue: int
+    queue_timeout: float
+
+
+# Cheap reads first, then writes, then password hashing (CPU bound), then
+# uploads (a slot is held while up to 10 MB streams in)
+# The caps add up to more than ADMISSION_MAX_CONCURRENT, so under load the
+# groups compete for the shared total and freed slots go to reads first;
+# the read cap still leaves the others a few slots of their own
+ROUTE_GROUPS: Dict[str, RouteGroup] = {
+    "read": RouteGroup("read", priority=0, max_concurrent=60, max_queue=128, queue_timeout=2.0),
+    "write": RouteGroup("write", priority=1, max_concurrent=16, max_queue=32, queue_timeout=5.0),
+    "hash": RouteGroup("hash", priority=2, max_concurrent=4, max_queue=16, queue_timeout=3.0),
+    "upload": RouteGroup("upload", priority=3, max_concurrent=4, max_queue=8, queue_timeout=5.0),
+}
+
+# POST routes that hash a password
+HASHING_ROUTES = {
+    "/auth/login",
+    "/auth/signup",
+    "/auth/register",
+    "/admin/login",
+    "/admin/admins",
+    "/admin/users",
+}
+
+# Routes that stream a request body to disk
+UPLOAD_ROUTES = {
+    "/profile/me/avatar",
+}
+
+# Never queued or shed. A CPU sample sleeps for up to two minutes and
+# would hold a write slot throughout; it is super-admin only and the
+# profiler runs one at a time, so it cannot pile up
+EXEMPT_PATHS = {"/", "/metrics", "/admin/profiling/sample"}
+
+
+def classify_request(method: str, path: str) -> Optional[str]:
+    """
+    Route group for a request, or None if it bypasses admission control
+    """
+    if method == "OPTIONS" or path in EXEMPT_PATHS:
+        return None
+    if method in ("GET", "HEAD"):
+        return "read"
+    if method == "POST" and path.rstrip("/") in HASHING_ROUTES:
+        return "hash"
+    if method == "POST" and path.rstrip("/") in UPLOAD_ROUTES:
+        return "upload"
+    return "write"
+
+
+class AdmissionController:
+    """
+    Grants execution slots under a per-group cap and a shared total cap
+    Waiters queue per group; freed slots go to the highest-priority group
+    that has a waiter and spare capacity
+    """
+    
+    def __init__(self, groups: Dict[str, RouteGroup], max_total: int):
+        self.groups = groups
+        self.max_total = max_total
+        self.total = 0
+        self.running: Dict[str, int] = {name: 0 for name in groups}
+        self.waiting: Dict[str, Deque[asyncio.Future]] = {name: deque() for name in groups}
+        self.by_priority = sorted(groups.values(), key=lambda g: g.priority)
+    
+    def _has_capacity(self, group: RouteGroup) -> bool:
+        return self.total < self.max_total and self.running[group.name] < group.max_concurrent
+    
+    def _take(self, group: RouteGroup):
+        self.total += 1
+        self.running[group.name] += 1
+    
+    def _has_waiters(self, group: RouteGroup) -> bool:
+        """
+        Earlier arrivals of the same group are queued; other groups' queues
+        do not hold this one back, since a freed slot is handed out at once
+        """
+        return bool(self.waiting[group.name])
+    
+    async def acquire(self, name: str) -> bool:
+        """
+        Wait for a slot in the group
+        Returns: False if the request should be shed
+        """
+        group = self.groups[name]
+        
+        if self._has_capacity(group) and not self._has_waiters(group):
+            self._take(group)
+            return True
+        
+        queue = self.waiting[name]
+        if len(queue) >= group.max_queue:
+            admission_shed.inc(name)
+            return False
+        
+        waiter = asyncio.get_running_loop().create_future()
+        queue.append(waiter)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=group.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            if waiter.done():
+                # Granted in the same tick the deadline fired - keep the slot
+                return True
+            waiter.cancel()
+            admission_shed.inc(name)
+            return False
+        except asyncio.CancelledError:
+            # Client went away while queued - hand back a slot we may have won
+            if waiter.done() and not waiter.cancelled():
+                self.release(name)
+            waiter.cancel()
+            raise
+        finally:
+            if waiter in queue:
+                queue.remove(waiter)
+    
+    def release(self, name: str):
+        """
+        Free a slot and pass it to the best eligible waiter
+        """
+        self.total -= 1
+        self.running[name] -= 1
+        self._wake()
+    
+    def _wake(self):
+        for group in self.by_priority:
+            queue = self.waiting[group.name]
+            while queue and self._has_capacity(group):
+                waiter = queue.popleft()
+                if waiter.done():
+                    continue
+                self._take(group)
+                waiter.set_result(True)
+            if self.total >= self.max_total:
+                return
+    
+    def retry_after(self, name: str) -> int:
+        return max(1, math.ceil(self.groups[name].queue_timeout))
+
+
+# Global controller instance
+admission_controller = AdmissionController(ROUTE_GROUPS, settings.ADMISSION_MAX_CONCURRENT)
+
+registry.register(CallbackGauge(
+    "admission_running", "Requests holding an execution slot", ("group",),
+    lambda: {(name,): count for name, count in admission_controller.running.items()}
+))
+registry.register(CallbackGauge(
+    "admission_waiting", "Requests queued for an execution slot", ("group",),
+    lambda: {(name,): len(queue) for name, queue in admission_controller.waiting.items()}
+))
+
+
+class AdmissionControlMiddleware:
+    """
+    ASGI middleware applying an AdmissionController to HTTP requests
+    """
+    
+    def __init__(self, app, controller: Optional[AdmissionController] = None):
+        self.app = app
+        self.controller = controller or admission_controller
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.ADMISSION_CONTROL_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        
+        name = classify_request(scope["method"], scope["path"])
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+        
+        if not await self.controller.acquire(name):
+            await self._reject(send, self.controller.retry_after(name))
+            return
+        
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name)
+    
+    @staticmethod
+    async def _reject(send, retry_after: int):
+        body = json.dumps({"detail": "Server is busy, please retry shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
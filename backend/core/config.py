@@ -3,9 +3,13 @@ Configuration Management
 Loads environment variables with Pydantic validation
 """
 
+from pathlib import Path
 from pydantic_settings import BaseSettings
 from typing import Optional
 
+# The backend package directory; relative defaults are resolved against it
+BASE_DIR = Path(__file__).resolve().parent.parent
+
 
 class Settings(BaseSettings):
     """
@@ -28,6 +32,94 @@ class Settings(BaseSettings):
     SUPABASE_URL: str
     SUPABASE_KEY: str
     
+    # Real-time chat (Phase 8)
+    WS_SEND_QUEUE_SIZE: int = 100
+    WS_SEND_TIMEOUT_SECONDS: float = 5.0
+    
+    # Event bus (unset = single-process in-memory bus)
+    EVENT_BUS_URL: Optional[str] = None
+    EVENT_BUS_CHANNEL: str = "skill-connector:events"
+    
+    # Rate limiting (unset store URL = per-process in-memory buckets)
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_STORE_URL: Optional[str] = None
+    TRUST_PROXY_HEADERS: bool = False
+    
+    # Admission control / load shedding
+    ADMISSION_CONTROL_ENABLED: bool = True
+    # Below the sum of the per-group caps (84), so priority decides freed slots
+    ADMISSION_MAX_CONCURRENT: int = 64
+    
+    # Database resilience
+    DB_READ_TIMEOUT_SECONDS: float = 3.0
+    DB_WRITE_TIMEOUT_SECONDS: float = 8.0
+    DB_READ_RETRIES: int = 2
+    DB_RETRY_BASE_DELAY: float = 0.05
+    DB_BREAKER_FAILURE_THRESHOLD: int = 5
+    DB_BREAKER_RECOVERY_SECONDS: float = 15.0
+    DB_STALE_CACHE_SIZE: int = 512
+    # Rows per page for full-table reads; keep <= PostgREST max-rows (1000 on Supabase)
+    DB_PAGE_SIZE: int = 1000
+    
+    # Read replicas (comma-separated URLs; unset = every read hits SUPABASE_URL)
+    SUPABASE_READ_REPLICA_URLS: Optional[str] = None
+    SUPABASE_READ_REPLICA_KEY: Optional[str] = None
+    READ_YOUR_WRITES_SECONDS: float = 5.0
+    REPLICA_FAILURE_THRESHOLD: int = 3
+    REPLICA_RECOVERY_SECONDS: float = 30.0
+    
+    # Password hashing (Argon2id). Run `python -m benchmarks.hashing --calibrate`
+    # on the deployment machine to pick costs that fit ARGON2_TARGET_MS
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST_KIB: int = 65536
+    ARGON2_PARALLELISM: int = 4
+    ARGON2_TARGET_MS: int = 250
+    ARGON2_MAX_MEMORY_KIB: int = 262144
+    
+    # Media uploads
+    STORAGE_BACKEND: str = "local"
+    MEDIA_ROOT: str = str(BASE_DIR / "media")
+    MEDIA_URL_PREFIX: str = "/media"
+    MAX_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    MAX_IMAGE_PIXELS: int = 40_000_000
+    MEDIA_PROCESS_WORKERS: int = 2
+    MEDIA_FILE_CACHE_SIZE: int = 1024
+    # Internal nginx location aliasing MEDIA_ROOT; when set, nginx sends the files
+    MEDIA_ACCEL_REDIRECT_PREFIX: Optional[str] = None
+    
+    # Background jobs (SQLite-backed, shared by the workers on one host)
+    JOB_QUEUE_PATH: str = str(BASE_DIR / "jobs.sqlite3")
+    JOB_WORKERS: int = 4
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_DELAY: float = 2.0
+    JOB_LEASE_SECONDS: float = 60.0
+    JOB_POLL_SECONDS: float = 1.0
+    JOB_QUEUE_MAX_DEPTH: int = 10000
+    
+    # Public profile documents (per worker)
+    PROFILE_DOCUMENT_CACHE_SIZE: int = 10000
+    
+    # Query tracing
+    SLOW_QUERY_MS: int = 500
+    N_PLUS_ONE_THRESHOLD: int = 5
+    QUERY_BUDGET_PER_REQUEST: Optional[int] = None
+    
+    # Skill taxonomy: JSON list of {id, name, category, synonyms}; None uses the bundled file
+    SKILL_TAXONOMY_PATH: Optional[str] = None
+    SKILL_TAG_BACKFILL_BATCH: int = 500
+    # Store skill_ids on write; enable once migrations/0001_skill_ids.sql is applied
+    SKILL_IDS_COLUMN: bool = False
+    
+    # Hourly rate normalization: JSON {base, as_of, rates}; None uses the bundled table
+    FX_RATES_PATH: Optional[str] = None
+    
+    # Similar professionals (per worker): neighbours kept, rows scored per
+    # block, vocabulary cap, and incremental updates before a full rebuild
+    SIMILAR_TOP_K: int = 10
+    SIMILAR_BLOCK_SIZE: int = 512
+    SIMILAR_MAX_TERMS: int = 4096
+    SIMILAR_REBUILD_AFTER: int = 1000
+    
     # Frontend (Phase 9)
     FRONTEND_URL: Optional[str] = "http://localhost:3000"
     
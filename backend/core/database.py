@@ -4,11 +4,60 @@ Database connection and operations using Supabase
 
 from supabase import create_client, Client
 from core.config import settings
-from typing import Optional
+from core.metrics import instrument_client
+from core.replicas import create_read_router
+from core.resilience import client_options, install as install_resilience
+from core.singleflight import execute_coalesced
+from typing import Optional, Tuple
 from datetime import datetime
 
-# Initialize Supabase client
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+# Initialize Supabase client (instrumented: every query is counted and timed,
+# and runs under the timeout / retry / circuit breaker policy)
+supabase: Client = instrument_client(
+    create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY, options=client_options("write")),
+    reads=create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY, options=client_options("read"))
+)
+install_resilience()
+
+# Read-only functions below read through reader(); with read replicas
+# configured they are spread across them, and writes keep reads of the
+# written user / table on the primary for READ_YOUR_WRITES_SECONDS
+read_router = create_read_router(lambda: supabase)
+
+
+def reader(*sticky_keys: str) -> Client:
+    """
+    Client for a read that depends on the given keys (usually user ids)
+    """
+    return read_router.client(*sticky_keys)
+
+
+def note_write(*keys: Optional[str]):
+    """
+    Record a write to the given keys, for read-your-writes routing
+    """
+    read_router.note_write(*keys)
+
+
+async def select_all_rows(table: str, columns: str = "*") -> list:
+    """
+    Every row of a table, a page at a time
+    PostgREST caps each response at max-rows, so a single select silently
+    truncates large tables. Pages are keyed on id rather than offsets, so
+    rows inserted or deleted mid-scan do not shift later pages
+    Returns: List of rows
+    """
+    rows: list = []
+    page_size = settings.DB_PAGE_SIZE
+    while True:
+        query = reader().table(table).select(columns).order("id").limit(page_size)
+        if rows:
+            query = query.gt("id", rows[-1]["id"])
+        response = await execute_coalesced(query)
+        page = response.data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
 
 
 # === USER FUNCTIONS ===
@@ -19,6 +68,8 @@ async def create_user_in_db(user_data: dict) -> dict:
     Returns: Created user data
     """
     response = supabase.table("users").insert(user_data).execute()
+    if response.data:
+        note_write(response.data[0].get("id"))
     return response.data[0] if response.data else None
 
 
@@ -27,7 +78,7 @@ async def get_user_by_email(email: str) -> Optional[dict]:
     Fetch user by email
     Returns: User data or None
     """
-    response = supabase.table("users").select("*").eq("email", email).execute()
+    response = await supabase.table("users").select("*").eq("email", email).execute_async()
     return response.data[0] if response.data else None
 
 
@@ -36,7 +87,7 @@ async def get_user_by_id(user_id: str) -> Optional[dict]:
     Fetch user by ID
     Returns: User data or None
     """
-    response = supabase.table("users").select("*").eq("id", user_id).execute()
+    response = await execute_coalesced(reader(user_id).table("users").select("*").eq("id", user_id))
     return response.data[0] if response.data else None
 
 
@@ -45,8 +96,15 @@ async def get_all_users() -> list:
     Get all users (for debugging)
     Returns: List of users
     """
-    response = supabase.table("users").select("id, email, full_name, created_at").execute()
-    return response.data if response.data else []
+    return await select_all_rows("users", "id, email, full_name, created_at")
+
+
+async def get_all_user_profiles() -> list:
+    """
+    Get every user with all profile columns (for building in-memory indexes)
+    Returns: List of users
+    """
+    return await select_all_rows("users")
 
 
 async def update_user_location(user_id: str, latitude: float, longitude: float) -> dict:
@@ -58,6 +116,7 @@ async def update_user_location(user_id: str, latitude: float, longitude: float)
         "latitude": latitude,
         "longitude": longitude
     }).eq("id", user_id).execute()
+    note_write(user_id)
     return response.data[0] if response.data else None
 
 
@@ -67,6 +126,7 @@ async def delete_user_from_db(user_id: str) -> bool:
     Returns: True if successful
     """
     response = supabase.table("users").delete().eq("id", user_id).execute()
+    note_write(user_id)
     return len(response.data) > 0 if response.data else False
 
 
@@ -76,6 +136,7 @@ async def update_user_in_db(user_id: str, update_data: dict) -> dict:
     Returns: Updated user data
     """
     response = supabase.table("users").update(update_data).eq("id", user_id).execute()
+    note_write(user_id)
     return response.data[0] if response.data else None
 
 
@@ -86,7 +147,7 @@ async def get_all_skill_categories() -> list:
     Get all available skill categories
     Returns: List of skill categories
     """
-    response = supabase.table("skill_categories").select("*").order("name").execute()
+    response = await execute_coalesced(reader("skill_categories").table("skill_categories").select("*").order("name"))
     return response.data if response.data else []
 
 
@@ -95,10 +156,19 @@ async def get_skill_category_by_id(category_id: str) -> Optional[dict]:
     Get a specific skill category
     Returns: Category data or None
     """
-    response = supabase.table("skill_categories").select("*").eq("id", category_id).execute()
+    response = await reader("skill_categories").table("skill_categories").select("*").eq("id", category_id).execute_async()
     return response.data[0] if response.data else None
 
 
+async def get_skill_categories_by_ids(category_ids: list) -> list:
+    """
+    Get several skill categories in one query
+    Returns: List of the categories that exist
+    """
+    response = await reader("skill_categories").table("skill_categories").select("*").in_("id", list(set(category_ids))).execute_async()
+    return response.data if response.data else []
+
+
 # === USER SKILL FUNCTIONS ===
 
 async def create_user_skill(skill_data: dict) -> dict:
@@ -107,15 +177,34 @@ async def create_user_skill(skill_data: dict) -> dict:
     Returns: Created skill data
     """
     response = supabase.table("user_skills").insert(skill_data).execute()
+    note_write(skill_data.get("user_id"))
     return response.data[0] if response.data else None
 
 
+async def create_user_skills(skills_data: list) -> list:
+    """
+    Add several skills in a single multi-row insert
+    Returns: List of created skills
+    """
+    response = supabase.table("user_skills").insert(skills_data).execute()
+    note_write(*{skill.get("user_id") for skill in skills_data})
+    return response.data if response.data else []
+
+
+async def get_all_user_skills() -> list:
+    """
+    Get every user skill (for building in-memory indexes)
+    Returns: List of user skills
+    """
+    return await select_all_rows("user_skills")
+
+
 async def get_user_skills(user_id: str) -> list:
     """
     Get all skills for a specific user
     Returns: List of user skills
     """
-    response = supabase.table("user_skills").select("*").eq("user_id", user_id).execute()
+    response = await execute_coalesced(reader(user_id).table("user_skills").select("*").eq("user_id", user_id))
     return response.data if response.data else []
 
 
@@ -124,7 +213,7 @@ async def get_skill_by_id(skill_id: str) -> Optional[dict]:
     Get a specific skill by ID
     Returns: Skill data or None
     """
-    response = supabase.table("user_skills").select("*").eq("id", skill_id).execute()
+    response = await supabase.table("user_skills").select("*").eq("id", skill_id).execute_async()
     return response.data[0] if response.data else None
 
 
@@ -134,6 +223,7 @@ async def update_user_skill(skill_id: str, update_data: dict) -> dict:
     Returns: Updated skill data
     """
     response = supabase.table("user_skills").update(update_data).eq("id", skill_id).execute()
+    note_write(*{row.get("user_id") for row in (response.data or [])})
     return response.data[0] if response.data else None
 
 
@@ -143,6 +233,7 @@ async def delete_user_skill(skill_id: str) -> bool:
     Returns: True if successful
     """
     response = supabase.table("user_skills").delete().eq("id", skill_id).execute()
+    note_write(*{row.get("user_id") for row in (response.data or [])})
     return len(response.data) > 0 if response.data else False
 
 
@@ -153,7 +244,13 @@ async def calculate_profile_completeness(user_id: str) -> int:
     """
     user = await get_user_by_id(user_id)
     skills = await get_user_skills(user_id)
-    
+    return score_profile_completeness(user, skills)
+
+
+def score_profile_completeness(user: dict, skills: list) -> int:
+    """
+    Profile completion score (0-100) from already-loaded user and skills
+    """
     score = 20  # Base score for having an account
     
     if user.get("bio"):
@@ -177,9 +274,42 @@ async def update_profile_completeness(user_id: str) -> int:
     """
     score = await calculate_profile_completeness(user_id)
     supabase.table("users").update({"profile_completeness": score}).eq("id", user_id).execute()
+    note_write(user_id)
     return score
 
 
+# === SKILL TAXONOMY FUNCTIONS ===
+#
+# Canonical skill ids (see services/skill_taxonomy.py) are stored next to the
+# free text they were derived from; null means "not tagged yet". The column
+# is added by migrations/0001_skill_ids.sql, and nothing writes it until
+# SKILL_IDS_COLUMN is set
+
+async def get_untagged_rows(table: str, columns: str, limit: int) -> list:
+    """
+    Get a batch of rows whose skill_ids have not been set
+    Returns: List of rows with the requested columns
+    """
+    response = await supabase.table(table).select(columns).is_("skill_ids", "null").limit(limit).execute_async()
+    return response.data if response.data else []
+
+
+async def set_skill_ids(table: str, tagged: dict) -> int:
+    """
+    Store canonical skill ids for many rows
+    Rows with the same ids share one update, so a batch costs one query
+    per distinct tag set rather than one per row
+    - tagged: row id -> list of canonical skill ids
+    Returns: Number of updates issued
+    """
+    groups: dict = {}
+    for row_id, skill_ids in tagged.items():
+        groups.setdefault(tuple(skill_ids), []).append(row_id)
+    for skill_ids, row_ids in groups.items():
+        supabase.table(table).update({"skill_ids": list(skill_ids)}).in_("id", row_ids).execute()
+    return len(groups)
+
+
 # === ADMIN FUNCTIONS ===
 
 async def get_admin_by_email(email: str) -> Optional[dict]:
@@ -187,7 +317,7 @@ async def get_admin_by_email(email: str) -> Optional[dict]:
     Fetch admin by email
     Returns: Admin data or None
     """
-    response = supabase.table("admins").select("*").eq("email", email).execute()
+    response = await supabase.table("admins").select("*").eq("email", email).execute_async()
     return response.data[0] if response.data else None
 
 
@@ -196,7 +326,7 @@ async def get_admin_by_id(admin_id: str) -> Optional[dict]:
     Fetch admin by ID
     Returns: Admin data or None
     """
-    response = supabase.table("admins").select("*").eq("id", admin_id).execute()
+    response = await supabase.table("admins").select("*").eq("id", admin_id).execute_async()
     return response.data[0] if response.data else None
 
 
@@ -221,7 +351,7 @@ async def get_all_admins() -> list:
     Get all admin accounts
     Returns: List of admins
     """
-    response = supabase.table("admins").select("*").order("created_at", desc=True).execute()
+    response = await supabase.table("admins").select("*").order("created_at", desc=True).execute_async()
     return response.data if response.data else []
 
 
@@ -248,5 +378,215 @@ async def get_admin_activity_logs(limit: int = 50) -> list:
     Get recent admin activity logs
     Returns: List of activity logs
     """
-    response = supabase.table("admin_activity_log").select("*").order("created_at", desc=True).limit(limit).execute()
-    return response.data if response.data else []
\ No newline at end of file
+    response = await reader("admin_activity_log").table("admin_activity_log").select("*").order("created_at", desc=True).limit(limit).execute_async()
+    return response.data if response.data else []
+
+
+async def create_admin_activity_log(log_entry: dict):
+    """
+    Insert one audit trail entry
+    """
+    supabase.table("admin_activity_log").insert(log_entry).execute()
+    note_write("admin_activity_log")
+
+# === MESSAGE FUNCTIONS ===
+#
+# Every message carries a `pair_key` shared by both directions of a
+# conversation, so a history page is one query on a single index
+# (migrations/0002_message_pair_key.sql)
+
+MESSAGE_PAGE_SIZE = 50
+MAX_MESSAGE_PAGE_SIZE = 200
+
+
+def make_pair_key(user_a: str, user_b: str) -> str:
+    """
+    Order-independent key for the conversation between two users
+    """
+    return ":".join(sorted((str(user_a), str(user_b))))
+
+
+def message_cursor(message: dict) -> str:
+    """
+    Keyset cursor for a message: created_at plus id, so messages sharing a
+    timestamp at a page boundary are neither skipped nor repeated
+    """
+    return f"{message['created_at']}|{message['id']}"
+
+
+def _after_cursor(query, cursor: str, op: str):
+    """
+    Filter to messages strictly beyond a cursor in the (created_at, id) order
+    - op: "lt" (older) or "gt" (newer)
+    A bare timestamp (no id) compares on created_at alone
+    """
+    created_at, _, message_id = cursor.partition("|")
+    if not message_id:
+        return getattr(query, op)("created_at", created_at)
+    # Values are quoted: timestamps contain PostgREST-reserved characters
+    return query.or_(f'created_at.{op}."{created_at}",and(created_at.eq."{created_at}",id.{op}.{message_id})')
+
+
+async def get_conversation_messages(
+    user_id: str,
+    partner_id: str,
+    before: Optional[str] = None,
+    since: Optional[str] = None,
+    limit: int = MESSAGE_PAGE_SIZE
+) -> Tuple[list, bool]:
+    """
+    Get one page of the conversation between two users
+    - before: walk back through history, newest first, older than this cursor
+    - since: only messages newer than this cursor, oldest first
+    Cursors come from message_cursor(); one row past the page is fetched to
+    tell whether more remain
+    Returns: (messages in chronological order, whether more remain)
+    """
+    limit = max(1, min(limit, MAX_MESSAGE_PAGE_SIZE))
+    query = reader(user_id).table("messages").select("*").eq("pair_key", make_pair_key(user_id, partner_id))
+    
+    if since:
+        query = _after_cursor(query, since, "gt")
+        response = await query.order("created_at").order("id").limit(limit + 1).execute_async()
+        rows = response.data or []
+        return rows[:limit], len(rows) > limit
+    
+    if before:
+        query = _after_cursor(query, before, "lt")
+    response = await query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1).execute_async()
+    rows = response.data or []
+    return list(reversed(rows[:limit])), len(rows) > limit
+
+
+async def backfill_message_pair_keys() -> int:
+    """
+    Set pair_key on messages written before the column existed
+    Issues one update per directed pair rather than per message
+    Returns: Number of directed pairs updated
+    """
+    response = await supabase.table("messages").select("sender_id, receiver_id").is_("pair_key", "null").execute_async()
+    pairs = {(m["sender_id"], m["receiver_id"]) for m in (response.data or [])}
+    
+    for sender_id, receiver_id in pairs:
+        supabase.table("messages").update({
+            "pair_key": make_pair_key(sender_id, receiver_id)
+        }).eq("sender_id", sender_id).eq("receiver_id", receiver_id).is_("pair_key", "null").execute()
+    
+    return len(pairs)
+
+
+# === CONVERSATION SUMMARY FUNCTIONS ===
+#
+# One row per (user_id, partner_id) in `conversation_summaries`, so the inbox
+# is a single indexed read instead of a scan over every message
+# (migrations/0003_conversation_summaries.sql)
+
+async def get_conversation_summaries(user_id: str) -> list:
+    """
+    Get the inbox for a user, most recent conversation first
+    Returns: List of conversation summaries
+    """
+    response = await reader(user_id).table("conversation_summaries").select("*").eq("user_id", user_id).order("last_message_time", desc=True).execute_async()
+    return response.data if response.data else []
+
+
+async def record_message_in_summaries(message: dict) -> int:
+    """
+    Fold a newly sent (already inserted) message into both participants' summaries
+    One RPC (record_conversation_message, migrations/0005) upserts both rows
+    and recounts the receiver's unread messages under the row lock, so
+    concurrent sends and reads never overwrite each other's count
+    Returns: The receiver's new unread count
+    """
+    sender_id = message["sender_id"]
+    receiver_id = message["receiver_id"]
+    
+    result = supabase.rpc("record_conversation_message", {
+        "p_sender_id": sender_id,
+        "p_receiver_id": receiver_id,
+        "p_message": message["message"],
+        "p_sent_at": message["created_at"]
+    }).execute()
+    note_write(sender_id, receiver_id)
+    
+    return result.data or 0
+
+
+async def mark_conversation_read(user_id: str, partner_id: str, read_at: str) -> int:
+    """
+    Move the user's read watermark for a conversation up to read_at
+    - read_at: created_at of the newest message actually read, so a message
+      stamped earlier but inserted later is not silently counted as read
+    One RPC (migrations/0005) moves the watermark, never back, and recounts
+    the unread messages above it under the same row lock as sends; the
+    per-message is_read flags are updated separately by mark_messages_read
+    (a background job)
+    Returns: The unread count left above the watermark
+    """
+    result = supabase.rpc("mark_conversation_read", {
+        "p_user_id": user_id,
+        "p_partner_id": partner_id,
+        "p_read_at": read_at
+    }).execute()
+    note_write(user_id)
+    
+    return result.data or 0
+
+
+async def mark_messages_read(user_id: str, partner_id: str, read_at: Optional[str] = None):
+    """
+    Set is_read on what the partner sent to this user, up to the read
+    watermark when given, in one bulk update
+    """
+    query = supabase.table("messages").update({"is_read": True}).eq("pair_key", make_pair_key(user_id, partner_id)).eq("receiver_id", user_id).eq("is_read", False)
+    if read_at:
+        query = query.lte("created_at", read_at)
+    query.execute()
+
+
+async def rename_conversation_partner(user_id: str, full_name: str):
+    """
+    Propagate a user's new name to every summary that shows them as the partner
+    """
+    supabase.table("conversation_summaries").update({"partner_name": full_name}).eq("partner_id", user_id).execute()
+
+
+async def rebuild_conversation_summaries(user_id: str) -> int:
+    """
+    Rebuild a user's summaries from their full message history
+    Used to backfill users whose messages predate the summary table
+    Returns: Number of conversations written
+    """
+    sent = await supabase.table("messages").select("*").eq("sender_id", user_id).execute_async()
+    received = await supabase.table("messages").select("*").eq("receiver_id", user_id).execute_async()
+    
+    conversations = {}
+    for msg in (sent.data or []) + (received.data or []):
+        partner_id = msg["receiver_id"] if msg["sender_id"] == user_id else msg["sender_id"]
+        conv = conversations.setdefault(partner_id, {"last": msg, "unread_count": 0})
+        if msg["created_at"] > conv["last"]["created_at"]:
+            conv["last"] = msg
+        if msg["receiver_id"] == user_id and not msg["is_read"]:
+            conv["unread_count"] += 1
+    
+    if not conversations:
+        return 0
+    
+    partners = await supabase.table("users").select("id, full_name").in_("id", list(conversations)).execute_async()
+    names = {u["id"]: u.get("full_name") for u in (partners.data or [])}
+    
+    rows = [
+        {
+            "user_id": user_id,
+            "partner_id": partner_id,
+            "partner_name": names.get(partner_id) or "Unknown",
+            "last_message": conv["last"]["message"],
+            "last_message_time": conv["last"]["created_at"],
+            "last_sender_id": conv["last"]["sender_id"],
+            "unread_count": conv["unread_count"]
+        }
+        for partner_id, conv in conversations.items()
+    ]
+    supabase.table("conversation_summaries").upsert(rows, on_conflict="user_id,partner_id").execute()
+    note_write(user_id)
+    return len(rows)
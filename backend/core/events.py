@@ -0,0 +1,217 @@
+"""
+Internal event bus for change notifications
+Every worker process sees every event, so in-process caches and
+WebSocket fan-out stay coherent when the app runs on several workers
+"""
+
+import asyncio
+import logging
+import os
+import random
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Awaitable, Callable, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process in published events
+WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+# Back-off between attempts to re-establish a lost subscription
+RECONNECT_BASE_SECONDS = 0.5
+RECONNECT_MAX_SECONDS = 30.0
+
+EventType = Literal[
+    "profile.updated",
+    "skill.created",
+    "skill.updated",
+    "skill.deleted",
+    "category.created",
+    "message.created",
+    "conversation.read",
+    # Local only: the subscription was re-established and events published
+    # meanwhile were missed, so cached views should reload
+    "events.resync",
+]
+
+
+class ChangeEvent(BaseModel):
+    """
+    A typed change notification
+    - entity_id: the row that changed (user, skill, category or message id);
+      None for a batch, whose ids are in the payload (skill.created: "skills")
+    - user_id: the user whose data changed, for per-user cache keys
+    """
+    type: EventType
+    entity_id: Optional[str] = None
+    user_id: Optional[str] = None
+    payload: dict = Field(default_factory=dict)
+    origin: str = WORKER_ID
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+EventHandler = Callable[[ChangeEvent], Awaitable[None]]
+
+
+class EventBus(ABC):
+    """
+    Base event bus: keeps the subscriber list and dispatches to it
+    Subclasses decide how a published event reaches every worker
+    """
+    
+    def __init__(self):
+        self.handlers: List[EventHandler] = []
+    
+    def subscribe(self, handler: EventHandler):
+        """
+        Register an async handler called for every event
+        """
+        self.handlers.append(handler)
+    
+    @abstractmethod
+    async def publish(self, event: ChangeEvent):
+        ...
+    
+    async def start(self):
+        pass
+    
+    async def stop(self):
+        pass
+    
+    async def dispatch(self, event: ChangeEvent):
+        """
+        Run every handler; one failing handler does not stop the others
+        """
+        for handler in self.handlers:
+            try:
+                await handler(event)
+            except Exception:
+                logger.exception("Event handler %s failed for %s", getattr(handler, "__name__", handler), event.type)
+
+
+class InMemoryEventBus(EventBus):
+    """
+    Single-process bus: publish dispatches straight to local handlers
+    """
+    
+    async def publish(self, event: ChangeEvent):
+        await self.dispatch(event)
+
+
+class RedisEventBus(EventBus):
+    """
+    Multi-worker bus over Redis pub/sub
+    Works against any server speaking the Redis pub/sub protocol, including
+    a local stand-in, and accepts an injected client for that purpose
+    A lost subscription is re-established with exponential back-off and
+    followed by a local "events.resync", since whatever was published in
+    the gap is gone; a failed publish is logged and dispatched locally
+    only, since the write it announces has already been committed
+    """
+    
+    def __init__(self, url: Optional[str] = None, channel: Optional[str] = None, client=None):
+        super().__init__()
+        self.url = url
+        self.channel = channel or settings.EVENT_BUS_CHANNEL
+        self.client = client
+        self.listener: Optional[asyncio.Task] = None
+    
+    async def start(self):
+        if self.client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError:
+                raise RuntimeError("EVENT_BUS_URL is set but the 'redis' package is not installed")
+            self.client = redis.from_url(self.url)
+        
+        # Subscribe once up front so a misconfigured bus fails at startup
+        pubsub = await self._subscribe()
+        self.listener = asyncio.create_task(self._listen(pubsub))
+    
+    async def stop(self):
+        if self.listener:
+            self.listener.cancel()
+            self.listener = None
+        if self.client is not None:
+            await self.client.aclose()
+    
+    async def publish(self, event: ChangeEvent):
+        try:
+            # Delivered back to this worker by its own subscription
+            await self.client.publish(self.channel, event.model_dump_json())
+        except Exception as exc:
+            logger.warning("Publishing %s on %s failed (%s); other workers will miss it", event.type, self.channel, exc)
+            await self.dispatch(event)
+    
+    async def _subscribe(self):
+        pubsub = self.client.pubsub()
+        try:
+            await pubsub.subscribe(self.channel)
+        except BaseException:
+            await _close_quietly(pubsub)
+            raise
+        return pubsub
+    
+    async def _listen(self, pubsub):
+        delay = RECONNECT_BASE_SECONDS
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = await self._subscribe()
+                    logger.info("Resubscribed to %s", self.channel)
+                    delay = RECONNECT_BASE_SECONDS
+                    await self.dispatch(ChangeEvent(type="events.resync"))
+                await self._receive(pubsub)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Event subscription on %s lost (%s), retrying in %.1fs", self.channel, exc, delay)
+            await _close_quietly(pubsub)
+            pubsub = None
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+            delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+    
+    async def _receive(self, pubsub):
+        async for message in pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            try:
+                event = ChangeEvent.model_validate_json(message["data"])
+            except Exception:
+                logger.warning("Dropping malformed event on %s", self.channel)
+                continue
+            await self.dispatch(event)
+
+
+async def _close_quietly(pubsub):
+    if pubsub is None:
+        return
+    try:
+        await pubsub.aclose()
+    except Exception:
+        pass
+
+
+def create_event_bus() -> EventBus:
+    """
+    Redis bus when EVENT_BUS_URL is configured, in-memory otherwise
+    """
+    if settings.EVENT_BUS_URL:
+        return RedisEventBus(settings.EVENT_BUS_URL)
+    return InMemoryEventBus()
+
+
+# Global event bus instance
+event_bus = create_event_bus()
+
+
+async def publish_event(type: EventType, entity_id: Optional[str] = None, user_id: Optional[str] = None, **payload):
+    """
+    Shortcut for publishing a change event on the global bus
+    """
+    await event_bus.publish(ChangeEvent(type=type, entity_id=entity_id, user_id=user_id, payload=payload))
@@ -0,0 +1,288 @@
+"""
+Durable background jobs
+Handlers enqueue deferred work and return; a pool of asyncio workers runs it.
+Jobs live in a local SQLite file, so they survive restarts and need no
+broker. A claimed job holds a lease: if its worker dies, the job becomes
+claimable again when the lease runs out. Failures are retried with
+exponential backoff until the attempts are spent.
+"""
+
+import asyncio
+import json
+import logging
+import random
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Literal, Optional
+
+from core.config import settings
+from core.metrics import CallbackGauge, Counter, Histogram, registry
+
+logger = logging.getLogger(__name__)
+
+JobType = Literal[
+    "profile.completeness",
+    "admin.activity_log",
+    "messages.mark_read",
+]
+
+JobHandler = Callable[..., Awaitable[None]]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    type TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    dedupe_key TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    run_at REAL NOT NULL,
+    locked_until REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, run_at);
+CREATE UNIQUE INDEX IF NOT EXISTS jobs_pending_dedupe ON jobs (dedupe_key) WHERE status = 'queued';
+"""
+
+# How often the workers recount the queue for the depth gauge and the backlog
+DEPTH_REFRESH_SECONDS = 1.0
+
+jobs_processed = registry.register(Counter("jobs_processed_total", "Background jobs run by type and outcome", ("type", "outcome")))
+job_duration = registry.register(Histogram("job_duration_seconds", "Background job run time", ("type",)))
+
+
+class JobQueue:
+    """
+    SQLite-backed queue
+    One connection guarded by a lock; every call is a short local transaction
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(SCHEMA)
+
+    def put(self, job_type: str, payload: dict, dedupe_key: Optional[str] = None, delay: float = 0.0) -> bool:
+        """
+        Add a job
+        Returns: False if an identical job (same dedupe_key) is already waiting
+        """
+        now = time.time()
+        with self.lock:
+            cursor = self.conn.execute(
+                "INSERT OR IGNORE INTO jobs (type, payload, dedupe_key, run_at, created_at) VALUES (?, ?, ?, ?, ?)",
+                (job_type, json.dumps(payload, default=str), dedupe_key, now + delay, now)
+            )
+        return cursor.rowcount == 1
+
+    def claim(self, lease_seconds: float) -> Optional[sqlite3.Row]:
+        """
+        Take the next due job, or one whose lease expired
+        Returns: The claimed job row, or None if nothing is due
+        """
+        now = time.time()
+        with self.lock:
+            return self.conn.execute(
+                """
+                UPDATE jobs SET status = 'running', locked_until = ?, attempts = attempts + 1
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE (status = 'queued' AND run_at <= ?) OR (status = 'running' AND locked_until < ?)
+                    ORDER BY run_at LIMIT 1
+                )
+                RETURNING *
+                """,
+                (now + lease_seconds, now, now)
+            ).fetchone()
+
+    def complete(self, job_id: int):
+        with self.lock:
+            self.conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+
+    def retry(self, job_id: int, delay: float, error: str):
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'queued', run_at = ?, locked_until = NULL, last_error = ?, dedupe_key = NULL WHERE id = ?",
+                (time.time() + delay, error, job_id)
+            )
+
+    def fail(self, job_id: int, error: str):
+        """
+        Park a job that ran out of attempts; kept for inspection
+        """
+        with self.lock:
+            self.conn.execute(
+                "UPDATE jobs SET status = 'failed', locked_until = NULL, last_error = ? WHERE id = ?",
+                (error, job_id)
+            )
+
+    def next_run_at(self) -> Optional[float]:
+        with self.lock:
+            row = self.conn.execute("SELECT MIN(run_at) FROM jobs WHERE status = 'queued'").fetchone()
+        return row[0]
+
+    def depth(self) -> Dict[str, int]:
+        """
+        Returns: Job count per status
+        """
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+class JobRunner:
+    """
+    Registry of job handlers plus the asyncio worker pool that runs them
+    The queue file is opened by start(), not at import
+    """
+
+    def __init__(self, path: str, concurrency: int):
+        self.path = path
+        self.queue: Optional[JobQueue] = None
+        self.concurrency = concurrency
+        self.handlers: Dict[str, JobHandler] = {}
+        self.workers: List[asyncio.Task] = []
+        self.wakeup: Optional[asyncio.Event] = None
+        self.depth: Dict[str, int] = {}
+        self.backlog = 0
+
+    def register(self, job_type: JobType, handler: JobHandler):
+        """
+        Set the async handler for a job type; it is called with the payload as kwargs
+        """
+        self.handlers[job_type] = handler
+
+    async def enqueue(self, job_type: JobType, dedupe: bool = False, **payload):
+        """
+        Queue a job and return immediately
+        - dedupe: skip if the same job (type and payload) is already waiting
+        Past JOB_QUEUE_MAX_DEPTH the job runs inline instead, so a backlog
+        slows the callers down rather than growing without bound
+        """
+        if self.queue is None:
+            raise RuntimeError("The job runner has not been started")
+        if self.backlog >= settings.JOB_QUEUE_MAX_DEPTH and job_type in self.handlers:
+            await self._run_inline(job_type, payload)
+            return
+
+        dedupe_key = f"{job_type}:{json.dumps(payload, sort_keys=True, default=str)}" if dedupe else None
+        if await asyncio.to_thread(self.queue.put, job_type, payload, dedupe_key):
+            self.backlog += 1
+        if self.wakeup is not None:
+            self.wakeup.set()
+
+    async def _run_inline(self, job_type: str, payload: dict):
+        """
+        Run a job in the caller; its failure is logged, not raised, since the
+        caller's own work is already done
+        """
+        try:
+            await self.handlers[job_type](**payload)
+        except Exception:
+            logger.exception("Inline job %s failed", job_type)
+            jobs_processed.inc(job_type, "inline_failed")
+        else:
+            jobs_processed.inc(job_type, "inline")
+
+    async def _watch_depth(self):
+        """
+        Recount the queue off the event loop; the backlog is estimated in between
+        """
+        while True:
+            depth = await asyncio.to_thread(self.queue.depth)
+            self.depth = depth
+            self.backlog = depth.get("queued", 0) + depth.get("running", 0)
+            await asyncio.sleep(DEPTH_REFRESH_SECONDS)
+
+    async def start(self):
+        if self.queue is None:
+            self.queue = await asyncio.to_thread(JobQueue, self.path)
+        self.wakeup = asyncio.Event()
+        self.workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+        self.workers.append(asyncio.create_task(self._watch_depth()))
+
+    async def stop(self):
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        if self.queue is not None:
+            self.queue.close()
+            self.queue = None
+
+    async def _work(self):
+        while True:
+            # Cleared before claiming so an enqueue during the claim still wakes us
+            self.wakeup.clear()
+            job = await asyncio.to_thread(self.queue.claim, settings.JOB_LEASE_SECONDS)
+            if job is None:
+                await self._sleep_until_due()
+                continue
+            await self._run(job)
+
+    async def _sleep_until_due(self):
+        next_run_at = await asyncio.to_thread(self.queue.next_run_at)
+        timeout = settings.JOB_POLL_SECONDS
+        if next_run_at is not None:
+            timeout = min(timeout, max(next_run_at - time.time(), 0.01))
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run(self, job: sqlite3.Row):
+        job_type = job["type"]
+        handler = self.handlers.get(job_type)
+        start = time.perf_counter()
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job type {job_type}")
+            await handler(**json.loads(job["payload"]))
+        except asyncio.CancelledError:
+            # Shutting down: the lease expires and another worker picks it up
+            raise
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+            if job["attempts"] >= settings.JOB_MAX_ATTEMPTS:
+                logger.error("Job %s (%s) failed permanently: %s", job["id"], job_type, error)
+                await asyncio.to_thread(self.queue.fail, job["id"], error)
+                jobs_processed.inc(job_type, "failed")
+            else:
+                delay = settings.JOB_RETRY_BASE_DELAY * (2 ** (job["attempts"] - 1))
+                delay *= random.uniform(0.5, 1.5)
+                logger.warning("Job %s (%s) failed, retrying in %.1fs: %s", job["id"], job_type, delay, error)
+                await asyncio.to_thread(self.queue.retry, job["id"], delay, error)
+                jobs_processed.inc(job_type, "retried")
+        else:
+            await asyncio.to_thread(self.queue.complete, job["id"])
+            jobs_processed.inc(job_type, "succeeded")
+        finally:
+            job_duration.observe(job_type, value=time.perf_counter() - start)
+
+
+# Global runner; the queue opens at startup
+job_runner = JobRunner(settings.JOB_QUEUE_PATH, settings.JOB_WORKERS)
+
+
+async def enqueue_job(job_type: JobType, dedupe: bool = False, **payload):
+    """
+    Shortcut for job_runner.enqueue
+    """
+    await job_runner.enqueue(job_type, dedupe, **payload)
+
+
+registry.register(CallbackGauge(
+    "job_queue_depth", "Background jobs by status", ("status",),
+    lambda: {(status,): count for status, count in {"queued": 0, "running": 0, "failed": 0, **job_runner.depth}.items()}
+))
@@ -0,0 +1,97 @@
+"""
+In-memory views kept current by the event bus
+A view loads its dataset once, on first use, and afterwards re-reads
+single entries in the background when a write to them is announced;
+when announcements may have been missed it reloads in full
+"""
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LiveIndex(ABC):
+    """
+    Base for per-worker views over database rows
+    Subclasses implement load() (the whole dataset) and refresh(key) (one
+    entry, usually a user id); tracks() and refresh_failed() narrow which
+    writes matter and what to do when a refresh fails
+    """
+
+    # Used in log messages
+    name = "index"
+
+    # Attributes filled in by load(), swapped wholesale by reload()
+    STATE: Tuple[str, ...] = ()
+
+    def __init__(self):
+        self.loaded = False
+        self.load_lock = asyncio.Lock()
+        self.pending: Set[str] = set()
+        self.tasks: Dict[str, asyncio.Task] = {}
+
+    @abstractmethod
+    async def load(self):
+        ...
+
+    @abstractmethod
+    async def refresh(self, key: str):
+        ...
+
+    def tracks(self, key: str) -> bool:
+        """
+        Whether a write to key concerns this view
+        """
+        return self.loaded
+
+    def refresh_failed(self, key: str):
+        pass
+
+    async def ensure_loaded(self):
+        if self.loaded:
+            return
+        async with self.load_lock:
+            if self.loaded:
+                return
+            await self.load()
+            self.loaded = True
+
+    async def reload(self):
+        """
+        Rebuild the whole view after change events were missed
+        The new copy is loaded beside the live one and swapped in, so
+        readers never see it half built
+        """
+        if not self.loaded:
+            return
+        async with self.load_lock:
+            fresh = type(self)()
+            await fresh.load()
+            for name in self.STATE:
+                setattr(self, name, getattr(fresh, name))
+        logger.info("Reloaded %s", self.name)
+
+    def schedule_refresh(self, key: str):
+        """
+        Refresh in the background; writes in quick succession share one refresh
+        """
+        if not self.tracks(key) or key in self.pending:
+            return
+        self.pending.add(key)
+        self.tasks[key] = asyncio.get_running_loop().create_task(self._refresh(key))
+
+    async def _refresh(self, key: str):
+        # Yield first so the writes of the current request land before we read
+        await asyncio.sleep(0)
+        self.pending.discard(key)
+        try:
+            await self.refresh(key)
+        except Exception:
+            logger.exception("Failed to refresh %s for %s", self.name, key)
+            self.refresh_failed(key)
+        finally:
+            if self.tasks.get(key) is asyncio.current_task():
+                del self.tasks[key]
@@ -0,0 +1,380 @@
+"""
+Request and database instrumentation
+Counters, gauges and histograms rendered in Prometheus text format at /metrics
+"""
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric(ABC):
+    """
+    Base class: a named metric family with fixed label names
+    """
+    kind = "untyped"
+    
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+    
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self.samples()
+    
+    @abstractmethod
+    def samples(self) -> List[str]:
+        ...
+
+
+class Counter(Metric):
+    kind = "counter"
+    
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self.values: Dict[LabelValues, float] = {}
+    
+    def inc(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+    
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels, k)} {v}" for k, v in self.values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+    
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+    
+    def set(self, *labels: str, value: float):
+        self.values[labels] = value
+
+
+class CallbackGauge(Metric):
+    """
+    Gauge whose samples are read from a callback at scrape time
+    The callback returns {label values: value}
+    """
+    kind = "gauge"
+    
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...], callback: Callable[[], Dict[LabelValues, float]]):
+        super().__init__(name, help, labels)
+        self.callback = callback
+    
+    def samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labels, k)} {v}" for k, v in self.callback().items()]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+    
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self.values: Dict[LabelValues, List[float]] = {}
+    
+    def observe(self, *labels: str, value: float):
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * (len(self.buckets) + 2)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+    
+    def samples(self) -> List[str]:
+        lines = []
+        for labels, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="%s"' % ("+Inf" if bound == float("inf") else repr(bound))
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {series[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+    
+    def register(self, metric: Metric) -> Metric:
+        self.metrics[metric.name] = metric
+        return metric
+    
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# Global registry instance
+registry = Registry()
+
+http_requests = registry.register(Counter("http_requests_total", "HTTP requests by route, method and status", ("route", "method", "status")))
+http_latency = registry.register(Histogram("http_request_duration_seconds", "HTTP request latency", ("route", "method")))
+http_in_flight = registry.register(Gauge("http_requests_in_flight", "HTTP requests currently being served", ("method",)))
+http_db_queries = registry.register(Counter("http_request_db_queries_total", "Database queries issued while serving each route", ("route",)))
+http_db_seconds = registry.register(Counter("http_request_db_seconds_total", "Time spent in database queries while serving each route", ("route",)))
+db_queries = registry.register(Counter("db_queries_total", "Database queries by table, operation and outcome", ("table", "operation", "outcome")))
+db_latency = registry.register(Histogram("db_query_duration_seconds", "Database query latency", ("table", "operation")))
+
+
+# === PER-REQUEST ATTRIBUTION ===
+
+class RequestStats:
+    """
+    Database work done on behalf of the current request
+    """
+    __slots__ = ("queries", "db_seconds")
+    
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+
+
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("current_request_stats", default=None)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status and in-flight counts per route
+    Routes are labelled by their template (/users/{user_id}), never the raw path
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        status_code = 500
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        http_in_flight.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.dec(method)
+            current_request_stats.reset(token)
+            
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            http_requests.inc(route_label, method, str(status_code))
+            http_latency.observe(route_label, method, value=elapsed)
+            if stats.queries:
+                http_db_queries.inc(route_label, amount=stats.queries)
+                http_db_seconds.inc(route_label, amount=stats.db_seconds)
+
+
+# === DATABASE INSTRUMENTATION ===
+
+# Builder methods that determine the operation of a query
+_OPERATIONS = {"select", "insert", "update", "upsert", "delete"}
+
+# Builder methods whose first argument is not a column name
+_NON_COLUMN_METHODS = {"limit", "range", "single", "maybe_single", "csv", "explain"}
+
+# Callbacks (table, operation, filters, elapsed, outcome) run after every query
+query_listeners: List[Callable[[str, str, Tuple[str, ...], float, str], None]] = []
+
+# Optional policy wrapped around every execute(), called as
+# wrapper(query, run_once) - installed by core.resilience
+execute_wrapper: Optional[Callable] = None
+
+# The same for execute_async(): await wrapper(query, run_once_async)
+async_execute_wrapper: Optional[Callable] = None
+
+
+def record_query(table: str, operation: str, elapsed: float, outcome: str = "ok", filters: Tuple[str, ...] = ()):
+    """
+    Count and time one database round trip, attributed to the current request
+    """
+    db_queries.inc(table, operation, outcome)
+    db_latency.observe(table, operation, value=elapsed)
+    stats = current_request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+    for listener in query_listeners:
+        listener(table, operation, filters, elapsed, outcome)
+
+
+class InstrumentedQuery:
+    """
+    Wraps a postgrest query builder and times its execute()
+    Also remembers the shape of the filters applied ("email.eq", "order"),
+    without their values, for the query tracer, the full call chain
+    with values as a key identifying the query, and the calls themselves
+    so the query can be replayed on another client
+    """
+    
+    def __init__(self, builder, table: str, operation: str, filters: Tuple[str, ...] = (), params: Tuple = (),
+                 calls: Tuple = (), client: Optional["InstrumentedClient"] = None):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+        self._filters = filters
+        self._params = params
+        self._calls = calls
+        self._client = client
+    
+    @property
+    def _replica(self):
+        """
+        The read-replica endpoint this query targets (None for the primary)
+        """
+        return self._client._replica if self._client is not None else None
+    
+    @property
+    def key(self) -> Tuple:
+        """
+        Identifies the query including filter values and the database it
+        targets (for coalescing and caching): a read-your-writes read on the
+        primary must never share a replica's possibly older answer
+        """
+        target = self._replica.name if self._replica is not None else "primary"
+        return (target, self._table, self._operation, self._params)
+    
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if hasattr(attr, "execute"):
+            # Builder-returning properties such as .not_
+            return InstrumentedQuery(
+                attr, self._table, self._operation, self._filters + (name,), self._params + ((name,),),
+                self._calls + ((name, None, None),), self._client
+            )
+        if not callable(attr):
+            return attr
+        
+        def chained(*args, **kwargs):
+            if name == "select" and self._operation == "query" and self._client is not None and self._client._reads is not None:
+                # Reads go through the client configured with the read timeout
+                result = self._client._reads.table(self._table).select(*args, **kwargs)
+            else:
+                result = attr(*args, **kwargs)
+            # Keep wrapping while the chain returns builders
+            if not hasattr(result, "execute"):
+                return result
+            params = self._params + ((name, repr(args), repr(sorted(kwargs.items()))),)
+            calls = self._calls + ((name, args, kwargs),)
+            if name in _OPERATIONS:
+                return InstrumentedQuery(result, self._table, name, self._filters, params, calls, self._client)
+            if args and isinstance(args[0], str) and name not in _NON_COLUMN_METHODS:
+                step = f"{args[0]}.{name.rstrip('_')}"
+            else:
+                step = name
+            return InstrumentedQuery(result, self._table, self._operation, self._filters + (step,), params, calls, self._client)
+        
+        return chained
+    
+    def replay(self, client) -> "InstrumentedQuery":
+        """
+        The same query built on another (instrumented) client
+        """
+        query = client
+        for name, args, kwargs in self._calls:
+            attr = getattr(query, name)
+            query = attr if args is None else attr(*args, **kwargs)
+        return query
+    
+    def execute(self):
+        if execute_wrapper is not None:
+            return execute_wrapper(self, self._execute_once)
+        return self._execute_once()
+    
+    def _execute_once(self):
+        start = time.perf_counter()
+        try:
+            response = self._builder.execute()
+        except Exception:
+            record_query(self._table, self._operation, time.perf_counter() - start, "error", self._filters)
+            raise
+        record_query(self._table, self._operation, time.perf_counter() - start, filters=self._filters)
+        return response
+    
+    async def execute_async(self):
+        """
+        execute() for async callers: the blocking call runs in a worker
+        thread, while timing, metrics and the resilience policy (retry
+        back-off included) stay on the event loop
+        """
+        if async_execute_wrapper is not None:
+            return await async_execute_wrapper(self, self._execute_once_async)
+        return await self._execute_once_async()
+    
+    async def _execute_once_async(self):
+        start = time.perf_counter()
+        try:
+            response = await asyncio.to_thread(self._builder.execute)
+        except Exception:
+            record_query(self._table, self._operation, time.perf_counter() - start, "error", self._filters)
+            raise
+        record_query(self._table, self._operation, time.perf_counter() - start, filters=self._filters)
+        return response
+
+
+class InstrumentedClient:
+    """
+    Drop-in wrapper around a supabase Client that instruments table() and rpc()
+    - reads: optional second client for select() queries (e.g. one with a
+      shorter HTTP timeout)
+    - replica: the read-replica endpoint this client talks to, if any
+    """
+    
+    def __init__(self, client, replica=None, reads=None):
+        self._client = client
+        self._replica = replica
+        self._reads = reads
+    
+    def table(self, name: str) -> InstrumentedQuery:
+        return InstrumentedQuery(self._client.table(name), name, "query", calls=(("table", (name,), {}),), client=self)
+    
+    def rpc(self, fn: str, params: Optional[dict] = None, **kwargs) -> InstrumentedQuery:
+        return InstrumentedQuery(
+            self._client.rpc(fn, params or {}, **kwargs), fn, "rpc",
+            calls=(("rpc", (fn, params), kwargs),), client=self
+        )
+    
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def instrument_client(client, replica=None, reads=None) -> InstrumentedClient:
+    return InstrumentedClient(client, replica, reads)
+
+
+def render_metrics() -> str:
+    return registry.render()
@@ -0,0 +1,231 @@
+"""
+On-demand CPU and memory profiling
+- StackSampler: low-overhead sampling profiler producing folded
+  (flamegraph-ready) stacks for the event loop thread
+- cProfile capture of single requests as pstats files
+- tracemalloc snapshots kept in memory for diffing
+Everything here is driven by the super-admin endpoints in api/profiling.py
+"""
+
+import cProfile
+import marshal
+import os
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException
+
+from core.admin_auth import require_super_admin
+
+# Artifacts and snapshots kept in memory (oldest dropped first)
+MAX_ARTIFACTS = 20
+MAX_SNAPSHOTS = 10
+
+
+@dataclass
+class ProfileArtifact:
+    id: str
+    kind: str  # "pstats" or "folded"
+    label: str
+    created_at: float
+    data: bytes
+    
+    @property
+    def media_type(self) -> str:
+        return "application/octet-stream" if self.kind == "pstats" else "text/plain"
+    
+    @property
+    def filename(self) -> str:
+        return f"{self.id}.prof" if self.kind == "pstats" else f"{self.id}.folded"
+
+
+class ArtifactStore:
+    def __init__(self, max_items: int):
+        self.items: "OrderedDict[str, object]" = OrderedDict()
+        self.max_items = max_items
+    
+    def add(self, key: str, item):
+        self.items[key] = item
+        while len(self.items) > self.max_items:
+            self.items.popitem(last=False)
+    
+    def get(self, key: str):
+        return self.items.get(key)
+
+
+artifacts = ArtifactStore(MAX_ARTIFACTS)
+snapshots = ArtifactStore(MAX_SNAPSHOTS)
+
+# Only one profiler may run at a time (cProfile and the sampler both
+# observe the whole event loop thread, so overlapping runs mix samples)
+_profiling_lock = threading.Lock()
+
+
+def new_artifact_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+# === SAMPLING PROFILER ===
+
+class StackSampler:
+    """
+    Samples one thread's Python stack every `interval` seconds from a
+    background thread. Cost to the sampled thread is a few microseconds
+    per sample, so it is safe on live traffic.
+    """
+    
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+    
+    def stop(self) -> bytes:
+        """
+        Stop sampling
+        Returns: Folded stacks ("root;caller;leaf count" per line)
+        """
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        lines = [f"{stack} {count}" for stack, count in self.stacks.most_common()]
+        return ("\n".join(lines) + "\n").encode()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+
+def try_acquire_profiler() -> bool:
+    return _profiling_lock.acquire(blocking=False)
+
+
+def release_profiler():
+    _profiling_lock.release()
+
+
+def pstats_bytes(profiler: cProfile.Profile) -> bytes:
+    """
+    Serialize profiler results in the format pstats.Stats / snakeviz load
+    """
+    profiler.create_stats()
+    return marshal.dumps(profiler.stats)
+
+
+# === PER-REQUEST PROFILING ===
+
+class ProfilingMiddleware:
+    """
+    Profiles a single request when it carries
+        X-Profile: pstats | folded
+        X-Profile-Token: <super admin JWT>
+    The artifact id is returned in X-Profile-Id and can be downloaded from
+    GET /admin/profiling/artifacts/{id}. Requests without a valid super
+    admin token are served normally and never profiled.
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        headers = dict(scope.get("headers") or [])
+        mode = headers.get(b"x-profile", b"").decode().lower()
+        if mode not in ("pstats", "folded"):
+            await self.app(scope, receive, send)
+            return
+        
+        status_header = self._authorize(headers.get(b"x-profile-token", b"").decode())
+        if status_header is None and not try_acquire_profiler():
+            status_header = "busy"
+        if status_header is not None:
+            await self.app(scope, receive, self._with_headers(send, [(b"x-profile-status", status_header.encode())]))
+            return
+        
+        artifact_id = new_artifact_id()
+        send = self._with_headers(send, [(b"x-profile-id", artifact_id.encode())])
+        try:
+            if mode == "pstats":
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    profiler.disable()
+                data = pstats_bytes(profiler)
+            else:
+                sampler = StackSampler()
+                sampler.start()
+                try:
+                    await self.app(scope, receive, send)
+                finally:
+                    data = sampler.stop()
+        finally:
+            release_profiler()
+        
+        label = f"{scope['method']} {scope['path']}"
+        artifacts.add(artifact_id, ProfileArtifact(artifact_id, mode, label, time.time(), data))
+    
+    @staticmethod
+    def _authorize(token: str) -> Optional[str]:
+        try:
+            require_super_admin(f"Bearer {token}")
+        except HTTPException:
+            return "denied"
+        return None
+    
+    @staticmethod
+    def _with_headers(send, extra):
+        async def wrapped(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": list(message.get("headers", [])) + extra}
+            await send(message)
+        return wrapped
+
+
+# === MEMORY ===
+
+def take_snapshot() -> str:
+    """
+    Take a tracemalloc snapshot (tracing must be started)
+    Returns: Snapshot id
+    """
+    snapshot_id = new_artifact_id()
+    snapshots.add(snapshot_id, (time.time(), tracemalloc.take_snapshot()))
+    return snapshot_id
+
+
+def top_stats(stats, limit: int) -> list:
+    return [
+        {
+            "location": str(stat.traceback[0]) if stat.traceback else "?",
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count,
+            **({"size_diff_kb": round(stat.size_diff / 1024, 1), "count_diff": stat.count_diff} if hasattr(stat, "size_diff") else {}),
+        }
+        for stat in stats[:limit]
+    ]
@@ -0,0 +1,144 @@
+"""
+Per-request query tracer
+Flags N+1 patterns (the same query shape repeated within one request),
+logs slow queries with the route that issued them, and can enforce a
+query budget so a test fails when a route starts issuing too many queries
+"""
+
+import logging
+from collections import Counter as ShapeCounter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from core.config import settings
+from core.metrics import registry, Counter, query_listeners
+
+logger = logging.getLogger(__name__)
+
+n_plus_one_detected = registry.register(Counter("db_n_plus_one_total", "Requests that repeated one query shape past the threshold", ("route", "table")))
+slow_queries = registry.register(Counter("db_slow_queries_total", "Queries slower than SLOW_QUERY_MS", ("route", "table", "operation")))
+
+
+class QueryBudgetExceeded(AssertionError):
+    """
+    Raised when a traced block issues more queries than its budget
+    """
+
+
+@dataclass
+class TracedQuery:
+    table: str
+    operation: str
+    filters: Tuple[str, ...]
+    duration: float
+    outcome: str
+    
+    @property
+    def shape(self) -> Tuple[str, str, Tuple[str, ...]]:
+        return (self.table, self.operation, self.filters)
+
+
+@dataclass
+class QueryTrace:
+    """
+    Every query issued while serving one request (or one traced block)
+    """
+    route: str = "unknown"
+    queries: List[TracedQuery] = field(default_factory=list)
+    
+    def __len__(self) -> int:
+        return len(self.queries)
+    
+    def repeated_shapes(self, threshold: int) -> List[Tuple[Tuple[str, str, Tuple[str, ...]], int]]:
+        """
+        Query shapes issued at least `threshold` times
+        """
+        counts = ShapeCounter(q.shape for q in self.queries)
+        return [(shape, n) for shape, n in counts.most_common() if n >= threshold]
+
+
+current_trace: ContextVar[Optional[QueryTrace]] = ContextVar("current_query_trace", default=None)
+
+
+def _format_shape(shape) -> str:
+    table, operation, filters = shape
+    return f"{operation} {table} [{', '.join(filters)}]"
+
+
+def trace_query(table: str, operation: str, filters: Tuple[str, ...], elapsed: float, outcome: str):
+    """
+    Query listener: add the query to the current trace, log it if slow
+    """
+    trace = current_trace.get()
+    if trace is None:
+        return
+    trace.queries.append(TracedQuery(table, operation, filters, elapsed, outcome))
+    
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        slow_queries.inc(trace.route, table, operation)
+        logger.warning("Slow query (%.0f ms) on %s: %s", elapsed * 1000, trace.route, _format_shape((table, operation, filters)))
+
+
+query_listeners.append(trace_query)
+
+
+def check_trace(trace: QueryTrace, budget: Optional[int] = None):
+    """
+    Report N+1 patterns in a finished trace and enforce a query budget
+    """
+    for shape, count in trace.repeated_shapes(settings.N_PLUS_ONE_THRESHOLD):
+        n_plus_one_detected.inc(trace.route, shape[0])
+        logger.warning("Possible N+1 on %s: %s repeated %d times", trace.route, _format_shape(shape), count)
+    
+    if budget is not None and len(trace) > budget:
+        raise QueryBudgetExceeded(
+            f"{trace.route} issued {len(trace)} queries (budget {budget}): "
+            + "; ".join(f"{_format_shape(shape)} x{n}" for shape, n in trace.repeated_shapes(1))
+        )
+
+
+@contextmanager
+def query_budget(max_queries: Optional[int] = None, route: str = "test"):
+    """
+    Trace the queries issued inside the block
+    Raises QueryBudgetExceeded on exit if more than max_queries were issued
+    
+        with query_budget(3) as trace:
+            client.get("/messages/conversations", headers=auth)
+    """
+    trace = QueryTrace(route=route)
+    token = current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        current_trace.reset(token)
+    check_trace(trace, max_queries)
+
+
+class QueryTracerMiddleware:
+    """
+    ASGI middleware giving each HTTP request its own query trace
+    With QUERY_BUDGET_PER_REQUEST set, a request over budget raises
+    QueryBudgetExceeded, which fails tests driving the app in-process
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or current_trace.get() is not None:
+            # Already inside a traced block (e.g. query_budget in a test)
+            await self.app(scope, receive, send)
+            return
+        
+        trace = QueryTrace(route=scope["path"])
+        token = current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_trace.reset(token)
+            route = scope.get("route")
+            trace.route = getattr(route, "path", None) or scope["path"]
+        check_trace(trace, settings.QUERY_BUDGET_PER_REQUEST)
@@ -0,0 +1,205 @@
+"""
+Token-bucket rate limiting for expensive endpoints
+Checked at the top of a handler, before any password hashing or DB work
+"""
+
+import logging
+import math
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Literal, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """
+    One token bucket per key in the given scope
+    - capacity: burst size
+    - refill_per_second: sustained rate
+    """
+    scope: Literal["ip", "account", "global"]
+    capacity: int
+    refill_per_second: float
+
+
+# Per-route limits. Login routes allow short bursts per IP/account but a
+# sustained rate low enough that credential stuffing cannot pin the CPU.
+ROUTE_LIMITS: Dict[str, List[RateLimitRule]] = {
+    "auth.login": [
+        RateLimitRule("ip", capacity=10, refill_per_second=10 / 60),
+        RateLimitRule("account", capacity=5, refill_per_second=5 / 300),
+        RateLimitRule("global", capacity=50, refill_per_second=20),
+    ],
+    "auth.signup": [
+        RateLimitRule("ip", capacity=5, refill_per_second=5 / 3600),
+        RateLimitRule("global", capacity=20, refill_per_second=5),
+    ],
+    "admin.login": [
+        RateLimitRule("ip", capacity=5, refill_per_second=5 / 300),
+        RateLimitRule("account", capacity=5, refill_per_second=5 / 900),
+        RateLimitRule("global", capacity=20, refill_per_second=5),
+    ],
+    "media.upload": [
+        RateLimitRule("account", capacity=10, refill_per_second=10 / 600),
+    ],
+}
+
+
+class InMemoryRateLimitStore:
+    """
+    Process-local bucket store
+    Keys are spread over shards, each an LRU capped at max_keys_per_shard,
+    so memory stays bounded and eviction never scans the whole table
+    """
+    
+    def __init__(self, shards: int = 16, max_keys_per_shard: int = 10000):
+        self.shards: List[OrderedDict] = [OrderedDict() for _ in range(shards)]
+        self.max_keys_per_shard = max_keys_per_shard
+    
+    async def consume(self, key: str, rule: RateLimitRule, cost: float = 1) -> Tuple[bool, float]:
+        """
+        Take `cost` tokens from the bucket for `key`
+        Returns: (allowed, seconds until enough tokens are available)
+        """
+        shard = self.shards[zlib.crc32(key.encode()) % len(self.shards)]
+        now = time.monotonic()
+        
+        tokens, updated = shard.pop(key, (rule.capacity, now))
+        tokens = min(rule.capacity, tokens + (now - updated) * rule.refill_per_second)
+        
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        
+        shard[key] = (tokens, now)
+        if len(shard) > self.max_keys_per_shard:
+            shard.popitem(last=False)
+        
+        return allowed, 0.0 if allowed else (cost - tokens) / rule.refill_per_second
+
+
+# Atomic token bucket for shared stores: KEYS[1] = bucket,
+# ARGV = capacity, refill/s, cost, now (seconds)
+_TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+class RedisRateLimitStore:
+    """
+    Bucket store shared by all workers, backed by any Redis-compatible server
+    While the server is unreachable, buckets fall back to a per-worker
+    in-memory store: limits stay enforced, if per worker, and logins keep
+    working instead of failing with 500s
+    """
+    
+    def __init__(self, url: Optional[str] = None, client=None, prefix: str = "ratelimit:"):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            redis = None
+        if client is None:
+            if redis is None:
+                raise RuntimeError("RATE_LIMIT_STORE_URL is set but the 'redis' package is not installed")
+            client = redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+        self.script = client.register_script(_TOKEN_BUCKET_LUA)
+        # An injected stand-in client without the redis package raises OSErrors
+        self.errors = (redis.RedisError, OSError) if redis is not None else (OSError,)
+        self.fallback = InMemoryRateLimitStore()
+        self.degraded = False
+    
+    async def consume(self, key: str, rule: RateLimitRule, cost: float = 1) -> Tuple[bool, float]:
+        try:
+            allowed, tokens = await self.script(
+                keys=[self.prefix + key],
+                args=[rule.capacity, rule.refill_per_second, cost, time.time()]
+            )
+        except self.errors as exc:
+            if not self.degraded:
+                self.degraded = True
+                logger.warning("Rate limit store unavailable (%s); limiting per worker until it recovers", exc)
+            return await self.fallback.consume(key, rule, cost)
+        if self.degraded:
+            self.degraded = False
+            logger.info("Rate limit store recovered")
+        if allowed:
+            return True, 0.0
+        return False, (cost - float(tokens)) / rule.refill_per_second
+
+
+def create_rate_limit_store():
+    """
+    Shared store when RATE_LIMIT_STORE_URL is configured, in-memory otherwise
+    """
+    if settings.RATE_LIMIT_STORE_URL:
+        return RedisRateLimitStore(settings.RATE_LIMIT_STORE_URL)
+    return InMemoryRateLimitStore()
+
+
+# Global store instance
+rate_limit_store = create_rate_limit_store()
+
+
+def get_client_ip(request: Request) -> str:
+    """
+    Client address, taken from X-Forwarded-For when running behind a proxy
+    """
+    if settings.TRUST_PROXY_HEADERS:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def check_rate_limit(request: Request, route: str, account: Optional[str] = None):
+    """
+    Enforce the limits configured for a route
+    Buckets are checked IP first, then account, then global, stopping at
+    the first one that is empty so a rejected request costs one lookup
+    Raises 429 with Retry-After when limited
+    """
+    if not settings.RATE_LIMIT_ENABLED:
+        return
+    
+    for rule in ROUTE_LIMITS.get(route, []):
+        if rule.scope == "ip":
+            key = f"{route}:ip:{get_client_ip(request)}"
+        elif rule.scope == "account":
+            if not account:
+                continue
+            key = f"{route}:account:{account.strip().lower()}"
+        else:
+            key = f"{route}:global"
+        
+        allowed, retry_after = await rate_limit_store.consume(key, rule)
+        if not allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+            )
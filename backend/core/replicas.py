@@ -0,0 +1,188 @@
+"""
+Read-replica routing
+Read-only data-access functions ask the router for a client: a healthy
+replica, chosen round-robin, unless the caller recently wrote the data
+being read (read-your-writes), in which case the primary answers.
+Each replica has its own circuit breaker, claimed only when a query
+actually runs; a replica read that fails or is rejected is retried once
+on the primary, so replica outages never surface to users.
+"""
+
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse
+
+from core.config import settings
+from core.metrics import registry, instrument_client, Counter, CallbackGauge
+from core.resilience import CircuitBreaker, is_transient
+
+logger = logging.getLogger(__name__)
+
+# Bound on remembered sticky keys; expired ones are pruned past this
+MAX_STICKY_KEYS = 10000
+
+db_replica_reads = registry.register(Counter(
+    "db_replica_reads_total", "Reads sent to a read replica by outcome", ("endpoint", "outcome")
+))
+db_primary_reads = registry.register(Counter(
+    "db_primary_routed_reads_total", "Routable reads kept on the primary by reason", ("reason",)
+))
+
+# When the current request (task) last wrote, so its later reads see the write
+_last_write_in_context: ContextVar[float] = ContextVar("last_write_in_context", default=0.0)
+
+
+class ReplicaEndpoint:
+    """
+    One read replica: an instrumented client plus its health
+    """
+    
+    def __init__(self, name: str, client, primary: Callable):
+        self.name = name
+        self.client = instrument_client(client, replica=self)
+        self.primary = primary
+        self.breaker = CircuitBreaker(f"replica:{name}", settings.REPLICA_FAILURE_THRESHOLD, settings.REPLICA_RECOVERY_SECONDS)
+    
+    def healthy(self) -> bool:
+        """
+        Worth routing a read to; the breaker is only consulted for real in execute
+        """
+        return self.breaker.available()
+    
+    def _admit(self) -> Optional[bool]:
+        """
+        Returns: None if the breaker rejects the call, else whether it is the trial
+        """
+        if not self.breaker.allow():
+            db_replica_reads.inc(self.name, "rejected")
+            return None
+        return self.breaker.state == self.breaker.HALF_OPEN
+    
+    def _failed(self, exc: Exception):
+        self.breaker.record_failure()
+        db_replica_reads.inc(self.name, "fallback")
+        logger.warning("Replica %s failed (%s), reading from primary", self.name, exc)
+    
+    def _succeeded(self, response):
+        self.breaker.record_success()
+        db_replica_reads.inc(self.name, "ok")
+        return response
+    
+    def execute(self, query, run_once: Callable):
+        """
+        Run a query once on this replica, falling back to the primary
+        """
+        trial = self._admit()
+        if trial is None:
+            return query.replay(self.primary()).execute()
+        try:
+            try:
+                response = run_once()
+            except Exception as exc:
+                if not is_transient(exc):
+                    raise
+                self._failed(exc)
+                return query.replay(self.primary()).execute()
+            return self._succeeded(response)
+        finally:
+            if trial:
+                self.breaker.end_trial()
+    
+    async def execute_async(self, query, run_once: Callable):
+        """
+        execute() for execute_async callers
+        """
+        trial = self._admit()
+        if trial is None:
+            return await query.replay(self.primary()).execute_async()
+        try:
+            try:
+                response = await run_once()
+            except Exception as exc:
+                if not is_transient(exc):
+                    raise
+                self._failed(exc)
+                return await query.replay(self.primary()).execute_async()
+            return self._succeeded(response)
+        finally:
+            if trial:
+                self.breaker.end_trial()
+
+
+class ReadRouter:
+    """
+    Picks the client for each read
+    Sticky keys name what a read depends on (usually a user id); a write
+    to the same key keeps reads of it on the primary for `sticky_seconds`
+    """
+    
+    def __init__(self, replicas: List[ReplicaEndpoint], primary: Callable, sticky_seconds: float):
+        self.replicas = replicas
+        self.primary = primary
+        self.sticky_seconds = sticky_seconds
+        self.sticky_until: Dict[str, float] = {}
+        self.next_index = 0
+    
+    def note_write(self, *keys: Optional[str]):
+        """
+        Record a write: the current request and the given keys read from the primary
+        """
+        if not self.replicas:
+            return
+        now = time.monotonic()
+        _last_write_in_context.set(now)
+        for key in keys:
+            if key:
+                self.sticky_until[key] = now + self.sticky_seconds
+        if len(self.sticky_until) > MAX_STICKY_KEYS:
+            self.sticky_until = {k: t for k, t in self.sticky_until.items() if t > now}
+    
+    def client(self, *sticky_keys: Optional[str]):
+        """
+        Client to read with: a healthy replica, or the primary
+        """
+        if not self.replicas:
+            return self.primary()
+        now = time.monotonic()
+        if now - _last_write_in_context.get() < self.sticky_seconds:
+            db_primary_reads.inc("own_write")
+            return self.primary()
+        if sticky_keys:
+            for key in sticky_keys:
+                until = self.sticky_until.get(key)
+                if until is not None:
+                    if until > now:
+                        db_primary_reads.inc("sticky")
+                        return self.primary()
+                    del self.sticky_until[key]
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[self.next_index % len(self.replicas)]
+            self.next_index += 1
+            if replica.healthy():
+                return replica.client
+        db_primary_reads.inc("no_healthy_replica")
+        return self.primary()
+
+
+def create_read_router(primary: Callable) -> ReadRouter:
+    """
+    Router over the replicas in SUPABASE_READ_REPLICA_URLS (none = primary only)
+    primary is called on each use, so the primary client can be swapped
+    """
+    urls = [u.strip() for u in (settings.SUPABASE_READ_REPLICA_URLS or "").split(",") if u.strip()]
+    replicas = []
+    if urls:
+        from supabase import create_client
+        from core.resilience import client_options
+        key = settings.SUPABASE_READ_REPLICA_KEY or settings.SUPABASE_KEY
+        for url in urls:
+            name = urlparse(url).netloc or url
+            replicas.append(ReplicaEndpoint(name, create_client(url, key, options=client_options("read")), primary))
+    router = ReadRouter(replicas, primary, settings.READ_YOUR_WRITES_SECONDS)
+    registry.register(CallbackGauge(
+        "db_replica_state", "Read replica circuit state (0 closed, 1 half-open, 2 open)", ("endpoint",),
+        lambda: {(r.name,): r.breaker.state for r in router.replicas}
+    ))
+    return router
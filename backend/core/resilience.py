@@ -0,0 +1,273 @@
+"""
+Resilience policy for database calls
+- Deadlines: an HTTP timeout on the client, plus a per-operation budget
+  that caps how long retries may keep a request waiting
+- Bounded retries with full jitter, for idempotent reads on the async
+  path only (the back-off never blocks the event loop)
+- A circuit breaker that fails fast while the backend is unhealthy and
+  serves the last good result of a read when one is cached
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from copy import deepcopy
+from typing import Callable, Optional
+
+import httpx
+from postgrest.exceptions import APIError
+
+import core.metrics as metrics
+from core.config import settings
+from core.metrics import registry, Counter, CallbackGauge
+
+logger = logging.getLogger(__name__)
+
+# PostgREST codes for "could not reach / talk to the database"
+_TRANSIENT_API_CODES = {"PGRST000", "PGRST001", "PGRST002", "PGRST003", "502", "503", "504"}
+
+db_retries = registry.register(Counter("db_retries_total", "Database reads retried after a transient error", ("table",)))
+db_stale_served = registry.register(Counter("db_stale_responses_total", "Reads answered from the last-good cache", ("table",)))
+db_rejected = registry.register(Counter("db_breaker_rejections_total", "Queries failed fast by the open circuit breaker", ("table", "operation")))
+
+
+class DatabaseUnavailable(Exception):
+    """
+    The database is unreachable (breaker open or retries exhausted)
+    Mapped to 503 + Retry-After by the app
+    """
+    
+    def __init__(self, retry_after: float):
+        super().__init__("Database temporarily unavailable")
+        self.retry_after = retry_after
+
+
+def is_transient(exc: Exception) -> bool:
+    """
+    Timeouts, connection failures and gateway errors - not bad requests
+    """
+    if isinstance(exc, httpx.TransportError):
+        return True
+    if isinstance(exc, APIError):
+        return str(getattr(exc, "code", "")) in _TRANSIENT_API_CODES
+    return False
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive transient failures
+    open -> half_open after `recovery_timeout` seconds
+    half_open lets one trial call through: success closes, failure reopens
+    """
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+    
+    def __init__(self, name: str, failure_threshold: int, recovery_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+    
+    def allow(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+            self.state = self.HALF_OPEN
+            self.trial_in_flight = False
+        if self.state == self.HALF_OPEN and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+    
+    def available(self) -> bool:
+        """
+        Whether allow() would let a call through, without claiming the
+        half-open trial (for routing decisions made before the call runs)
+        """
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            return time.monotonic() - self.opened_at >= self.recovery_timeout
+        return not self.trial_in_flight
+    
+    def end_trial(self):
+        """
+        The trial call finished, whatever the outcome: if it recorded
+        neither success nor failure (e.g. a bad request), the next call
+        becomes the trial instead of the breaker waiting forever
+        """
+        self.trial_in_flight = False
+    
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("Circuit %s closed", self.name)
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trial_in_flight = False
+    
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning("Circuit %s opened after %d failures", self.name, self.failures)
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+    
+    def retry_after(self) -> float:
+        if self.state != self.OPEN:
+            return 1.0
+        return max(1.0, self.recovery_timeout - (time.monotonic() - self.opened_at))
+
+
+class StaleCache:
+    """
+    Last good response of recent reads, keyed by the full query
+    Bounded LRU. Responses are stored as-is, with no copy on the hot path,
+    and deep-copied only when served; callers must not mutate results
+    """
+    
+    def __init__(self, max_items: int):
+        self.items: OrderedDict = OrderedDict()
+        self.max_items = max_items
+    
+    def put(self, key, response):
+        if self.max_items <= 0:
+            return
+        self.items[key] = response
+        self.items.move_to_end(key)
+        while len(self.items) > self.max_items:
+            self.items.popitem(last=False)
+    
+    def get(self, key):
+        response = self.items.get(key)
+        return deepcopy(response) if response is not None else None
+
+
+breaker = CircuitBreaker("supabase", settings.DB_BREAKER_FAILURE_THRESHOLD, settings.DB_BREAKER_RECOVERY_SECONDS)
+stale_cache = StaleCache(settings.DB_STALE_CACHE_SIZE)
+
+registry.register(CallbackGauge(
+    "db_circuit_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)", ("breaker",),
+    lambda: {(breaker.name,): breaker.state}
+))
+
+
+def _fallback(query, exc: Optional[Exception] = None):
+    """
+    Serve a stale read if we have one, otherwise report the outage
+    """
+    if query._operation == "select":
+        cached = stale_cache.get(query.key)
+        if cached is not None:
+            db_stale_served.inc(query._table)
+            return cached
+    raise DatabaseUnavailable(breaker.retry_after()) from exc
+
+
+def _admit(query) -> Optional[bool]:
+    """
+    Ask the breaker to let a query through
+    Returns: None if rejected, else whether it is the half-open trial call
+    (a trial gets a single attempt)
+    """
+    if not breaker.allow():
+        db_rejected.inc(query._table, query._operation)
+        return None
+    return breaker.state == breaker.HALF_OPEN
+
+
+def _succeeded(query, response):
+    breaker.record_success()
+    if query._operation == "select":
+        stale_cache.put(query.key, response)
+    return response
+
+
+def resilient_execute(query, run_once: Callable):
+    """
+    execute() policy installed on every instrumented query
+    Synchronous callers run on the event loop, so they get a single
+    attempt: back-off there would stall every request. Retries happen in
+    execute_async (resilient_execute_async)
+    """
+    if query._replica is not None:
+        # Replicas track their own health and fall back to the primary
+        return query._replica.execute(query, run_once)
+    
+    trial = _admit(query)
+    if trial is None:
+        return _fallback(query)
+    try:
+        try:
+            response = run_once()
+        except Exception as exc:
+            if not is_transient(exc):
+                raise
+            breaker.record_failure()
+            return _fallback(query, exc)
+        return _succeeded(query, response)
+    finally:
+        if trial:
+            breaker.end_trial()
+
+
+async def resilient_execute_async(query, run_once: Callable):
+    """
+    execute_async() policy: deadline-bounded read retries with full jitter,
+    backing off with asyncio.sleep so other requests keep running
+    """
+    if query._replica is not None:
+        return await query._replica.execute_async(query, run_once)
+    
+    trial = _admit(query)
+    if trial is None:
+        return _fallback(query)
+    
+    is_read = query._operation == "select"
+    deadline = time.monotonic() + (settings.DB_READ_TIMEOUT_SECONDS if is_read else settings.DB_WRITE_TIMEOUT_SECONDS)
+    attempts = 1 + (settings.DB_READ_RETRIES if is_read and not trial else 0)
+    
+    try:
+        for attempt in range(attempts):
+            try:
+                response = await run_once()
+            except Exception as exc:
+                if not is_transient(exc):
+                    raise
+                breaker.record_failure()
+                # Full jitter: sleep uniformly in [0, base * 2^attempt]
+                delay = random.uniform(0, settings.DB_RETRY_BASE_DELAY * (2 ** attempt))
+                last_attempt = attempt == attempts - 1
+                if last_attempt or breaker.state == breaker.OPEN or time.monotonic() + delay >= deadline:
+                    return _fallback(query, exc)
+                db_retries.inc(query._table)
+                await asyncio.sleep(delay)
+                continue
+            return _succeeded(query, response)
+    finally:
+        if trial:
+            breaker.end_trial()
+
+
+def install():
+    """
+    Apply the resilience policy to every instrumented supabase client
+    """
+    metrics.execute_wrapper = resilient_execute
+    metrics.async_execute_wrapper = resilient_execute_async
+
+
+def client_options(operation: str = "write"):
+    """
+    Client options enforcing the HTTP-level deadline for reads or writes
+    Pass the read client as instrument_client(..., reads=) so select()
+    queries get DB_READ_TIMEOUT_SECONDS and everything else the write one
+    """
+    from supabase import ClientOptions
+    timeout = settings.DB_READ_TIMEOUT_SECONDS if operation == "read" else settings.DB_WRITE_TIMEOUT_SECONDS
+    return ClientOptions(postgrest_client_timeout=timeout)
@@ -3,15 +3,36 @@ Security utilities for password hashing and JWT token generation
 Using Argon2 - more secure and modern than bcrypt
 """
 
+import asyncio
+import logging
+import statistics
+import time
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Any, Awaitable, Callable, Optional
+import bcrypt
 from jose import JWTError, jwt
-from argon2 import PasswordHasher
-from argon2.exceptions import VerifyMismatchError
+from argon2 import PasswordHasher, Parameters, Type
+from argon2.exceptions import InvalidHashError, VerificationError, VerifyMismatchError
 from core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Hashes created before the move to Argon2 (passlib bcrypt)
+LEGACY_BCRYPT_PREFIXES = ("$2a$", "$2b$", "$2y$")
+
+# OWASP floor for Argon2id memory; calibration never goes below it
+MIN_ARGON2_MEMORY_KIB = 19456
+
+
+def build_password_hasher(time_cost: int, memory_cost: int, parallelism: int) -> PasswordHasher:
+    """
+    Argon2id hasher with explicit costs
+    """
+    return PasswordHasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism, type=Type.ID)
+
+
 # Argon2 password hasher (used by 1Password, Bitwarden)
-ph = PasswordHasher()
+ph = build_password_hasher(settings.ARGON2_TIME_COST, settings.ARGON2_MEMORY_COST_KIB, settings.ARGON2_PARALLELISM)
 
 
 def hash_password(password: str) -> str:
@@ -27,13 +48,85 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     Verify a password against its hash
     Returns: True if password matches, False otherwise
     """
+    if hashed_password.startswith(LEGACY_BCRYPT_PREFIXES):
+        return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
     try:
         ph.verify(hashed_password, plain_password)
         return True
-    except VerifyMismatchError:
+    except (VerifyMismatchError, VerificationError, InvalidHashError):
         return False
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Check a stored hash against the current policy
+    Returns: True for legacy bcrypt hashes and Argon2 hashes with other costs
+    """
+    if hashed_password.startswith(LEGACY_BCRYPT_PREFIXES):
+        return True
+    try:
+        return ph.check_needs_rehash(hashed_password)
+    except InvalidHashError:
+        return True
+
+
+async def upgrade_password_hash(plain_password: str, save: Callable[[str], Awaitable[Any]]):
+    """
+    Background task run after a successful login whose hash is out of policy
+    Hashes off the event loop and hands the new hash to save()
+    """
+    try:
+        new_hash = await asyncio.to_thread(hash_password, plain_password)
+        await save(new_hash)
+    except Exception:
+        # The old hash still verifies; the next login retries
+        logger.exception("Failed to upgrade password hash")
+
+
+def _time_hash(hasher: PasswordHasher, samples: int = 3) -> float:
+    """
+    Median wall time of one hash, in milliseconds
+    """
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.hash("calibration-password")
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate_argon2(
+    target_ms: int = settings.ARGON2_TARGET_MS,
+    max_memory_kib: int = settings.ARGON2_MAX_MEMORY_KIB,
+    parallelism: int = settings.ARGON2_PARALLELISM
+) -> Parameters:
+    """
+    Pick Argon2id costs that keep one hash within target_ms on this machine
+    Memory is raised first (doubling, up to max_memory_kib), then passes
+    Returns: Calibrated parameters
+    """
+    memory_cost = MIN_ARGON2_MEMORY_KIB
+    time_cost = 1
+    
+    while memory_cost * 2 <= max_memory_kib:
+        if _time_hash(build_password_hasher(time_cost, memory_cost * 2, parallelism)) > target_ms:
+            break
+        memory_cost *= 2
+    
+    while _time_hash(build_password_hasher(time_cost + 1, memory_cost, parallelism)) <= target_ms:
+        time_cost += 1
+    
+    return Parameters(
+        type=Type.ID,
+        version=19,
+        salt_len=16,
+        hash_len=32,
+        time_cost=time_cost,
+        memory_cost=memory_cost,
+        parallelism=parallelism
+    )
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token
@@ -0,0 +1,66 @@
+"""
+Single-flight request coalescing
+Concurrent identical reads share one in-flight backend call and its
+result instead of each issuing the same query
+"""
+
+import asyncio
+from copy import deepcopy
+from typing import Awaitable, Callable, Dict, Hashable
+
+from core.metrics import registry, Counter
+
+single_flight_calls = registry.register(Counter(
+    "single_flight_calls_total",
+    "Coalesced reads by role: leader ran the query, shared reused its result",
+    ("name", "role")
+))
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent calls with the same key
+    - The first caller (leader) starts the work as its own task
+    - Later callers with the same key await that task
+    - Every caller awaits through shield(), so a cancelled caller (e.g. a
+      client that disconnected) never cancels the work the others wait on
+    - Every caller, leader included, gets its own deep copy, so handlers
+      may mutate their result: the shared one is also held by the
+      stale-read cache
+    """
+    
+    def __init__(self):
+        self.flights: Dict[Hashable, asyncio.Task] = {}
+    
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable], name: str = "default"):
+        task = self.flights.get(key)
+        if task is not None:
+            single_flight_calls.inc(name, "shared")
+            return deepcopy(await asyncio.shield(task))
+        
+        single_flight_calls.inc(name, "leader")
+        task = asyncio.ensure_future(fn())
+        self.flights[key] = task
+        task.add_done_callback(lambda _: self._forget(key, task))
+        return deepcopy(await asyncio.shield(task))
+    
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self.flights.get(key) is task:
+            del self.flights[key]
+        if not task.cancelled():
+            # Mark a failure as retrieved if every waiter went away
+            task.exception()
+
+
+# Global instance
+flights = SingleFlight()
+
+
+async def execute_coalesced(query):
+    """
+    Run an instrumented query off the event loop, sharing the call with
+    any identical query already in flight
+    Only the blocking HTTP call runs in a worker thread; the resilience
+    policy, metrics and replica routing stay on the event loop thread
+    """
+    return await flights.do(query.key, query.execute_async, name=query._table)
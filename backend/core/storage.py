@@ -0,0 +1,108 @@
+"""
+Object storage for uploaded media
+Code talks to the ObjectStore interface; LocalObjectStore keeps objects on
+the filesystem so uploads work (and can be tested) without a bucket
+"""
+
+import os
+import shutil
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Optional
+
+from core.config import BASE_DIR, settings
+
+
+class ObjectStore(ABC):
+    """
+    Minimal blob store: objects are immutable once written under a key
+    """
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def put_file(self, key: str, source_path: str) -> None:
+        """
+        Store a local file under key; the source file is consumed
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """
+        Public URL the frontend uses for the object
+        """
+
+    def local_path(self, key: str) -> Optional[str]:
+        """
+        Filesystem path of the object, for stores that have one
+        """
+        return None
+
+
+class LocalObjectStore(ObjectStore):
+    """
+    Objects as files under a root directory
+    Writes land in a temp file first so readers never see partial objects
+    """
+
+    def __init__(self, root: str, url_prefix: str):
+        self.root = Path(root).resolve()
+        self.url_prefix = url_prefix.rstrip("/")
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root not in path.parents:
+            raise ValueError(f"Invalid object key: {key}")
+        return path
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def put_file(self, key: str, source_path: str) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".upload-")
+        os.close(fd)
+        try:
+            shutil.move(source_path, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def delete(self, key: str) -> None:
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def url(self, key: str) -> str:
+        return f"{self.url_prefix}/{key}"
+
+    def local_path(self, key: str) -> Optional[str]:
+        return str(self._path(key))
+
+
+_store: Optional[ObjectStore] = None
+
+
+def get_object_store() -> ObjectStore:
+    """
+    Configured object store (created on first use)
+    """
+    global _store
+    if _store is None:
+        if settings.STORAGE_BACKEND != "local":
+            raise RuntimeError(f"Unsupported STORAGE_BACKEND: {settings.STORAGE_BACKEND}")
+        # A relative MEDIA_ROOT is taken from the backend directory, not the CWD
+        _store = LocalObjectStore(str(BASE_DIR / settings.MEDIA_ROOT), settings.MEDIA_URL_PREFIX)
+    return _store
@@ -1,20 +1,84 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Header, Query, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
 from pydantic import BaseModel, EmailStr
 from supabase import create_client, Client
-from passlib.context import CryptContext
 from datetime import datetime, timedelta
 from typing import Optional, List
+import asyncio
 import os
 import jwt
 from dotenv import load_dotenv
 
+from core.database import (
+    make_pair_key,
+    message_cursor,
+    get_conversation_messages,
+    MESSAGE_PAGE_SIZE,
+    get_conversation_summaries,
+    record_message_in_summaries,
+    mark_conversation_read,
+    rename_conversation_partner,
+    note_write,
+    get_skill_categories_by_ids,
+    create_user_skills
+)
+from models.skill import UserSkillBatchCreate
+from core.events import event_bus, publish_event
+from core.jobs import job_runner, enqueue_job
+from core.security import hash_password, verify_password, password_needs_rehash, upgrade_password_hash
+from core.rate_limit import check_rate_limit
+from core.admission import AdmissionControlMiddleware
+from core.metrics import MetricsMiddleware, instrument_client, render_metrics
+from core.query_tracer import QueryTracerMiddleware
+from core.resilience import DatabaseUnavailable, client_options
+from core.singleflight import execute_coalesced
+from services.realtime import hub, handle_change_event
+from services import profile_documents, search_index, skill_suggest
+from services.similar_professionals import similar_professionals, handle_change_event as similar_professionals_events
+from services.job_handlers import register_job_handlers
+from services.media import receive_upload, store_avatar, shutdown_process_pool, is_public_media_key
+from services.media_delivery import serve_media, media_files
+from services.skill_taxonomy import get_skill_taxonomy, tag_fields, tag_skill_fields
+from services.currency import get_fx_table
+from core.storage import get_object_store
+from core.config import settings
+from api import admin, profiling
+from core.profiling import ProfilingMiddleware
+
 # Load environment variables
 load_dotenv()
 
 # Initialize FastAPI
 app = FastAPI(title="Skill Connector API")
 
+# Event bus: every worker relays change events to its own WebSocket clients
+@app.on_event("startup")
+async def start_background_services():
+    event_bus.subscribe(handle_change_event)
+    event_bus.subscribe(profile_documents.handle_change_event)
+    event_bus.subscribe(search_index.handle_change_event)
+    event_bus.subscribe(similar_professionals_events)
+    event_bus.subscribe(skill_suggest.handle_change_event)
+    # Compile the taxonomy matcher and load the FX table before first use
+    get_skill_taxonomy()
+    get_fx_table()
+    # Create the media root now, so a bad MEDIA_ROOT fails the boot
+    get_object_store()
+    await event_bus.start()
+    register_job_handlers()
+    await job_runner.start()
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    await job_runner.stop()
+    await event_bus.stop()
+    shutdown_process_pool()
+    media_files.clear()
+
+# Load shedding (added before CORS so 503s still carry CORS headers)
+app.add_middleware(AdmissionControlMiddleware)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -24,13 +88,35 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# On-demand request profiling (X-Profile header, super admins only)
+app.add_middleware(ProfilingMiddleware)
+
+# Per-request query tracing: N+1 detection and slow-query log
+app.add_middleware(QueryTracerMiddleware)
+
+# Latency, status and in-flight metrics (outermost, so shed requests count too)
+app.add_middleware(MetricsMiddleware)
+
+# Database outages (open circuit breaker, retries exhausted) become fast 503s
+@app.exception_handler(DatabaseUnavailable)
+async def database_unavailable_handler(request: Request, exc: DatabaseUnavailable):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service temporarily unavailable, please retry shortly"},
+        headers={"Retry-After": str(int(exc.retry_after))}
+    )
+
+# Admin panel API (used by frontend/admin-dashboard.js)
+app.include_router(admin.router)
+app.include_router(profiling.router)
+
 # Supabase setup
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+supabase: Client = instrument_client(
+    create_client(SUPABASE_URL, SUPABASE_KEY, options=client_options("write")),
+    reads=create_client(SUPABASE_URL, SUPABASE_KEY, options=client_options("read"))
+)
 
 # JWT settings
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-here-change-in-production")
@@ -91,12 +177,6 @@ class MessageResponse(BaseModel):
     receiver_name: Optional[str] = None
 
 # Helper functions
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
 def create_access_token(data: dict):
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -113,24 +193,55 @@ def get_current_user(token: str):
         return user_id
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
-    except jwt.JWTError:
+    except jwt.InvalidTokenError:
         raise HTTPException(status_code=401, detail="Could not validate credentials")
 
+def without_password(user: dict) -> dict:
+    """
+    Copy of a user row without the password hash
+    Query results may be shared (stale-read cache), so they are never mutated
+    """
+    return {key: value for key, value in user.items() if key != 'password'}
+
 # Routes
 @app.get("/")
 async def root():
     return {"message": "Skill Connector API", "status": "running"}
 
+# Stored media (local object store)
+@app.api_route(settings.MEDIA_URL_PREFIX + "/{key:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def get_media(key: str, request: Request):
+    # Originals keep their EXIF metadata; only the re-encoded variants are public
+    if not is_public_media_key(key):
+        raise HTTPException(status_code=404, detail="Not found")
+    
+    store = get_object_store()
+    try:
+        path = store.local_path(key)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Not found")
+    if path is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return await serve_media(request, key, path)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # Auth routes
 @app.post("/auth/signup", response_model=Token)
-async def signup(user: UserSignup):
+async def signup(user: UserSignup, request: Request):
+    # Throttle before any hashing or DB work
+    await check_rate_limit(request, "auth.signup")
+    
     # Check if user exists
-    existing_user = supabase.table('users').select('*').eq('email', user.email).execute()
+    existing_user = await supabase.table('users').select('*').eq('email', user.email).execute_async()
     if existing_user.data:
         raise HTTPException(status_code=400, detail="Email already registered")
     
     # Hash password
-    hashed_password = hash_password(user.password)
+    hashed_password = await asyncio.to_thread(hash_password, user.password)
     
     # Create user
     new_user = {
@@ -146,12 +257,13 @@ async def signup(user: UserSignup):
         raise HTTPException(status_code=500, detail="Failed to create user")
     
     user_data = result.data[0]
+    note_write(user_data['id'])
     
     # Create access token
     access_token = create_access_token(data={"sub": user_data['id']})
     
     # Remove password from response
-    user_data.pop('password', None)
+    user_data = without_password(user_data)
     
     return {
         "access_token": access_token,
@@ -159,10 +271,17 @@ async def signup(user: UserSignup):
         "user": user_data
     }
 
+async def save_password_hash(user_id: str, new_hash: str):
+    supabase.table('users').update({"password": new_hash}).eq('id', user_id).execute()
+    note_write(user_id)
+
 @app.post("/auth/login", response_model=Token)
-async def login(user: UserLogin):
+async def login(user: UserLogin, request: Request, background_tasks: BackgroundTasks):
+    # Throttle before any hashing or DB work
+    await check_rate_limit(request, "auth.login", account=user.email)
+    
     # Get user from database
-    db_user = supabase.table('users').select('*').eq('email', user.email).execute()
+    db_user = await supabase.table('users').select('*').eq('email', user.email).execute_async()
     
     if not db_user.data:
         raise HTTPException(status_code=401, detail="Invalid email or password")
@@ -170,14 +289,18 @@ async def login(user: UserLogin):
     user_data = db_user.data[0]
     
     # Verify password
-    if not verify_password(user.password, user_data['password']):
+    if not await asyncio.to_thread(verify_password, user.password, user_data['password']):
         raise HTTPException(status_code=401, detail="Invalid email or password")
     
+    # Legacy bcrypt and out-of-policy Argon2 hashes are upgraded after the response
+    if password_needs_rehash(user_data['password']):
+        background_tasks.add_task(upgrade_password_hash, user.password, lambda new_hash: save_password_hash(user_data['id'], new_hash))
+    
     # Create access token
     access_token = create_access_token(data={"sub": user_data['id']})
     
     # Remove password from response
-    user_data.pop('password', None)
+    user_data = without_password(user_data)
     
     return {
         "access_token": access_token,
@@ -190,51 +313,117 @@ async def login(user: UserLogin):
 async def get_all_users():
     """Get all users for public browsing (professionals marketplace)"""
     try:
-        result = supabase.table('users').select('*').execute()
+        result = await supabase.table('users').select('*').execute_async()
         # Remove passwords from all users
-        users = result.data
-        for user in users:
-            user.pop('password', None)
-        return users
+        return [without_password(user) for user in result.data]
+    except DatabaseUnavailable:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching users: {str(e)}")
 
+# Faceted search over professionals (served from the in-memory index)
+@app.get("/search/professionals")
+async def search_professionals(
+    q: Optional[str] = None,
+    category: List[str] = Query([]),
+    rate: List[str] = Query([]),
+    experience: List[str] = Query([]),
+    available: Optional[bool] = None,
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    radius_km: Optional[float] = None,
+    min_rate: Optional[float] = Query(None, ge=0),
+    max_rate: Optional[float] = Query(None, ge=0),
+    sort: Optional[str] = Query(None, pattern="^-?rate$"),
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100)
+):
+    """
+    Professionals matching the filters, one page at a time, with facet counts
+    for categories, rate buckets, experience bands, availability and
+    (when lat/lng are given) distance rings
+    Rates are compared in the base currency of the FX table (see "currency")
+    """
+    await search_index.professional_index.ensure_loaded()
+    filters = {"category": category, "rate": rate, "experience": experience}
+    if available is not None:
+        filters["available"] = ["true" if available else "false"]
+    
+    result = search_index.professional_index.search(
+        q=q, filters=filters, lat=lat, lng=lng, radius_km=radius_km,
+        min_rate=min_rate, max_rate=max_rate, sort=sort,
+        offset=(page - 1) * limit, limit=limit
+    )
+    return {**result, "page": page, "limit": limit}
+
 # Public endpoint to get a single user by ID
 @app.get("/users/{user_id}")
 async def get_user_by_id(user_id: str):
     """Get a specific user's public profile"""
     try:
-        result = supabase.table('users').select('*').eq('id', user_id).execute()
+        # Hot when a profile is shared: identical concurrent reads share one query
+        result = await execute_coalesced(supabase.table('users').select('*').eq('id', user_id))
         if not result.data:
             raise HTTPException(status_code=404, detail="User not found")
         user_data = result.data[0]
         # Remove password from response
-        user_data.pop('password', None)
+        user_data = without_password(user_data)
         return user_data
+    except (HTTPException, DatabaseUnavailable):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching user: {str(e)}")
 
 # Profile routes
 @app.get("/profile/me")
-async def get_profile(authorization: str = Depends(lambda: None)):
+async def get_profile(authorization: Optional[str] = Header(None)):
     if not authorization or not authorization.startswith('Bearer '):
         raise HTTPException(status_code=401, detail="Not authenticated")
     
     token = authorization.split(' ')[1]
     user_id = get_current_user(token)
     
-    result = supabase.table('users').select('*').eq('id', user_id).execute()
+    result = await supabase.table('users').select('*').eq('id', user_id).execute_async()
     
     if not result.data:
         raise HTTPException(status_code=404, detail="User not found")
     
     user_data = result.data[0]
-    user_data.pop('password', None)
+    user_data = without_password(user_data)
     
     return user_data
 
+@app.get("/profile/{user_id}/public")
+async def get_public_profile(user_id: str, request: Request):
+    """
+    Public profile document: user, skills with category names, completeness
+    Served from pre-serialized (and pre-gzipped) bytes
+    """
+    document = profile_documents.profile_documents.get(user_id)
+    if document is None:
+        document = await profile_documents.profile_documents.build(user_id)
+        if document is None:
+            raise HTTPException(status_code=404, detail="User not found")
+    
+    headers = {"ETag": document.etag, "Vary": "Accept-Encoding", "Cache-Control": "public, max-age=0, must-revalidate"}
+    if request.headers.get("if-none-match") == document.etag:
+        return Response(status_code=304, headers=headers)
+    
+    if document.gzip_body is not None and "gzip" in request.headers.get("accept-encoding", ""):
+        return Response(document.gzip_body, media_type="application/json", headers={**headers, "Content-Encoding": "gzip"})
+    return Response(document.body, media_type="application/json", headers=headers)
+
+@app.get("/profile/{user_id}/similar")
+async def get_similar_professionals(user_id: str, limit: int = Query(6, ge=1, le=settings.SIMILAR_TOP_K)):
+    """
+    Professionals most similar to this one (skills, category, rate, location)
+    Read from the precomputed neighbour table
+    """
+    await similar_professionals.ensure_loaded()
+    return similar_professionals.get(user_id, limit)
+
 @app.put("/profile/me")
-async def update_profile(profile: ProfileUpdate, authorization: str = Depends(lambda: None)):
+async def update_profile(profile: ProfileUpdate, authorization: Optional[str] = Header(None)):
     if not authorization or not authorization.startswith('Bearer '):
         raise HTTPException(status_code=401, detail="Not authenticated")
     
@@ -247,18 +436,52 @@ async def update_profile(profile: ProfileUpdate, authorization: str = Depends(la
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
+    if 'bio' in update_data:
+        update_data.update(tag_fields(update_data['bio']))
+    
     result = supabase.table('users').update(update_data).eq('id', user_id).execute()
+    note_write(user_id)
     
     if not result.data:
         raise HTTPException(status_code=404, detail="User not found")
     
     user_data = result.data[0]
-    user_data.pop('password', None)
+    user_data = without_password(user_data)
+    
+    # Keep the inbox entries that show this user as a partner in sync
+    if 'full_name' in update_data:
+        await rename_conversation_partner(user_id, update_data['full_name'])
+    
+    await publish_event("profile.updated", user_id, user_id, fields=list(update_data))
+    await enqueue_job("profile.completeness", dedupe=True, user_id=user_id)
     
     return user_data
 
+@app.post("/profile/me/avatar")
+async def upload_avatar(request: Request, authorization: Optional[str] = Header(None)):
+    """Upload a profile picture (multipart field "file"); stores WebP variants"""
+    if not authorization or not authorization.startswith('Bearer '):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    token = authorization.split(' ')[1]
+    user_id = get_current_user(token)
+    await check_rate_limit(request, "media.upload", account=user_id)
+    
+    upload = await receive_upload(request)
+    variants = await store_avatar(upload)
+    
+    result = supabase.table('users').update({"profile_picture": variants["medium"]}).eq('id', user_id).execute()
+    note_write(user_id)
+    
+    if not result.data:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    await publish_event("profile.updated", user_id, user_id, fields=["profile_picture"])
+    
+    return {"profile_picture": variants["medium"], "variants": variants, "sha256": upload.sha256}
+
 @app.put("/profile/location")
-async def update_location(location: LocationUpdate, authorization: str = Depends(lambda: None)):
+async def update_location(location: LocationUpdate, authorization: Optional[str] = Header(None)):
     if not authorization or not authorization.startswith('Bearer '):
         raise HTTPException(status_code=401, detail="Not authenticated")
     
@@ -269,27 +492,42 @@ async def update_location(location: LocationUpdate, authorization: str = Depends
         "latitude": location.latitude,
         "longitude": location.longitude
     }).eq('id', user_id).execute()
+    note_write(user_id)
     
     if not result.data:
         raise HTTPException(status_code=404, detail="User not found")
     
+    await publish_event("profile.updated", user_id, user_id, fields=["latitude", "longitude"])
+    await enqueue_job("profile.completeness", dedupe=True, user_id=user_id)
+    
     return {"message": "Location updated successfully"}
 
 # Skills routes
+@app.get("/skills/suggest")
+async def suggest_skills(q: str = Query("", max_length=skill_suggest.MAX_QUERY_LENGTH), limit: int = Query(8, ge=1, le=skill_suggest.TOP_K)):
+    """
+    Autocomplete for skill names: existing skill and category names with a
+    word starting with q, most used first
+    """
+    await skill_suggest.skill_suggestions.ensure_loaded()
+    return skill_suggest.skill_suggestions.suggest(q, limit)
+
 @app.get("/skills/categories")
 async def get_categories():
     """Get all skill categories"""
-    result = supabase.table('skill_categories').select('*').execute()
+    result = await execute_coalesced(supabase.table('skill_categories').select('*'))
     return result.data
 
 @app.post("/skills/categories")
 async def create_category(category: CategoryCreate):
     """Create a new skill category"""
     result = supabase.table('skill_categories').insert(category.dict()).execute()
+    note_write("skill_categories")
+    await publish_event("category.created", result.data[0]['id'])
     return result.data[0]
 
 @app.post("/skills")
-async def create_skill(skill: SkillCreate, authorization: str = Depends(lambda: None)):
+async def create_skill(skill: SkillCreate, authorization: Optional[str] = Header(None)):
     if not authorization or not authorization.startswith('Bearer '):
         raise HTTPException(status_code=401, detail="Not authenticated")
     
@@ -299,22 +537,65 @@ async def create_skill(skill: SkillCreate, authorization: str = Depends(lambda:
     skill_data = skill.dict()
     skill_data['user_id'] = user_id
     skill_data['created_at'] = datetime.utcnow().isoformat()
+    skill_data.update(tag_skill_fields(skill_data))
     
     result = supabase.table('user_skills').insert(skill_data).execute()
+    note_write(user_id)
     
     if not result.data:
         raise HTTPException(status_code=500, detail="Failed to create skill")
     
+    await publish_event("skill.created", result.data[0]['id'], user_id)
+    await enqueue_job("profile.completeness", dedupe=True, user_id=user_id)
+    
     return result.data[0]
 
+@app.post("/skills/batch", status_code=201)
+async def create_skills_batch(batch: UserSkillBatchCreate, authorization: Optional[str] = Header(None)):
+    """
+    Add several skills at once: one category lookup, one insert, one
+    change event and one completeness job for the whole batch
+    """
+    if not authorization or not authorization.startswith('Bearer '):
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    
+    token = authorization.split(' ')[1]
+    user_id = get_current_user(token)
+    
+    category_ids = {skill.category_id for skill in batch.skills}
+    categories = await get_skill_categories_by_ids(list(category_ids))
+    missing = category_ids - {category['id'] for category in categories}
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Skill category not found: {', '.join(sorted(missing))}")
+    
+    created_at = datetime.utcnow().isoformat()
+    skills_data = []
+    for skill in batch.skills:
+        skill_data = skill.dict()
+        skill_data['hourly_rate'] = float(skill.hourly_rate) if skill.hourly_rate is not None else None
+        skill_data['user_id'] = user_id
+        skill_data['created_at'] = created_at
+        skill_data.update(tag_skill_fields(skill_data))
+        skills_data.append(skill_data)
+    
+    created = await create_user_skills(skills_data)
+    
+    if len(created) != len(skills_data):
+        raise HTTPException(status_code=500, detail="Failed to create skills")
+    
+    await publish_event("skill.created", None, user_id, skills=[skill['id'] for skill in created])
+    await enqueue_job("profile.completeness", dedupe=True, user_id=user_id)
+    
+    return created
+
 @app.get("/skills/user/{user_id}")
 async def get_user_skills(user_id: str):
     """Get all skills for a specific user"""
-    result = supabase.table('user_skills').select('*').eq('user_id', user_id).execute()
+    result = await execute_coalesced(supabase.table('user_skills').select('*').eq('user_id', user_id))
     return result.data
 
 @app.delete("/skills/{skill_id}")
-async def delete_skill(skill_id: str, authorization: str = Depends(lambda: None)):
+async def delete_skill(skill_id: str, authorization: Optional[str] = Header(None)):
     if not authorization or not authorization.startswith('Bearer '):
         raise HTTPException(status_code=401, detail="Not authenticated")
     
@@ -322,7 +603,7 @@ async def delete_skill(skill_id: str, authorization: str = Depends(lambda: None)
     user_id = get_current_user(token)
     
     # Check if skill belongs to user
-    skill = supabase.table('user_skills').select('*').eq('id', skill_id).execute()
+    skill = await supabase.table('user_skills').select('*').eq('id', skill_id).execute_async()
     
     if not skill.data:
         raise HTTPException(status_code=404, detail="Skill not found")
@@ -331,12 +612,15 @@ async def delete_skill(skill_id: str, authorization: str = Depends(lambda: None)
         raise HTTPException(status_code=403, detail="Not authorized to delete this skill")
     
     supabase.table('user_skills').delete().eq('id', skill_id).execute()
+    note_write(user_id)
+    await publish_event("skill.deleted", skill_id, user_id)
+    await enqueue_job("profile.completeness", dedupe=True, user_id=user_id)
     
     return {"message": "Skill deleted successfully"}
 
 # Messaging routes
 @app.post("/messages/send")
-async def send_message(msg: MessageCreate, authorization: str = Depends(lambda: None)):
+async def send_message(msg: MessageCreate, authorization: Optional[str] = Header(None)):
     """Send a message to another user"""
     if not authorization or not authorization.startswith('Bearer '):
         raise HTTPException(status_code=401, detail="Not authenticated")
@@ -348,6 +632,7 @@ async def send_message(msg: MessageCreate, authorization: str = Depends(lambda:
     message_data = {
         "sender_id": sender_id,
         "receiver_id": msg.receiver_id,
+        "pair_key": make_pair_key(sender_id, msg.receiver_id),
         "message": msg.message,
         "created_at": datetime.utcnow().isoformat()
     }
@@ -357,10 +642,18 @@ async def send_message(msg: MessageCreate, authorization: str = Depends(lambda:
     if not result.data:
         raise HTTPException(status_code=500, detail="Failed to send message")
     
-    return result.data[0]
+    message = result.data[0]
+    
+    # Update both participants' inbox entries
+    unread_count = await record_message_in_summaries(message)
+    
+    # Push to the receiver and to the sender's other open tabs, on every worker
+    await publish_event("message.created", message['id'], sender_id, message=message, unread_count=unread_count)
+    
+    return message
 
 @app.get("/messages/conversations")
-async def get_conversations(authorization: str = Depends(lambda: None)):
+async def get_conversations(authorization: Optional[str] = Header(None)):
     """Get all conversations for the current user"""
     if not authorization or not authorization.startswith('Bearer '):
         raise HTTPException(status_code=401, detail="Not authenticated")
@@ -368,88 +661,92 @@ async def get_conversations(authorization: str = Depends(lambda: None)):
     token = authorization.split(' ')[1]
     user_id = get_current_user(token)
     
-    # Get all messages where user is sender or receiver
-    sent = supabase.table('messages').select('*').eq('sender_id', user_id).execute()
-    received = supabase.table('messages').select('*').eq('receiver_id', user_id).execute()
-    
-    all_messages = sent.data + received.data
-    
-    # Group by conversation partner
-    conversations = {}
-    for msg in all_messages:
-        partner_id = msg['receiver_id'] if msg['sender_id'] == user_id else msg['sender_id']
-        
-        if partner_id not in conversations:
-            conversations[partner_id] = {
-                'partner_id': partner_id,
-                'messages': [],
-                'last_message': None,
-                'unread_count': 0
-            }
-        
-        conversations[partner_id]['messages'].append(msg)
-        
-        # Count unread messages
-        if msg['receiver_id'] == user_id and not msg['is_read']:
-            conversations[partner_id]['unread_count'] += 1
-    
-    # Get partner details and find last message
-    result = []
-    for partner_id, conv in conversations.items():
-        # Get partner name
-        partner = supabase.table('users').select('full_name').eq('id', partner_id).execute()
-        partner_name = partner.data[0]['full_name'] if partner.data else 'Unknown'
-        
-        # Sort messages by date
-        conv['messages'].sort(key=lambda x: x['created_at'], reverse=True)
-        last_msg = conv['messages'][0]
-        
-        result.append({
-            'partner_id': partner_id,
-            'partner_name': partner_name,
-            'last_message': last_msg['message'],
-            'last_message_time': last_msg['created_at'],
-            'unread_count': conv['unread_count'],
-            'is_sender': last_msg['sender_id'] == user_id
-        })
+    # Single indexed read of the materialized inbox
+    summaries = await get_conversation_summaries(user_id)
     
-    # Sort by most recent
-    result.sort(key=lambda x: x['last_message_time'], reverse=True)
-    
-    return result
+    return [
+        {
+            'partner_id': conv['partner_id'],
+            'partner_name': conv['partner_name'] or 'Unknown',
+            'last_message': conv['last_message'],
+            'last_message_time': conv['last_message_time'],
+            'unread_count': conv['unread_count'],
+            'is_sender': conv['last_sender_id'] == user_id
+        }
+        for conv in summaries
+    ]
 
 @app.get("/messages/conversation/{partner_id}")
-async def get_conversation(partner_id: str, authorization: str = Depends(lambda: None)):
-    """Get all messages with a specific user"""
+async def get_conversation(
+    partner_id: str,
+    before: Optional[str] = None,
+    since: Optional[str] = None,
+    limit: int = MESSAGE_PAGE_SIZE,
+    authorization: Optional[str] = Header(None)
+):
+    """
+    Get messages with a specific user, one page at a time
+    - before: cursor of the oldest message already loaded (next_before), to page back
+    - since: cursor of the newest message already loaded (next_since), to fetch new ones
+    """
     if not authorization or not authorization.startswith('Bearer '):
         raise HTTPException(status_code=401, detail="Not authenticated")
     
     token = authorization.split(' ')[1]
     user_id = get_current_user(token)
     
-    # Get all messages between these two users
-    sent = supabase.table('messages').select('*').eq('sender_id', user_id).eq('receiver_id', partner_id).execute()
-    received = supabase.table('messages').select('*').eq('sender_id', partner_id).eq('receiver_id', user_id).execute()
+    # Single query on (pair_key, created_at)
+    messages, more = await get_conversation_messages(user_id, partner_id, before=before, since=since, limit=limit)
     
-    all_messages = sent.data + received.data
-    all_messages.sort(key=lambda x: x['created_at'])
-    
-    # Mark received messages as read
-    if received.data:
-        for msg in received.data:
-            if not msg['is_read']:
-                supabase.table('messages').update({'is_read': True}).eq('id', msg['id']).execute()
+    # Move the read watermark now; the per-message flags are updated in the background
+    unread = [msg for msg in messages if msg['receiver_id'] == user_id and not msg['is_read']]
+    if unread:
+        read_at = max(msg['created_at'] for msg in unread)
+        unread_count = await mark_conversation_read(user_id, partner_id, read_at)
+        await enqueue_job("messages.mark_read", dedupe=True, user_id=user_id, partner_id=partner_id, read_at=read_at)
+        await publish_event("conversation.read", partner_id, user_id, partner_id=partner_id, read_at=read_at, unread_count=unread_count)
     
     # Get partner details
-    partner = supabase.table('users').select('full_name').eq('id', partner_id).execute()
+    partner = await supabase.table('users').select('full_name').eq('id', partner_id).execute_async()
     partner_name = partner.data[0]['full_name'] if partner.data else 'Unknown'
     
+    # Keyset cursors: older history exists past the oldest row returned, and
+    # new messages are fetched from the newest one
+    next_before = message_cursor(messages[0]) if messages and more and not since else None
+    next_since = message_cursor(messages[-1]) if messages else since
+    
     return {
         'partner_id': partner_id,
         'partner_name': partner_name,
-        'messages': all_messages
+        'messages': messages,
+        'next_before': next_before,
+        'next_since': next_since
     }
 
+# Real-time delivery
+@app.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket, token: Optional[str] = None):
+    """
+    Push channel for new messages, read receipts and unread counts
+    Browsers cannot set headers on WebSockets, so the JWT comes as ?token=
+    """
+    try:
+        user_id = get_current_user(token or '')
+    except HTTPException:
+        await websocket.close(code=1008)
+        return
+    
+    await websocket.accept()
+    conn = await hub.connect(user_id, websocket)
+    try:
+        # Server-push only - incoming frames are read just to notice disconnects
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.disconnect(conn)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,9 @@
+-- Canonical skill ids (services/skill_taxonomy.py) stored next to the free
+-- text they were derived from; null means "not tagged yet".
+-- After applying: set SKILL_IDS_COLUMN=true, then run python -m services.backfill
+
+alter table user_skills add column if not exists skill_ids int[];
+alter table users add column if not exists skill_ids int[];
+
+create index if not exists user_skills_skill_ids_idx on user_skills using gin (skill_ids);
+create index if not exists users_skill_ids_idx on users using gin (skill_ids);
@@ -0,0 +1,8 @@
+-- Every message carries a pair_key shared by both directions of a
+-- conversation (core.database.make_pair_key), so a history page is one
+-- query on a single index.
+-- After applying: run python -m services.backfill to key older messages
+
+alter table messages add column if not exists pair_key text;
+
+create index if not exists messages_pair_key_created_at_idx on messages (pair_key, created_at desc);
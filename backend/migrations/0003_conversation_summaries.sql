@@ -0,0 +1,19 @@
+-- One inbox row per (user_id, partner_id), so the inbox is a single indexed
+-- read instead of a scan over every message.
+-- After applying: run python -m services.backfill to build rows for
+-- existing conversations
+
+create table if not exists conversation_summaries (
+    user_id uuid not null,
+    partner_id uuid not null,
+    partner_name text,
+    last_message text,
+    last_message_time timestamptz,
+    last_sender_id uuid,
+    unread_count int not null default 0,
+    last_read_at timestamptz,
+    primary key (user_id, partner_id)
+);
+
+create index if not exists conversation_summaries_user_time_idx
+    on conversation_summaries (user_id, last_message_time desc);
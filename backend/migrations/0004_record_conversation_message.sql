@@ -0,0 +1,52 @@
+-- Folds a sent message into both participants' conversation_summaries rows
+-- in one statement, bumping the receiver's unread_count in place so that
+-- concurrent sends never overwrite each other's increments.
+-- A send that commits after a newer one still counts as unread, but never
+-- moves last_message back to the older text.
+-- Called by core.database.record_message_in_summaries; apply before deploying.
+
+create or replace function record_conversation_message(
+    p_sender_id uuid,
+    p_receiver_id uuid,
+    p_message text,
+    p_sent_at timestamptz
+) returns integer
+language plpgsql
+as $$
+declare
+    new_unread integer;
+begin
+    insert into conversation_summaries as s
+        (user_id, partner_id, partner_name, last_message, last_message_time, last_sender_id, unread_count)
+    values
+        (p_receiver_id, p_sender_id,
+         coalesce((select full_name from users where id = p_sender_id), 'Unknown'),
+         p_message, p_sent_at, p_sender_id, 1)
+    on conflict (user_id, partner_id) do update set
+        partner_name = excluded.partner_name,
+        last_message = case when s.last_message_time is null or excluded.last_message_time >= s.last_message_time
+                            then excluded.last_message else s.last_message end,
+        last_sender_id = case when s.last_message_time is null or excluded.last_message_time >= s.last_message_time
+                              then excluded.last_sender_id else s.last_sender_id end,
+        last_message_time = greatest(s.last_message_time, excluded.last_message_time),
+        unread_count = s.unread_count + 1
+    returning s.unread_count into new_unread;
+
+    if p_sender_id <> p_receiver_id then
+        insert into conversation_summaries as s
+            (user_id, partner_id, partner_name, last_message, last_message_time, last_sender_id, unread_count)
+        values
+            (p_sender_id, p_receiver_id,
+             coalesce((select full_name from users where id = p_receiver_id), 'Unknown'),
+             p_message, p_sent_at, p_sender_id, 0)
+        on conflict (user_id, partner_id) do update set
+            partner_name = excluded.partner_name,
+            last_message = excluded.last_message,
+            last_message_time = excluded.last_message_time,
+            last_sender_id = excluded.last_sender_id
+        where s.last_message_time is null or excluded.last_message_time >= s.last_message_time;
+    end if;
+
+    return new_unread;
+end;
+$$;
@@ -0,0 +1,105 @@
+-- Unread counts are recounted under the summary row's lock, by both the
+-- send and the read path, so neither can overwrite the other with a stale
+-- value: whichever runs second waits for the lock and counts again.
+-- Replaces the increment in record_conversation_message (0004), which a
+-- concurrent read recount could overwrite.
+-- Called by core.database.record_message_in_summaries and
+-- mark_conversation_read; apply before deploying.
+
+-- Messages from the partner above the watermark; with no watermark yet,
+-- those not flagged read
+create or replace function conversation_unread_count(
+    p_user_id uuid,
+    p_partner_id uuid,
+    p_since timestamptz
+) returns integer
+language sql
+stable
+as $$
+    select count(*)::int
+    from messages
+    where pair_key = least(p_user_id::text collate "C", p_partner_id::text collate "C")
+                     || ':' || greatest(p_user_id::text collate "C", p_partner_id::text collate "C")
+      and receiver_id = p_user_id
+      and case when p_since is null then not is_read else created_at > p_since end;
+$$;
+
+create or replace function record_conversation_message(
+    p_sender_id uuid,
+    p_receiver_id uuid,
+    p_message text,
+    p_sent_at timestamptz
+) returns integer
+language plpgsql
+as $$
+declare
+    watermark timestamptz;
+    new_unread integer;
+begin
+    -- The upsert locks the receiver's row until the function returns
+    insert into conversation_summaries as s
+        (user_id, partner_id, partner_name, last_message, last_message_time, last_sender_id)
+    values
+        (p_receiver_id, p_sender_id,
+         coalesce((select full_name from users where id = p_sender_id), 'Unknown'),
+         p_message, p_sent_at, p_sender_id)
+    on conflict (user_id, partner_id) do update set
+        partner_name = excluded.partner_name,
+        last_message = case when s.last_message_time is null or excluded.last_message_time >= s.last_message_time
+                            then excluded.last_message else s.last_message end,
+        last_sender_id = case when s.last_message_time is null or excluded.last_message_time >= s.last_message_time
+                              then excluded.last_sender_id else s.last_sender_id end,
+        last_message_time = greatest(s.last_message_time, excluded.last_message_time)
+    returning s.last_read_at into watermark;
+
+    -- A new statement, so the count sees every message committed before the lock
+    new_unread := conversation_unread_count(p_receiver_id, p_sender_id, watermark);
+    update conversation_summaries set unread_count = new_unread
+    where user_id = p_receiver_id and partner_id = p_sender_id;
+
+    if p_sender_id <> p_receiver_id then
+        insert into conversation_summaries as s
+            (user_id, partner_id, partner_name, last_message, last_message_time, last_sender_id)
+        values
+            (p_sender_id, p_receiver_id,
+             coalesce((select full_name from users where id = p_receiver_id), 'Unknown'),
+             p_message, p_sent_at, p_sender_id)
+        on conflict (user_id, partner_id) do update set
+            partner_name = excluded.partner_name,
+            last_message = excluded.last_message,
+            last_message_time = excluded.last_message_time,
+            last_sender_id = excluded.last_sender_id
+        where s.last_message_time is null or excluded.last_message_time >= s.last_message_time;
+    end if;
+
+    return new_unread;
+end;
+$$;
+
+-- Moves the read watermark up to p_read_at (never back) and recounts what
+-- is left above it. Returns the remaining unread count.
+create or replace function mark_conversation_read(
+    p_user_id uuid,
+    p_partner_id uuid,
+    p_read_at timestamptz
+) returns integer
+language plpgsql
+as $$
+declare
+    watermark timestamptz;
+    remaining integer;
+begin
+    select last_read_at into watermark
+    from conversation_summaries
+    where user_id = p_user_id and partner_id = p_partner_id
+    for update;
+
+    watermark := greatest(watermark, p_read_at);
+    remaining := conversation_unread_count(p_user_id, p_partner_id, watermark);
+
+    update conversation_summaries set last_read_at = watermark, unread_count = remaining
+    where user_id = p_user_id and partner_id = p_partner_id;
+
+    return remaining;
+end;
+$$;
@@ -3,7 +3,7 @@ Skill-related data models
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 
@@ -48,6 +48,13 @@ class UserSkillCreate(BaseModel):
         }
 
 
+class UserSkillBatchCreate(BaseModel):
+    """
+    Several skills added to a profile in one request
+    """
+    skills: List[UserSkillCreate] = Field(min_length=1, max_length=50)
+
+
 class UserSkillResponse(BaseModel):
     """
     User skill data returned to client
@@ -61,6 +68,7 @@ class UserSkillResponse(BaseModel):
     hourly_rate: Optional[Decimal] = None
     currency: str
     is_available: bool
+    skill_ids: Optional[List[int]] = None
     created_at: datetime
     updated_at: datetime
     
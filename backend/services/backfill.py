@@ -0,0 +1,69 @@
+"""
+One-off backfills for derived data
+Run from the backend directory: python -m services.backfill
+"""
+
+import asyncio
+from typing import Optional
+
+from core.config import settings
+from core.database import (
+    get_all_users,
+    get_untagged_rows,
+    rebuild_conversation_summaries,
+    backfill_message_pair_keys,
+    set_skill_ids
+)
+from services.skill_taxonomy import get_skill_taxonomy, tag_skill
+
+
+async def backfill_conversation_summaries() -> int:
+    """
+    Rebuild the inbox summaries of every user from their message history
+    Returns: Number of conversations written
+    """
+    total = 0
+    for user in await get_all_users():
+        total += await rebuild_conversation_summaries(user["id"])
+    return total
+
+
+async def backfill_skill_tags(batch_size: Optional[int] = None) -> dict:
+    """
+    Tag skills and bios written before the taxonomy existed, a batch at a time
+    Every row in a batch gets skill_ids (possibly empty), so each read makes
+    progress. To re-tag after a taxonomy change, null the column first.
+    Returns: Rows tagged per table
+    """
+    batch_size = batch_size or settings.SKILL_TAG_BACKFILL_BATCH
+    taxonomy = get_skill_taxonomy()
+    sources = {
+        "user_skills": ("id, skill_name, description", tag_skill),
+        "users": ("id, bio", lambda row: taxonomy.tag(row.get("bio"))),
+    }
+    totals = {}
+    for table, (columns, tag) in sources.items():
+        totals[table] = 0
+        while True:
+            rows = await get_untagged_rows(table, columns, batch_size)
+            if not rows:
+                break
+            await set_skill_ids(table, {row["id"]: tag(row) for row in rows})
+            totals[table] += len(rows)
+    return totals
+
+
+async def main():
+    pairs = await backfill_message_pair_keys()
+    print(f"Message pairs keyed: {pairs}")
+    conversations = await backfill_conversation_summaries()
+    print(f"Conversation summaries written: {conversations}")
+    if not settings.SKILL_IDS_COLUMN:
+        print("Skill tags skipped: apply migrations/0001_skill_ids.sql and set SKILL_IDS_COLUMN")
+        return
+    tagged = await backfill_skill_tags()
+    print(f"Skill tags written: {tagged['user_skills']} skills, {tagged['users']} bios")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
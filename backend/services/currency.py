@@ -0,0 +1,57 @@
+"""
+Currency normalization for hourly rates
+Rates are stored in whatever currency the professional chose; for filtering
+and sorting they are converted to one base currency with a locally stored
+FX table, loaded once per worker (no network calls on the request path).
+"""
+
+import json
+import os
+from typing import Dict, Optional
+
+from core.config import settings
+
+BUNDLED_FX_RATES_PATH = os.path.join(os.path.dirname(__file__), "fx_rates.json")
+
+
+class FxTable:
+    """
+    Conversion factors into the base currency
+    """
+
+    def __init__(self, base: str, rates: Dict[str, float], as_of: Optional[str] = None):
+        self.base = base.upper()
+        self.rates = {code.upper(): float(rate) for code, rate in rates.items()}
+        self.rates[self.base] = 1.0
+        self.as_of = as_of
+
+    @classmethod
+    def from_file(cls, path: str) -> "FxTable":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["base"], data["rates"], data.get("as_of"))
+
+    def to_base(self, amount, currency: Optional[str]) -> Optional[float]:
+        """
+        Convert an amount; a missing currency means the base currency
+        Returns: The amount in the base currency, or None if it can't be converted
+        """
+        if amount is None:
+            return None
+        rate = self.rates.get((currency or self.base).strip().upper())
+        if rate is None:
+            return None
+        return round(float(amount) * rate, 2)
+
+
+_fx_table: Optional[FxTable] = None
+
+
+def get_fx_table() -> FxTable:
+    """
+    Configured FX table (loaded on first use; main loads it at startup)
+    """
+    global _fx_table
+    if _fx_table is None:
+        _fx_table = FxTable.from_file(settings.FX_RATES_PATH or BUNDLED_FX_RATES_PATH)
+    return _fx_table
@@ -0,0 +1,27 @@
+"""
+Handlers for background jobs
+Registered on the job runner at startup; each receives the job payload as kwargs
+"""
+
+from typing import Optional
+
+from core.database import create_admin_activity_log, mark_messages_read, update_profile_completeness
+from core.jobs import job_runner
+
+
+async def recalculate_profile_completeness(user_id: str):
+    await update_profile_completeness(user_id)
+
+
+async def write_admin_activity_log(log_entry: dict):
+    await create_admin_activity_log(log_entry)
+
+
+async def flag_messages_read(user_id: str, partner_id: str, read_at: Optional[str] = None):
+    await mark_messages_read(user_id, partner_id, read_at)
+
+
+def register_job_handlers():
+    job_runner.register("profile.completeness", recalculate_profile_completeness)
+    job_runner.register("admin.activity_log", write_admin_activity_log)
+    job_runner.register("messages.mark_read", flag_messages_read)
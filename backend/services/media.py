@@ -0,0 +1,249 @@
+"""
+Avatar upload pipeline
+- Multipart bodies are parsed as they stream in and written straight to a
+  temp file while being hashed (in a worker thread, off the event loop),
+  so a file is never held in memory whole
+- Objects are content-addressed by SHA-256: re-uploading the same image
+  reuses the stored variants
+- Thumbnail and WebP variants are rendered in a process pool, off the event loop
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from fastapi import HTTPException, Request, status
+from python_multipart import MultipartParser
+from python_multipart.multipart import parse_options_header
+
+from core.config import settings
+from core.storage import get_object_store
+
+# Longest edge (px) per WebP variant; "thumb" is cropped square
+AVATAR_VARIANTS = {"thumb": 128, "medium": 512}
+
+# Keys served publicly: only the re-encoded variants, never the original
+# (it keeps its EXIF/GPS metadata)
+PUBLIC_MEDIA_KEY = re.compile(r"avatars/[0-9a-f]{64}/(?:%s)\.webp" % "|".join(map(re.escape, AVATAR_VARIANTS)))
+
+# The variant written last: once it exists, the whole set does
+DEDUPE_MARKER = "medium"
+
+UPLOAD_FIELD = "file"
+
+
+@dataclass
+class StagedUpload:
+    path: str
+    sha256: str
+    size: int
+    filename: Optional[str]
+
+    def discard(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+class _UploadSink:
+    """
+    Multipart parser callbacks: stream the upload field into a temp file
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.file = tempfile.NamedTemporaryFile(prefix="upload-", delete=False)
+        self.hash = hashlib.sha256()
+        self.size = 0
+        self.found = False
+        self.in_field = False
+        self.filename: Optional[str] = None
+        self._header_field = b""
+        self._header_value = b""
+        self._headers: Dict[bytes, bytes] = {}
+
+    def callbacks(self) -> dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        # Only the first file field is kept; anything else is ignored
+        self.in_field = options.get(b"name") == UPLOAD_FIELD.encode() and not self.found
+        if self.in_field:
+            self.found = True
+            filename = options.get(b"filename")
+            self.filename = filename.decode(errors="replace") if filename else None
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if not self.in_field:
+            return
+        chunk = data[start:end]
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"File exceeds {self.max_bytes} bytes"
+            )
+        self.hash.update(chunk)
+        self.file.write(chunk)
+
+    def on_part_end(self):
+        self.in_field = False
+
+
+async def receive_upload(request: Request, max_bytes: Optional[int] = None) -> StagedUpload:
+    """
+    Stream the "file" field of a multipart request to disk
+    Returns: The staged file with its size and SHA-256
+    """
+    content_type, options = parse_options_header(request.headers.get("content-type", ""))
+    boundary = options.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Expected multipart/form-data"
+        )
+
+    sink = _UploadSink(max_bytes or settings.MAX_UPLOAD_BYTES)
+    parser = MultipartParser(boundary, sink.callbacks())
+    try:
+        # The callbacks hash and write to disk, so each step runs in a thread
+        async for chunk in request.stream():
+            await asyncio.to_thread(parser.write, chunk)
+        await asyncio.to_thread(parser.finalize)
+    except BaseException:
+        sink.file.close()
+        os.unlink(sink.file.name)
+        raise
+    sink.file.close()
+
+    if not sink.found or sink.size == 0:
+        os.unlink(sink.file.name)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Missing '{UPLOAD_FIELD}' field"
+        )
+    return StagedUpload(sink.file.name, sink.hash.hexdigest(), sink.size, sink.filename)
+
+
+def render_avatar_variants(source_path: str, output_dir: str, max_pixels: int) -> Dict[str, str]:
+    """
+    Decode an image and write the WebP variants (runs in a worker process)
+    Returns: Variant name -> written file path
+    Raises: ValueError if the file is not a usable image
+    """
+    from PIL import Image, ImageOps
+
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    try:
+        with Image.open(source_path) as image:
+            image = ImageOps.exif_transpose(image)
+            image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+            outputs = {}
+            for name, edge in AVATAR_VARIANTS.items():
+                if name == "thumb":
+                    variant = ImageOps.fit(image, (edge, edge), Image.Resampling.LANCZOS)
+                else:
+                    variant = image.copy()
+                    variant.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+                path = os.path.join(output_dir, f"{name}.webp")
+                variant.save(path, "WEBP", quality=82, method=4)
+                outputs[name] = path
+            return outputs
+    except (OSError, Image.DecompressionBombError, ValueError) as exc:
+        raise ValueError(str(exc)) from exc
+
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.MEDIA_PROCESS_WORKERS)
+    return _pool
+
+
+def shutdown_process_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def is_public_media_key(key: str) -> bool:
+    """
+    Exact match against the variant keys, so no spelling of a path that
+    resolves to an original ("original/.", "original/") gets through
+    """
+    return PUBLIC_MEDIA_KEY.fullmatch(key) is not None
+
+
+def avatar_key(sha256: str, variant: str) -> str:
+    if variant == "original":
+        return f"avatars/{sha256}/original"
+    return f"avatars/{sha256}/{variant}.webp"
+
+
+async def store_avatar(upload: StagedUpload) -> Dict[str, str]:
+    """
+    Store an uploaded image and its variants, reusing them if already stored
+    Consumes the staged file
+    Returns: Variant name -> public URL
+    """
+    store = get_object_store()
+    urls = {name: store.url(avatar_key(upload.sha256, name)) for name in AVATAR_VARIANTS}
+
+    if store.exists(avatar_key(upload.sha256, DEDUPE_MARKER)):
+        upload.discard()
+        return urls
+
+    output_dir = tempfile.mkdtemp(prefix="avatar-")
+    try:
+        loop = asyncio.get_running_loop()
+        try:
+            outputs = await loop.run_in_executor(
+                get_process_pool(), render_avatar_variants, upload.path, output_dir, settings.MAX_IMAGE_PIXELS
+            )
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="File is not a supported image"
+            )
+
+        # Original first, marker variant last
+        await asyncio.to_thread(store.put_file, avatar_key(upload.sha256, "original"), upload.path)
+        for name in sorted(outputs, key=lambda n: n == DEDUPE_MARKER):
+            await asyncio.to_thread(store.put_file, avatar_key(upload.sha256, name), outputs[name])
+    finally:
+        upload.discard()
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+    return urls
@@ -0,0 +1,266 @@
+"""
+Delivery of stored media (avatars and their variants)
+Objects are immutable under content-hash keys, so responses carry
+year-long immutable cache headers and a key-derived ETag. Bytes are handed
+off without passing through Python wherever the deployment allows it:
+- behind nginx (MEDIA_ACCEL_REDIRECT_PREFIX set): X-Accel-Redirect, nginx sendfiles
+- ASGI servers with the zerocopysend extension: the cached file is passed down
+- otherwise: chunked pread from the cached file in a worker thread
+Opening, stat and pread all run in worker threads, off the event loop
+"""
+
+import asyncio
+import hashlib
+import io
+import mimetypes
+import os
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from typing import Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from core.config import settings
+from core.metrics import Counter, registry
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+CHUNK_SIZE = 256 * 1024
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+media_file_cache_hits = registry.register(Counter("media_file_cache_hits_total", "Media requests served from an already open file"))
+media_file_cache_misses = registry.register(Counter("media_file_cache_misses_total", "Media requests that had to open and stat the file"))
+
+
+@dataclass
+class MediaFile:
+    """
+    An open, immutable stored object and its response metadata
+    """
+    path: str
+    file: io.FileIO
+    size: int
+    etag: str
+    content_type: str
+    last_modified: str
+    users: int = 0
+    evicted: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+    def release(self):
+        with self.lock:
+            self.users -= 1
+            close = self.evicted and self.users == 0
+        if close:
+            self.file.close()
+
+
+class MediaFileCache:
+    """
+    LRU of open file descriptors with their stat/ETag/content type
+    Evicted entries stay open until the last in-flight response releases them
+    """
+
+    def __init__(self, max_files: int):
+        self.max_files = max_files
+        self.files: "OrderedDict[str, MediaFile]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    async def acquire(self, key: str, path: str) -> Optional[MediaFile]:
+        """
+        Look up (or open) a stored object; caller must release() it
+        Returns: The file, or None if it does not exist
+        """
+        with self.lock:
+            media = self.files.get(key)
+            if media is not None:
+                self.files.move_to_end(key)
+                with media.lock:
+                    media.users += 1
+                media_file_cache_hits.inc()
+                return media
+
+        media_file_cache_misses.inc()
+        media = await asyncio.to_thread(self._open, key, path)
+        if media is None:
+            return None
+
+        with self.lock:
+            existing = self.files.get(key)
+            if existing is not None:
+                # Lost a race with another request opening the same key
+                media.file.close()
+                with existing.lock:
+                    existing.users += 1
+                return existing
+            self.files[key] = media
+            while len(self.files) > self.max_files:
+                _, old = self.files.popitem(last=False)
+                self._evict(old)
+        return media
+
+    @staticmethod
+    def _open(key: str, path: str) -> Optional[MediaFile]:
+        try:
+            file = io.FileIO(path, "r")
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError):
+            return None
+        stat = os.fstat(file.fileno())
+        return MediaFile(
+            path=path,
+            file=file,
+            size=stat.st_size,
+            # Keys never change content, so the key identifies the bytes
+            etag='"' + hashlib.sha1(key.encode()).hexdigest() + '"',
+            content_type=mimetypes.guess_type(path)[0] or "application/octet-stream",
+            last_modified=formatdate(stat.st_mtime, usegmt=True),
+            users=1,
+        )
+
+    def _evict(self, media: MediaFile):
+        with media.lock:
+            media.evicted = True
+            close = media.users == 0
+        if close:
+            media.file.close()
+
+    def clear(self):
+        with self.lock:
+            while self.files:
+                _, media = self.files.popitem()
+                self._evict(media)
+
+
+def parse_range(header: Optional[str], size: int) -> Tuple[Optional[Tuple[int, int]], bool]:
+    """
+    Parse a single-range Range header against an object size
+    Returns: ((start, end_inclusive) or None for the whole object, satisfiable)
+    Multi-range and malformed headers fall back to the whole object
+    """
+    if not header:
+        return None, True
+    match = RANGE_PATTERN.match(header.strip())
+    if not match or (not match.group(1) and not match.group(2)):
+        return None, True
+    first, last = match.group(1), match.group(2)
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return None, False
+        return (max(size - length, 0), size - 1), size > 0
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        return None, False
+    return (start, end), True
+
+
+class MediaFileResponse(Response):
+    """
+    Sends a byte range of a stored object
+    The file is acquired when the response is sent and released in the
+    same call, so a response that is never sent (the client went away
+    first) holds nothing; it is normally still open in the cache
+    """
+
+    def __init__(self, media: MediaFile, key: str, status_code: int, headers: dict, start: int, length: int, send_body: bool):
+        super().__init__(status_code=status_code, headers=headers, media_type=media.content_type)
+        self.key = key
+        self.path = media.path
+        self.start = start
+        self.length = length
+        self.send_body = send_body
+        self.headers["content-length"] = str(length)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        media = await media_files.acquire(self.key, self.path)
+        if media is None:
+            # Deleted since the headers were built
+            await Response(status_code=404)(scope, receive, send)
+            return
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            if not self.send_body or self.length == 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": media.file,
+                    "offset": self.start,
+                    "count": self.length,
+                    "more_body": False,
+                })
+                return
+
+            offset, remaining = self.start, self.length
+            while remaining > 0:
+                chunk = await asyncio.to_thread(os.pread, media.file.fileno(), min(CHUNK_SIZE, remaining), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        finally:
+            media.release()
+
+
+async def serve_media(request: Request, key: str, path: str) -> Response:
+    """
+    Build the response for a stored object: 200, 206, 304, 404 or 416
+    """
+    media = await media_files.acquire(key, path)
+    if media is None:
+        return Response(status_code=404)
+    try:
+        return _build_response(request, key, media)
+    finally:
+        media.release()
+
+
+def _build_response(request: Request, key: str, media: MediaFile) -> Response:
+    headers = {
+        "etag": media.etag,
+        "last-modified": media.last_modified,
+        "cache-control": IMMUTABLE_CACHE_CONTROL,
+        "accept-ranges": "bytes",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or media.etag in if_none_match):
+        return Response(status_code=304, headers=headers)
+
+    if settings.MEDIA_ACCEL_REDIRECT_PREFIX:
+        # The proxy handles ranges and sends the file itself
+        headers["x-accel-redirect"] = f"{settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{key}"
+        return Response(status_code=200, headers=headers, media_type=media.content_type)
+
+    byte_range, satisfiable = None, True
+    if_range = request.headers.get("if-range")
+    if not if_range or if_range == media.etag:
+        byte_range, satisfiable = parse_range(request.headers.get("range"), media.size)
+
+    if not satisfiable:
+        headers["content-range"] = f"bytes */{media.size}"
+        return Response(status_code=416, headers=headers)
+
+    send_body = request.method != "HEAD"
+    if byte_range is None:
+        return MediaFileResponse(media, key, 200, headers, 0, media.size, send_body)
+    start, end = byte_range
+    headers["content-range"] = f"bytes {start}-{end}/{media.size}"
+    return MediaFileResponse(media, key, 206, headers, start, end - start + 1, send_body)
+
+
+# Global cache instance
+media_files = MediaFileCache(settings.MEDIA_FILE_CACHE_SIZE)
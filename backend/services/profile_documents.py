@@ -0,0 +1,135 @@
+"""
+Precomputed public profile documents
+Each professional's public profile (user fields, skills with category
+names, completeness, counts) is serialized once, optionally gzipped,
+and served as ready-to-send bytes. Documents are rebuilt in the
+background when the event bus reports a relevant write.
+"""
+
+import gzip
+import hashlib
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from core.config import settings
+from core.database import get_all_skill_categories, get_user_by_id, get_user_skills, score_profile_completeness
+from core.events import ChangeEvent
+from core.live_index import LiveIndex
+
+# Never part of a public document
+PRIVATE_USER_FIELDS = {"password", "hashed_password"}
+
+# Smaller bodies are not worth compressing
+GZIP_MIN_BYTES = 1024
+
+
+@dataclass
+class ProfileDocument:
+    body: bytes
+    gzip_body: Optional[bytes]
+    etag: str
+
+
+def render_profile_document(user: dict, skills: list, categories: list) -> ProfileDocument:
+    """
+    Build and serialize a profile document from loaded rows
+    """
+    category_names = {c["id"]: c["name"] for c in categories}
+    public_user = {k: v for k, v in user.items() if k not in PRIVATE_USER_FIELDS}
+    public_skills = [
+        {**skill, "category_name": skill.get("category_name") or category_names.get(skill.get("category_id"))}
+        for skill in skills
+    ]
+    document = {
+        "user": public_user,
+        "skills": public_skills,
+        "skills_count": len(public_skills),
+        "available_skills_count": sum(1 for s in public_skills if s.get("is_available")),
+        "profile_completeness": score_profile_completeness(user, skills),
+    }
+    
+    body = json.dumps(document, separators=(",", ":"), default=str).encode()
+    gzip_body = gzip.compress(body, compresslevel=6) if len(body) >= GZIP_MIN_BYTES else None
+    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+    return ProfileDocument(body, gzip_body, etag)
+
+
+class ProfileDocumentStore(LiveIndex):
+    """
+    Per-worker LRU of rendered documents
+    Writes only refresh documents this worker already holds; anything
+    else is built on first request
+    """
+    
+    name = "profile document"
+    
+    def __init__(self, max_documents: int):
+        super().__init__()
+        self.documents: "OrderedDict[str, ProfileDocument]" = OrderedDict()
+        self.max_documents = max_documents
+    
+    def get(self, user_id: str) -> Optional[ProfileDocument]:
+        document = self.documents.get(user_id)
+        if document is not None:
+            self.documents.move_to_end(user_id)
+        return document
+    
+    def put(self, user_id: str, document: ProfileDocument):
+        self.documents[user_id] = document
+        self.documents.move_to_end(user_id)
+        while len(self.documents) > self.max_documents:
+            self.documents.popitem(last=False)
+    
+    def discard(self, user_id: str):
+        self.documents.pop(user_id, None)
+    
+    async def build(self, user_id: str) -> Optional[ProfileDocument]:
+        """
+        Load the rows for a user and render their document
+        Returns: The document, or None if the user does not exist
+        """
+        user = await get_user_by_id(user_id)
+        if not user:
+            self.discard(user_id)
+            return None
+        skills = await get_user_skills(user_id)
+        categories = await get_all_skill_categories()
+        document = render_profile_document(user, skills, categories)
+        self.put(user_id, document)
+        return document
+    
+    # Documents are built on demand, never loaded in bulk
+    
+    async def load(self):
+        pass
+    
+    async def reload(self):
+        # Rebuilding every held document would be a burst of reads for
+        # entries that may not be asked for again; drop them instead
+        self.documents.clear()
+    
+    def tracks(self, user_id: str) -> bool:
+        return user_id in self.documents
+    
+    async def refresh(self, user_id: str):
+        await self.build(user_id)
+    
+    def refresh_failed(self, user_id: str):
+        # Serving a stale document is worse than rebuilding on demand
+        self.discard(user_id)
+
+
+# Global store instance
+profile_documents = ProfileDocumentStore(settings.PROFILE_DOCUMENT_CACHE_SIZE)
+
+
+async def handle_change_event(event: ChangeEvent):
+    """
+    Event bus subscriber: refresh documents affected by profile and skill writes
+    """
+    if event.type in ("profile.updated", "skill.created", "skill.updated", "skill.deleted") and event.user_id:
+        profile_documents.schedule_refresh(event.user_id)
+    elif event.type == "events.resync":
+        await profile_documents.reload()
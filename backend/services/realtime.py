@@ -0,0 +1,154 @@
+"""
+Real-time delivery over WebSockets
+In-process pub/sub hub that pushes events to a user's open connections
+"""
+
+import asyncio
+import logging
+from typing import Dict, Set
+
+from fastapi import WebSocket
+
+from core.config import settings
+from core.events import ChangeEvent
+from core.metrics import registry, CallbackGauge
+
+logger = logging.getLogger(__name__)
+
+# Close code sent to connections that cannot keep up (RFC 6455 "Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class Connection:
+    """
+    One open WebSocket with its own bounded send queue
+    A dedicated writer task drains the queue so publishers never block
+    """
+    
+    def __init__(self, user_id: str, websocket: WebSocket, queue_size: int):
+        self.user_id = user_id
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.writer: asyncio.Task = None
+        self.closed = False
+    
+    async def run_writer(self, send_timeout: float):
+        while True:
+            event = await self.queue.get()
+            try:
+                await asyncio.wait_for(self.websocket.send_json(event), timeout=send_timeout)
+            except Exception:
+                # Stalled or broken socket - stop writing, the hub evicts us
+                self.closed = True
+                return
+
+
+class RealtimeHub:
+    """
+    Maps user ids to their live connections and fans out events
+    - publish() never awaits the network: it enqueues or evicts
+    - A connection whose queue is full is a slow consumer and is closed
+    """
+    
+    def __init__(self, queue_size: int = None, send_timeout: float = None):
+        self.queue_size = queue_size or settings.WS_SEND_QUEUE_SIZE
+        self.send_timeout = send_timeout or settings.WS_SEND_TIMEOUT_SECONDS
+        self.connections: Dict[str, Set[Connection]] = {}
+    
+    async def connect(self, user_id: str, websocket: WebSocket) -> Connection:
+        """
+        Register an accepted WebSocket and start its writer task
+        """
+        conn = Connection(user_id, websocket, self.queue_size)
+        conn.writer = asyncio.create_task(conn.run_writer(self.send_timeout))
+        conn.writer.add_done_callback(lambda _: self._schedule_evict(conn))
+        self.connections.setdefault(user_id, set()).add(conn)
+        return conn
+    
+    def disconnect(self, conn: Connection):
+        """
+        Forget a connection and stop its writer
+        """
+        conns = self.connections.get(conn.user_id)
+        if conns is not None:
+            conns.discard(conn)
+            if not conns:
+                del self.connections[conn.user_id]
+        conn.closed = True
+        if conn.writer and not conn.writer.done():
+            conn.writer.cancel()
+    
+    def publish(self, user_id: str, event: dict) -> int:
+        """
+        Queue an event for every connection of a user
+        Returns: Number of connections the event was queued on
+        """
+        delivered = 0
+        for conn in list(self.connections.get(user_id, ())):
+            if conn.closed:
+                continue
+            try:
+                conn.queue.put_nowait(event)
+                delivered += 1
+            except asyncio.QueueFull:
+                logger.warning("Evicting slow WebSocket consumer for user %s", user_id)
+                self._schedule_evict(conn)
+        return delivered
+    
+    def is_online(self, user_id: str) -> bool:
+        return bool(self.connections.get(user_id))
+    
+    def connection_count(self) -> int:
+        return sum(len(conns) for conns in self.connections.values())
+    
+    def _schedule_evict(self, conn: Connection):
+        if conn not in self.connections.get(conn.user_id, ()):
+            return
+        self.disconnect(conn)
+        asyncio.get_running_loop().create_task(self._close(conn))
+    
+    @staticmethod
+    async def _close(conn: Connection):
+        try:
+            await conn.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE)
+        except Exception:
+            pass
+
+
+# === EVENT HELPERS ===
+
+def message_event(message: dict) -> dict:
+    return {"type": "message", "message": message}
+
+
+def read_receipt_event(reader_id: str, read_at: str) -> dict:
+    return {"type": "read", "reader_id": reader_id, "read_at": read_at}
+
+
+def unread_count_event(partner_id: str, unread_count: int) -> dict:
+    return {"type": "unread", "partner_id": partner_id, "unread_count": unread_count}
+
+
+# Global hub instance
+hub = RealtimeHub()
+
+registry.register(CallbackGauge(
+    "websocket_connections", "Open WebSocket connections on this worker", (),
+    lambda: {(): hub.connection_count()}
+))
+
+
+async def handle_change_event(event: ChangeEvent):
+    """
+    Event bus subscriber: push messaging events to this worker's connections
+    """
+    if event.type == "message.created":
+        message = event.payload["message"]
+        hub.publish(message["receiver_id"], message_event(message))
+        hub.publish(message["receiver_id"], unread_count_event(message["sender_id"], event.payload["unread_count"]))
+        hub.publish(message["sender_id"], message_event(message))
+    elif event.type == "conversation.read":
+        partner_id = event.payload["partner_id"]
+        hub.publish(partner_id, read_receipt_event(event.user_id, event.payload["read_at"]))
+        # Unread messages past the page the user read stay counted
+        hub.publish(event.user_id, unread_count_event(partner_id, event.payload["unread_count"]))
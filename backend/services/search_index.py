@@ -0,0 +1,400 @@
+"""
+In-memory search index for browsing professionals
+Each professional gets a dense slot number; every facet value keeps a
+bitmap (a Python int) of the slots that have it. Filtering is AND/OR over
+bitmaps and facet counts are popcounts, so a results page with accurate
+filter counts never reads the users or skills tables. The index is loaded
+once per worker and kept current from profile and skill change events.
+Hourly rates are converted to the base currency and kept in a sorted array
+of (rate, slot), so price ranges and price ordering are bisect scans.
+"""
+
+import math
+import re
+from bisect import bisect_left, bisect_right, insort
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from core.database import (
+    get_all_skill_categories,
+    get_all_user_profiles,
+    get_all_user_skills,
+    get_user_by_id,
+    get_user_skills
+)
+from core.events import ChangeEvent
+from core.live_index import LiveIndex
+from services.currency import get_fx_table
+from services.profile_documents import PRIVATE_USER_FIELDS
+from services.skill_taxonomy import get_skill_taxonomy, tag_skill
+
+# (label, low, high) in the base currency - inclusive low, exclusive high;
+# None means open-ended
+RATE_BUCKETS: List[Tuple[str, float, Optional[float]]] = [
+    ("0-25", 0, 25),
+    ("25-50", 25, 50),
+    ("50-100", 50, 100),
+    ("100+", 100, None),
+]
+
+# (label, low, high) - inclusive on both ends, in years
+EXPERIENCE_BANDS: List[Tuple[str, int, Optional[int]]] = [
+    ("0-2", 0, 2),
+    ("3-5", 3, 5),
+    ("6-10", 6, 10),
+    ("10+", 11, None),
+]
+
+# "Within N km" rings reported when the query has a location
+DISTANCE_RINGS_KM = (5, 10, 25, 50)
+
+FACETS = ("category", "rate", "experience", "available")
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def iter_bits(bitmap: int) -> Iterator[int]:
+    """
+    Slot numbers set in a bitmap, ascending
+    """
+    while bitmap:
+        low = bitmap & -bitmap
+        yield low.bit_length() - 1
+        bitmap ^= low
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+
+def _rate_bucket(rate) -> Optional[str]:
+    if rate is None:
+        return None
+    for label, low, high in RATE_BUCKETS:
+        if rate >= low and (high is None or rate < high):
+            return label
+    return None
+
+
+def _experience_band(years) -> Optional[str]:
+    if years is None:
+        return None
+    for label, low, high in EXPERIENCE_BANDS:
+        if years >= low and (high is None or years <= high):
+            return label
+    return None
+
+
+class ProfessionalIndex(LiveIndex):
+    """
+    Bitmap index over professionals (users with at least one skill)
+    """
+
+    name = "search index"
+
+    STATE = (
+        "slot_of", "docs", "free_slots", "all", "postings", "tokens", "skill_ids",
+        "rate_entries", "vocabulary", "vocabulary_dirty", "category_names",
+    )
+
+    def __init__(self):
+        super().__init__()
+        self.slot_of: Dict[str, int] = {}
+        self.docs: List[Optional[dict]] = []
+        self.free_slots: List[int] = []
+        self.all = 0
+        self.postings: Dict[str, Dict[str, int]] = {facet: {} for facet in FACETS}
+        self.tokens: Dict[str, int] = {}
+        self.skill_ids: Dict[int, int] = {}
+        self.rate_entries: List[Tuple[float, int]] = []
+        self.vocabulary: List[str] = []
+        self.vocabulary_dirty = False
+        self.category_names: Dict[str, str] = {}
+        self.listeners: List[Callable[[str, Optional[dict]], None]] = []
+
+    # --- maintenance ---
+
+    async def load(self):
+        """
+        Build the index on first use: three reads for the whole dataset
+        """
+        categories = await get_all_skill_categories()
+        users = await get_all_user_profiles()
+        skills = await get_all_user_skills()
+        self.category_names = {c["id"]: c["name"] for c in categories}
+        skills_by_user: Dict[str, List[dict]] = {}
+        for skill in skills:
+            skills_by_user.setdefault(skill["user_id"], []).append(skill)
+        for user in users:
+            self.put(user, skills_by_user.get(user["id"], []))
+
+    def put(self, user: dict, skills: List[dict]):
+        """
+        Insert or replace one professional
+        """
+        self.remove(user["id"])
+        if not skills:
+            return
+
+        public_user = {k: v for k, v in user.items() if k not in PRIVATE_USER_FIELDS}
+        fx = get_fx_table()
+        skills = [
+            {
+                **skill,
+                "category_name": skill.get("category_name") or self.category_names.get(skill.get("category_id")),
+                "hourly_rate_base": fx.to_base(skill.get("hourly_rate"), skill.get("currency")),
+            }
+            for skill in skills
+        ]
+        rates = sorted({s["hourly_rate_base"] for s in skills if s["hourly_rate_base"] is not None})
+        values = {
+            "category": {s["category_name"] for s in skills if s.get("category_name")},
+            "rate": {b for b in (_rate_bucket(rate) for rate in rates) if b},
+            "experience": {b for b in (_experience_band(s.get("experience_years")) for s in skills) if b},
+            "available": {"true" if any(s.get("is_available") for s in skills) else "false"},
+        }
+        tokens = set(tokenize(user.get("full_name")))
+        for skill in skills:
+            tokens.update(tokenize(skill.get("skill_name")))
+            tokens.update(tokenize(skill.get("category_name")))
+        # Canonical skills, so "plumber" finds "Residential Plumbing"; rows
+        # the backfill has not reached yet are tagged here
+        taxonomy = get_skill_taxonomy()
+        skill_ids = set(user["skill_ids"] if user.get("skill_ids") is not None else taxonomy.tag(user.get("bio")))
+        skill_ids |= set(taxonomy.tag(*values["category"]))
+        for skill in skills:
+            skill_ids.update(skill["skill_ids"] if skill.get("skill_ids") is not None else tag_skill(skill))
+
+        slot = self.free_slots.pop() if self.free_slots else len(self.docs)
+        if slot == len(self.docs):
+            self.docs.append(None)
+        self.docs[slot] = {
+            "user": public_user, "skills": skills, "facets": values,
+            "tokens": tokens, "skill_ids": skill_ids, "rates": rates,
+        }
+        self.slot_of[user["id"]] = slot
+
+        bit = 1 << slot
+        self.all |= bit
+        for facet, facet_values in values.items():
+            postings = self.postings[facet]
+            for value in facet_values:
+                postings[value] = postings.get(value, 0) | bit
+        for token in tokens:
+            if token not in self.tokens:
+                self.vocabulary_dirty = True
+            self.tokens[token] = self.tokens.get(token, 0) | bit
+        for skill_id in skill_ids:
+            self.skill_ids[skill_id] = self.skill_ids.get(skill_id, 0) | bit
+        for rate in rates:
+            insort(self.rate_entries, (rate, slot))
+
+    def remove(self, user_id: str):
+        slot = self.slot_of.pop(user_id, None)
+        if slot is None:
+            return
+        doc = self.docs[slot]
+        mask = ~(1 << slot)
+        self.all &= mask
+        for facet, facet_values in doc["facets"].items():
+            postings = self.postings[facet]
+            for value in facet_values:
+                postings[value] &= mask
+                if not postings[value]:
+                    del postings[value]
+        for token in doc["tokens"]:
+            self.tokens[token] &= mask
+            if not self.tokens[token]:
+                del self.tokens[token]
+                self.vocabulary_dirty = True
+        for skill_id in doc["skill_ids"]:
+            self.skill_ids[skill_id] &= mask
+            if not self.skill_ids[skill_id]:
+                del self.skill_ids[skill_id]
+        for rate in doc["rates"]:
+            del self.rate_entries[bisect_left(self.rate_entries, (rate, slot))]
+        self.docs[slot] = None
+        self.free_slots.append(slot)
+
+    async def refresh(self, user_id: str):
+        """
+        Re-read one user and their skills after a change
+        Listeners get the new document, or None if the user left the index
+        """
+        user = await get_user_by_id(user_id)
+        if user:
+            self.put(user, await get_user_skills(user_id))
+        else:
+            self.remove(user_id)
+        slot = self.slot_of.get(user_id)
+        doc = self.docs[slot] if slot is not None else None
+        for listener in self.listeners:
+            listener(user_id, doc)
+
+    # --- queries ---
+
+    def match_text(self, query: str) -> int:
+        """
+        Slots matching every query token (the last token as a prefix), plus
+        slots tagged with every canonical skill the query names
+        """
+        terms = tokenize(query)
+        if not terms:
+            return self.all
+        result = self.all
+        for term in terms[:-1]:
+            result &= self.tokens.get(term, 0)
+        result &= self.match_prefix(terms[-1])
+
+        canonical = get_skill_taxonomy().tag(query)
+        if canonical:
+            tagged = self.all
+            for skill_id in canonical:
+                tagged &= self.skill_ids.get(skill_id, 0)
+            result |= tagged
+        return result
+
+    def match_prefix(self, prefix: str) -> int:
+        if self.vocabulary_dirty:
+            self.vocabulary = sorted(self.tokens)
+            self.vocabulary_dirty = False
+        bitmap = 0
+        i = bisect_left(self.vocabulary, prefix)
+        while i < len(self.vocabulary) and self.vocabulary[i].startswith(prefix):
+            bitmap |= self.tokens[self.vocabulary[i]]
+            i += 1
+        return bitmap
+
+    def rate_range(self, min_rate: Optional[float], max_rate: Optional[float]) -> int:
+        """
+        Slots with any skill rate in [min_rate, max_rate] (base currency)
+        """
+        lo = bisect_left(self.rate_entries, (min_rate, -1)) if min_rate is not None else 0
+        hi = bisect_right(self.rate_entries, (max_rate, math.inf)) if max_rate is not None else len(self.rate_entries)
+        bitmap = 0
+        for _, slot in self.rate_entries[lo:hi]:
+            bitmap |= 1 << slot
+        return bitmap
+
+    def by_rate(self, result: int, descending: bool) -> Iterator[int]:
+        """
+        Slots of result ordered by lowest rate (or highest, descending);
+        professionals without a convertible rate come last
+        """
+        seen = 0
+        entries = reversed(self.rate_entries) if descending else self.rate_entries
+        for _, slot in entries:
+            bit = 1 << slot
+            if result & bit and not seen & bit:
+                seen |= bit
+                yield slot
+        yield from iter_bits(result & ~seen)
+
+    def within_radius(self, candidates: int, lat: float, lng: float, radius_km: float) -> int:
+        bitmap = 0
+        for slot in iter_bits(candidates):
+            user = self.docs[slot]["user"]
+            if user.get("latitude") is None or user.get("longitude") is None:
+                continue
+            if haversine_km(lat, lng, user["latitude"], user["longitude"]) <= radius_km:
+                bitmap |= 1 << slot
+        return bitmap
+
+    def distance_rings(self, candidates: int, lat: float, lng: float) -> Dict[str, int]:
+        counts = {f"{ring}km": 0 for ring in DISTANCE_RINGS_KM}
+        for slot in iter_bits(candidates):
+            user = self.docs[slot]["user"]
+            if user.get("latitude") is None or user.get("longitude") is None:
+                continue
+            distance = haversine_km(lat, lng, user["latitude"], user["longitude"])
+            for ring in DISTANCE_RINGS_KM:
+                if distance <= ring:
+                    counts[f"{ring}km"] += 1
+        return counts
+
+    def search(
+        self,
+        q: Optional[str] = None,
+        filters: Optional[Dict[str, List[str]]] = None,
+        lat: Optional[float] = None,
+        lng: Optional[float] = None,
+        radius_km: Optional[float] = None,
+        min_rate: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        sort: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20
+    ) -> dict:
+        """
+        One page of matching professionals plus facet counts
+        Each facet is counted with every other active filter applied but
+        not its own, so a filter UI shows what selecting a value would give
+        - min_rate/max_rate: base-currency range any of the skills must fall in
+        - sort: "rate" (cheapest first) or "-rate" (most expensive first)
+        """
+        base = self.match_text(q) if q else self.all
+
+        masks: Dict[str, int] = {}
+        for facet, values in (filters or {}).items():
+            if facet in self.postings and values:
+                mask = 0
+                for value in values:
+                    mask |= self.postings[facet].get(value, 0)
+                masks[facet] = mask
+
+        if min_rate is not None or max_rate is not None:
+            base &= self.rate_range(min_rate, max_rate)
+
+        located = lat is not None and lng is not None
+        if located and radius_km is not None:
+            base = self.within_radius(base, lat, lng, radius_km)
+
+        result = base
+        for mask in masks.values():
+            result &= mask
+
+        facets: Dict[str, Dict[str, int]] = {}
+        for facet in FACETS:
+            scope = base
+            for other, mask in masks.items():
+                if other != facet:
+                    scope &= mask
+            facets[facet] = {value: (bitmap & scope).bit_count() for value, bitmap in self.postings[facet].items()}
+        if located:
+            facets["distance"] = self.distance_rings(result, lat, lng)
+
+        ordered = self.by_rate(result, sort == "-rate") if sort in ("rate", "-rate") else iter_bits(result)
+        page = []
+        for i, slot in enumerate(ordered):
+            if i >= offset + limit:
+                break
+            if i >= offset:
+                doc = self.docs[slot]
+                rates = doc["rates"]
+                page.append({**doc["user"], "skills": doc["skills"], "hourly_rate_from": rates[0] if rates else None})
+
+        return {
+            "total": result.bit_count(),
+            "results": page,
+            "facets": facets,
+            "currency": get_fx_table().base,
+        }
+
+
+# Global index instance
+professional_index = ProfessionalIndex()
+
+
+async def handle_change_event(event: ChangeEvent):
+    """
+    Event bus subscriber: keep indexed professionals current
+    """
+    if event.type in ("profile.updated", "skill.created", "skill.updated", "skill.deleted") and event.user_id:
+        professional_index.schedule_refresh(event.user_id)
+    elif event.type == "events.resync":
+        await professional_index.reload()
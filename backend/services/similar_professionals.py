@@ -0,0 +1,367 @@
+"""
+Similar professionals
+Every professional in the search index is embedded as one unit vector:
+TF-IDF over skill names, descriptions and canonical skill ids, plus
+category, rate bucket and location features. Cosine similarity is then a
+dot product. Top-k neighbours are computed up front in row blocks, so
+memory stays at block x n scores instead of n x n, and a profile page
+reads its list from a table. A changed professional costs one
+matrix-vector product. Lists that may have lost a member are recomputed.
+"""
+
+import asyncio
+import logging
+import math
+from collections import Counter as TallyCounter
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from core.config import settings
+from core.events import ChangeEvent
+from services.search_index import RATE_BUCKETS, professional_index, tokenize
+
+logger = logging.getLogger(__name__)
+
+# Share of the vector norm given to each feature group
+TEXT_WEIGHT = 1.0
+CATEGORY_WEIGHT = 0.6
+RATE_WEIGHT = 0.3
+LOCATION_WEIGHT = 0.5
+
+STOP_WORDS = frozenset({
+    "a", "an", "and", "at", "for", "from", "in", "of", "on", "or", "the", "to", "with",
+    "i", "my", "we", "our", "your", "all", "any", "years", "services",
+})
+
+Neighbours = List[Tuple[str, float]]
+
+
+def document_terms(doc: dict) -> TallyCounter:
+    """
+    Term counts for one indexed professional
+    Canonical skill ids count as terms, so synonyms land on the same feature
+    """
+    terms = TallyCounter()
+    for skill in doc["skills"]:
+        terms.update(t for t in tokenize(skill.get("skill_name")) if t not in STOP_WORDS)
+        terms.update(t for t in tokenize(skill.get("description")) if t not in STOP_WORDS)
+    terms.update(f"#skill{skill_id}" for skill_id in doc["skill_ids"])
+    return terms
+
+
+def public_card(doc: dict) -> dict:
+    user = doc["user"]
+    return {
+        "id": user["id"],
+        "full_name": user.get("full_name"),
+        "profile_picture": user.get("profile_picture"),
+        "skills": [skill["skill_name"] for skill in doc["skills"]],
+        "categories": sorted(doc["facets"]["category"]),
+    }
+
+
+class SimilarProfessionals:
+    """
+    Precomputed top-k nearest neighbours over the professional index
+    """
+
+    # Attributes produced by build()
+    BUILT_STATE = (
+        "terms", "idf", "categories", "ids", "row_of", "vectors",
+        "active", "floor", "neighbours", "listed_by", "cards",
+    )
+
+    def __init__(self, top_k: int, block_size: int, max_terms: int):
+        self.top_k = top_k
+        self.block_size = block_size
+        self.max_terms = max_terms
+        self.loaded = False
+        self.load_lock = asyncio.Lock()
+        # Serializes rebuilds and incremental updates (both run in a thread)
+        self.update_lock = asyncio.Lock()
+        self.pending: Dict[str, Optional[dict]] = {}
+        self.draining = False
+        self.updates_since_build = 0
+
+        self.terms: Dict[str, int] = {}
+        self.idf = np.zeros(0, dtype=np.float32)
+        self.categories: Dict[str, int] = {}
+        self.ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.active = np.zeros(0, dtype=bool)
+        # Score of each row's k-th neighbour (0 while the list is short):
+        # a changed vector only has to be offered to rows it beats
+        self.floor = np.zeros(0, dtype=np.float32)
+        self.neighbours: Dict[str, Neighbours] = {}
+        # Reverse of neighbours: whose lists each professional appears in
+        self.listed_by: Dict[str, Set[str]] = {}
+        self.cards: Dict[str, dict] = {}
+
+    # --- features ---
+
+    @property
+    def dimensions(self) -> int:
+        return len(self.terms) + len(self.categories) + len(RATE_BUCKETS) + 3
+
+    def embed(self, doc: dict) -> np.ndarray:
+        """
+        Unit feature vector for one professional
+        Terms and categories outside the vocabulary of the last build are ignored
+        """
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+
+        offset = len(self.terms)
+        text = vector[:offset]
+        for term, count in document_terms(doc).items():
+            column = self.terms.get(term)
+            if column is not None:
+                text[column] = (1.0 + math.log(count)) * self.idf[column]
+        self._scale(text, TEXT_WEIGHT)
+
+        categories = vector[offset:offset + len(self.categories)]
+        for name in doc["facets"]["category"]:
+            if name in self.categories:
+                categories[self.categories[name]] = 1.0
+        self._scale(categories, CATEGORY_WEIGHT)
+        offset += len(self.categories)
+
+        rates = vector[offset:offset + len(RATE_BUCKETS)]
+        for i, (label, _, _) in enumerate(RATE_BUCKETS):
+            if label in doc["facets"]["rate"]:
+                rates[i] = 1.0
+        self._scale(rates, RATE_WEIGHT)
+        offset += len(RATE_BUCKETS)
+
+        # Points on the unit sphere: nearby professionals point the same way
+        user = doc["user"]
+        if user.get("latitude") is not None and user.get("longitude") is not None:
+            lat, lng = math.radians(user["latitude"]), math.radians(user["longitude"])
+            vector[offset:offset + 3] = (
+                LOCATION_WEIGHT * math.cos(lat) * math.cos(lng),
+                LOCATION_WEIGHT * math.cos(lat) * math.sin(lng),
+                LOCATION_WEIGHT * math.sin(lat),
+            )
+
+        self._scale(vector, 1.0)
+        return vector
+
+    @staticmethod
+    def _scale(vector: np.ndarray, length: float):
+        norm = float(np.linalg.norm(vector))
+        if norm > 0:
+            vector *= length / norm
+
+    # --- neighbours ---
+
+    def _top_k(self, scores: np.ndarray, row: int) -> Neighbours:
+        """
+        Best-scoring other rows for one row's score vector (modified in place)
+        """
+        scores[row] = -np.inf
+        scores[~self.active[:len(scores)]] = -np.inf
+        k = min(self.top_k, len(scores))
+        if k == 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return [(self.ids[i], float(scores[i])) for i in best if scores[i] > 0]
+
+    def _set_neighbours(self, row: int, neighbours: Neighbours):
+        user_id = self.ids[row]
+        for other, _ in self.neighbours.get(user_id, []):
+            self.listed_by[other].discard(user_id)
+        for other, _ in neighbours:
+            self.listed_by.setdefault(other, set()).add(user_id)
+        self.neighbours[user_id] = neighbours
+        self.floor[row] = neighbours[-1][1] if len(neighbours) == self.top_k else 0.0
+
+    def _recompute_row(self, row: int):
+        self._set_neighbours(row, self._top_k(self.vectors[:len(self.ids)] @ self.vectors[row], row))
+
+    def build(self, docs: Dict[str, dict], categories: List[str]):
+        """
+        Vocabulary, vectors and every neighbour list from scratch (runs in a thread)
+        """
+        counts = {user_id: document_terms(doc) for user_id, doc in docs.items()}
+        document_frequency = TallyCounter()
+        for terms in counts.values():
+            document_frequency.update(terms.keys())
+        # A term held by one professional can't make two of them similar
+        shared = [(df, term) for term, df in document_frequency.items() if df >= 2]
+        shared.sort(key=lambda item: (-item[0], item[1]))
+        vocabulary = sorted(term for _, term in shared[:self.max_terms])
+
+        n = len(docs)
+        self.terms = {term: i for i, term in enumerate(vocabulary)}
+        self.idf = np.array(
+            [math.log((1 + n) / (1 + document_frequency[term])) + 1.0 for term in vocabulary],
+            dtype=np.float32
+        )
+        self.categories = {name: i for i, name in enumerate(sorted(set(categories)))}
+        self.ids = list(docs)
+        self.row_of = {user_id: i for i, user_id in enumerate(self.ids)}
+        self.vectors = np.zeros((n, self.dimensions), dtype=np.float32)
+        for i, doc in enumerate(docs.values()):
+            self.vectors[i] = self.embed(doc)
+        self.active = np.ones(n, dtype=bool)
+        self.floor = np.zeros(n, dtype=np.float32)
+        self.cards = {user_id: public_card(doc) for user_id, doc in docs.items()}
+
+        self.neighbours = {}
+        self.listed_by = {}
+        for start in range(0, n, self.block_size):
+            block = self.vectors[start:start + self.block_size] @ self.vectors.T
+            for offset, scores in enumerate(block):
+                self._set_neighbours(start + offset, self._top_k(scores, start + offset))
+        self.updates_since_build = 0
+
+    def update(self, user_id: str, doc: Optional[dict]):
+        """
+        Apply one changed (or removed, doc=None) professional (runs in a thread)
+        """
+        row = self.row_of.get(user_id)
+        if row is None and doc is None:
+            return
+        if row is None:
+            row = self._append(user_id)
+        # Lists holding the old vector: its score there may have dropped, so
+        # they are recomputed in full
+        stale = self.listed_by.get(user_id, set()) - {user_id}
+
+        if doc is None:
+            self.vectors[row] = 0
+            self.active[row] = False
+            self._set_neighbours(row, [])
+            self.cards.pop(user_id, None)
+        else:
+            self.vectors[row] = self.embed(doc)
+            self.active[row] = True
+            self.cards[user_id] = public_card(doc)
+            size = len(self.ids)
+            scores = self.vectors[:size] @ self.vectors[row]
+            # Other lists only change if the new vector beats their k-th entry
+            beaten = np.nonzero((scores > self.floor[:size]) & self.active[:size])[0]
+            for i in beaten:
+                other = self.ids[i]
+                if i != row and other not in stale:
+                    merged = sorted(self.neighbours.get(other, []) + [(user_id, float(scores[i]))], key=lambda item: -item[1])
+                    self._set_neighbours(i, merged[:self.top_k])
+            self._set_neighbours(row, self._top_k(scores, row))
+
+        for other in stale:
+            self._recompute_row(self.row_of[other])
+        self.updates_since_build += 1
+
+    def _append(self, user_id: str) -> int:
+        """
+        Add a row, growing the arrays by doubling
+        """
+        row = len(self.ids)
+        if row == len(self.vectors):
+            capacity = max(16, 2 * len(self.vectors))
+            vectors = np.zeros((capacity, self.dimensions), dtype=np.float32)
+            vectors[:row] = self.vectors
+            self.vectors = vectors
+            self.active = np.concatenate([self.active, np.zeros(capacity - row, dtype=bool)])
+            self.floor = np.concatenate([self.floor, np.zeros(capacity - row, dtype=np.float32)])
+        self.ids.append(user_id)
+        self.row_of[user_id] = row
+        return row
+
+    # --- maintenance ---
+
+    def _snapshot(self) -> Tuple[Dict[str, dict], List[str]]:
+        docs = {user_id: professional_index.docs[slot] for user_id, slot in professional_index.slot_of.items()}
+        return docs, list(professional_index.category_names.values())
+
+    async def ensure_loaded(self):
+        if self.loaded:
+            return
+        async with self.load_lock:
+            if self.loaded:
+                return
+            await professional_index.ensure_loaded()
+            # Changes from here on queue up and are applied after the build
+            professional_index.listeners.append(self.on_index_change)
+            async with self.update_lock:
+                await asyncio.to_thread(self.build, *self._snapshot())
+            self.loaded = True
+        self._schedule_drain()
+
+    async def _rebuild(self):
+        """
+        Full rebuild beside the live tables, swapped in when done
+        New terms and categories only enter the vocabulary this way
+        """
+        fresh = SimilarProfessionals(self.top_k, self.block_size, self.max_terms)
+        await asyncio.to_thread(fresh.build, *self._snapshot())
+        for name in self.BUILT_STATE:
+            setattr(self, name, getattr(fresh, name))
+        self.updates_since_build = 0
+
+    async def resync(self):
+        """
+        Rebuild from a reloaded search index; queued changes predate it
+        """
+        if not self.loaded:
+            return
+        async with self.update_lock:
+            self.pending.clear()
+            await self._rebuild()
+
+    def on_index_change(self, user_id: str, doc: Optional[dict]):
+        """
+        Search index listener: queue the change; a burst is applied in one pass
+        """
+        self.pending[user_id] = doc
+        if self.loaded:
+            self._schedule_drain()
+
+    def _schedule_drain(self):
+        if self.pending and not self.draining:
+            self.draining = True
+            asyncio.get_running_loop().create_task(self._drain())
+
+    async def _drain(self):
+        try:
+            async with self.update_lock:
+                while self.pending:
+                    user_id, doc = self.pending.popitem()
+                    try:
+                        await asyncio.to_thread(self.update, user_id, doc)
+                    except Exception:
+                        logger.exception("Failed to update similar professionals for %s", user_id)
+                if self.updates_since_build >= settings.SIMILAR_REBUILD_AFTER:
+                    await self._rebuild()
+        finally:
+            self.draining = False
+        self._schedule_drain()
+
+    # --- queries ---
+
+    def get(self, user_id: str, limit: int) -> List[dict]:
+        """
+        Most similar professionals to user_id, best first
+        """
+        return [
+            {**self.cards[other], "score": round(score, 4)}
+            for other, score in self.neighbours.get(user_id, [])[:limit]
+            if other in self.cards
+        ]
+
+
+# Global instance
+similar_professionals = SimilarProfessionals(
+    settings.SIMILAR_TOP_K, settings.SIMILAR_BLOCK_SIZE, settings.SIMILAR_MAX_TERMS
+)
+
+
+async def handle_change_event(event: ChangeEvent):
+    """
+    Event bus subscriber; subscribed after the search index, whose reload
+    has finished by the time this runs
+    """
+    if event.type == "events.resync":
+        await similar_professionals.resync()
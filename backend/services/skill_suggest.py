@@ -0,0 +1,176 @@
+"""
+Skill-name autocomplete
+Distinct skill names and category names live in a sorted array of keys,
+one key per word start ("residential plumbing" is found by "res" and
+"plu"). A prefix is a bisect range; the top entries by usage count are
+cached per prefix and invalidated for just the prefixes of a changed name.
+"""
+
+import heapq
+from bisect import bisect_left, insort
+from collections import Counter as TallyCounter
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List
+
+from core.database import get_all_skill_categories, get_all_user_skills, get_user_skills
+from core.events import ChangeEvent
+from core.live_index import LiveIndex
+
+# Results kept per cached prefix; requests may ask for fewer
+TOP_K = 10
+
+# Prefixes with cached results, least recently used evicted first
+MAX_CACHED_PREFIXES = 5000
+
+# Longest query accepted; no skill name needs more to be told apart
+MAX_QUERY_LENGTH = 64
+
+# Separates the indexed word suffix from the entry it belongs to in a key
+KEY_SEPARATOR = "\x00"
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+@dataclass
+class SuggestEntry:
+    name: str
+    kind: str  # "skill" or "category"
+    count: int = 0
+
+
+class SkillSuggestIndex(LiveIndex):
+    """
+    Usage-weighted prefix index over skill and category names
+    """
+
+    name = "skill suggestions"
+
+    STATE = ("entries", "keys", "cache", "user_skill_names", "category_names")
+
+    def __init__(self):
+        super().__init__()
+        self.entries: Dict[str, SuggestEntry] = {}
+        self.keys: List[str] = []
+        self.cache: "OrderedDict[str, List[str]]" = OrderedDict()
+        self.user_skill_names: Dict[str, TallyCounter] = {}
+        self.category_names: Dict[str, str] = {}
+
+    # --- maintenance ---
+
+    async def load(self):
+        categories = await get_all_skill_categories()
+        skills = await get_all_user_skills()
+        self.category_names = {c["id"]: c["name"] for c in categories}
+        for category in categories:
+            self._add(category["name"], "category", 0)
+        by_user: Dict[str, List[dict]] = {}
+        for skill in skills:
+            by_user.setdefault(skill["user_id"], []).append(skill)
+        for user_id, user_skills in by_user.items():
+            self._set_user_skills(user_id, user_skills)
+
+    def _word_keys(self, normalized: str) -> List[str]:
+        words = normalized.split(" ")
+        return [" ".join(words[i:]) + KEY_SEPARATOR + normalized for i in range(len(words))]
+
+    def _invalidate(self, normalized: str):
+        for word_key in self._word_keys(normalized):
+            suffix = word_key.split(KEY_SEPARATOR, 1)[0]
+            for end in range(1, len(suffix) + 1):
+                self.cache.pop(suffix[:end], None)
+
+    def _add(self, name: str, kind: str, delta: int):
+        normalized = normalize(name)
+        if not normalized:
+            return
+        entry = self.entries.get(normalized)
+        if entry is None:
+            entry = self.entries[normalized] = SuggestEntry(name.strip(), kind)
+            for word_key in self._word_keys(normalized):
+                insort(self.keys, word_key)
+        entry.count += delta
+        if entry.count <= 0 and entry.kind == "skill":
+            del self.entries[normalized]
+            for word_key in self._word_keys(normalized):
+                i = bisect_left(self.keys, word_key)
+                if i < len(self.keys) and self.keys[i] == word_key:
+                    del self.keys[i]
+        self._invalidate(normalized)
+
+    def _set_user_skills(self, user_id: str, skills: List[dict]):
+        """
+        Replace one user's contribution to the usage counts
+        """
+        names = TallyCounter()
+        for skill in skills:
+            names[("skill", skill["skill_name"])] += 1
+            category = skill.get("category_name") or self.category_names.get(skill.get("category_id"))
+            if category:
+                names[("category", category)] += 1
+        previous = self.user_skill_names.get(user_id, TallyCounter())
+        for key in set(previous) | set(names):
+            delta = names[key] - previous[key]
+            if delta:
+                self._add(key[1], key[0], delta)
+        if names:
+            self.user_skill_names[user_id] = names
+        else:
+            self.user_skill_names.pop(user_id, None)
+
+    async def refresh(self, user_id: str):
+        self._set_user_skills(user_id, await get_user_skills(user_id))
+
+    async def refresh_categories(self):
+        """
+        Pick up newly created categories
+        """
+        categories = await get_all_skill_categories()
+        for category in categories:
+            if category["id"] not in self.category_names:
+                self.category_names[category["id"]] = category["name"]
+                self._add(category["name"], "category", 0)
+
+    # --- queries ---
+
+    def suggest(self, query: str, limit: int = 8) -> List[dict]:
+        """
+        Most used skill and category names with a word starting with query
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+        top = self.cache.get(prefix)
+        if top is not None:
+            self.cache.move_to_end(prefix)
+        else:
+            lo = bisect_left(self.keys, prefix)
+            hi = bisect_left(self.keys, prefix + "\uffff")
+            matches = {key.split(KEY_SEPARATOR, 1)[1] for key in self.keys[lo:hi]}
+            # Most used first; an exact match wins a tie, then alphabetical
+            top = heapq.nsmallest(TOP_K, matches, key=lambda n: (-self.entries[n].count, n != prefix, n))
+            self.cache[prefix] = top
+            if len(self.cache) > MAX_CACHED_PREFIXES:
+                self.cache.popitem(last=False)
+        return [
+            {"name": self.entries[n].name, "kind": self.entries[n].kind, "count": self.entries[n].count}
+            for n in top[:limit]
+        ]
+
+
+# Global index instance
+skill_suggestions = SkillSuggestIndex()
+
+
+async def handle_change_event(event: ChangeEvent):
+    """
+    Event bus subscriber: keep names and usage counts current
+    """
+    if event.type in ("skill.created", "skill.updated", "skill.deleted") and event.user_id:
+        skill_suggestions.schedule_refresh(event.user_id)
+    elif event.type == "category.created" and skill_suggestions.loaded:
+        await skill_suggestions.refresh_categories()
+    elif event.type == "events.resync":
+        await skill_suggestions.reload()
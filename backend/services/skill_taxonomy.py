@@ -0,0 +1,172 @@
+"""
+Canonical skill taxonomy
+Free-text skill names, descriptions and bios are tagged with canonical skill
+ids ("plumber", "Plumbing" and "residential plumbing" all become 1), so
+search and matching compare integers instead of strings. Every canonical
+name and synonym is compiled into one Aho-Corasick automaton: tagging a
+text is a single pass over its characters, however many phrases there are.
+"""
+
+import json
+import os
+import re
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+from core.config import settings
+
+BUNDLED_TAXONOMY_PATH = os.path.join(os.path.dirname(__file__), "skill_taxonomy.json")
+
+# Letters and digits, plus the punctuation that appears inside skill names
+# (C++, C#, Node.js); everything else separates words
+SEPARATORS = re.compile(r"[^a-z0-9+#.]+")
+STRAY_DOTS = re.compile(r"(?<![a-z0-9])\.|\.(?![a-z0-9])")
+
+
+def normalize(text: str) -> str:
+    """
+    Lowercase and pad with spaces, words separated by single spaces
+    Patterns and texts share this form, so spaces mark word boundaries
+    """
+    words = STRAY_DOTS.sub(" ", SEPARATORS.sub(" ", text.lower())).split()
+    return " " + " ".join(words) + " " if words else ""
+
+
+class AhoCorasickMatcher:
+    """
+    Multi-pattern matcher: finds every pattern occurring in a text in one pass
+    """
+
+    def __init__(self, patterns: Dict[str, int]):
+        # Trie over the patterns, then breadth-first failure links
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.outputs: List[Set[int]] = [set()]
+        for pattern, value in patterns.items():
+            node = 0
+            for char in pattern:
+                child = self.goto[node].get(char)
+                if child is None:
+                    child = len(self.goto)
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.outputs.append(set())
+                    self.goto[node][char] = child
+                node = child
+            self.outputs[node].add(value)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and char not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(char, 0)
+                # A node also reports whatever its longest proper suffix reports
+                self.outputs[child] |= self.outputs[self.fail[child]]
+
+    def find(self, text: str) -> Set[int]:
+        """
+        Returns: Values of every pattern occurring in text
+        """
+        found: Set[int] = set()
+        goto, fail, outputs = self.goto, self.fail, self.outputs
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if outputs[node]:
+                found |= outputs[node]
+        return found
+
+
+@dataclass
+class CanonicalSkill:
+    id: int
+    name: str
+    category: Optional[str] = None
+    synonyms: List[str] = field(default_factory=list)
+
+
+class SkillTaxonomy:
+    """
+    Canonical skills by id plus the compiled matcher over their phrases
+    """
+
+    def __init__(self, skills: Iterable[CanonicalSkill]):
+        self.skills: Dict[int, CanonicalSkill] = {skill.id: skill for skill in skills}
+        phrases: Dict[str, int] = {}
+        for skill in self.skills.values():
+            for phrase in [skill.name, *skill.synonyms]:
+                normalized = normalize(phrase)
+                if normalized:
+                    phrases.setdefault(normalized, skill.id)
+        self.matcher = AhoCorasickMatcher(phrases)
+
+    @classmethod
+    def from_file(cls, path: str) -> "SkillTaxonomy":
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+        return cls(
+            CanonicalSkill(
+                id=int(entry["id"]),
+                name=entry["name"],
+                category=entry.get("category"),
+                synonyms=entry.get("synonyms", []),
+            )
+            for entry in entries
+        )
+
+    def tag(self, *texts: Optional[str]) -> List[int]:
+        """
+        Canonical skill ids mentioned in any of the texts, ascending
+        """
+        found: Set[int] = set()
+        for text in texts:
+            if text:
+                found |= self.matcher.find(normalize(text))
+        return sorted(found)
+
+    def names(self, skill_ids: Iterable[int]) -> List[str]:
+        return [self.skills[i].name for i in skill_ids if i in self.skills]
+
+
+_taxonomy: Optional[SkillTaxonomy] = None
+
+
+def get_skill_taxonomy() -> SkillTaxonomy:
+    """
+    Configured taxonomy (compiled on first use; main loads it at startup)
+    """
+    global _taxonomy
+    if _taxonomy is None:
+        _taxonomy = SkillTaxonomy.from_file(settings.SKILL_TAXONOMY_PATH or BUNDLED_TAXONOMY_PATH)
+    return _taxonomy
+
+
+def tag_skill(skill_data: dict) -> List[int]:
+    """
+    Canonical ids for a user_skills row (its name and description)
+    """
+    return get_skill_taxonomy().tag(skill_data.get("skill_name"), skill_data.get("description"))
+
+
+def tag_fields(*texts: Optional[str]) -> dict:
+    """
+    {"skill_ids": [...]} to store with a row written from the texts, or {}
+    until the column exists (SKILL_IDS_COLUMN, migrations/0001_skill_ids.sql)
+    """
+    if not settings.SKILL_IDS_COLUMN:
+        return {}
+    return {"skill_ids": get_skill_taxonomy().tag(*texts)}
+
+
+def tag_skill_fields(skill_data: dict) -> dict:
+    """
+    tag_fields() for a user_skills row
+    """
+    return tag_fields(skill_data.get("skill_name"), skill_data.get("description"))
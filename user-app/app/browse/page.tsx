@@ -46,6 +46,15 @@ interface Professional {
   longitude: number | null
   profile_picture: string | null
   created_at: string
+  skills: Skill[]
+  hourly_rate_from: number | null
+}
+
+interface Facets {
+  category: { [name: string]: number }
+  rate: { [bucket: string]: number }
+  experience: { [band: string]: number }
+  available: { [flag: string]: number }
 }
 
 interface Skill {
@@ -72,15 +81,21 @@ export default function BrowsePage() {
   const [isLoggedIn, setIsLoggedIn] = useState(false)
   const [user, setUser] = useState<any>(null)
   const [professionals, setProfessionals] = useState<Professional[]>([])
-  const [allSkills, setAllSkills] = useState<Skill[]>([])
+  const [total, setTotal] = useState(0)
+  const [facets, setFacets] = useState<Facets | null>(null)
+  const [currency, setCurrency] = useState('USD')
   const [categories, setCategories] = useState<Category[]>([])
   const [loading, setLoading] = useState(true)
   const [mobileMenuOpen, setMobileMenuOpen] = useState(false)
   
   // Filters
   const [searchQuery, setSearchQuery] = useState('')
+  const [suggestions, setSuggestions] = useState<any[]>([])
   const [locationQuery, setLocationQuery] = useState('')
   const [selectedCategory, setSelectedCategory] = useState<string>('all')
+  const [minRate, setMinRate] = useState('')
+  const [maxRate, setMaxRate] = useState('')
+  const [sortBy, setSortBy] = useState('')
   const [showFilters, setShowFilters] = useState(false)
 
   useEffect(() => {
@@ -92,9 +107,34 @@ export default function BrowsePage() {
       setUser(JSON.parse(userData))
     }
     
-    loadData()
+    loadCategories()
   }, [])
 
+  useEffect(() => {
+    // Filtering and facet counts happen server-side
+    const timer = setTimeout(loadProfessionals, 250)
+    return () => clearTimeout(timer)
+  }, [searchQuery, selectedCategory, minRate, maxRate, sortBy])
+
+  useEffect(() => {
+    const query = searchQuery.trim()
+    if (!query) {
+      setSuggestions([])
+      return
+    }
+    const timer = setTimeout(async () => {
+      try {
+        const response = await fetch(`http://localhost:8000/skills/suggest?q=${encodeURIComponent(query)}`)
+        if (response.ok) {
+          setSuggestions(await response.json())
+        }
+      } catch (error) {
+        console.error('Error loading suggestions:', error)
+      }
+    }, 150)
+    return () => clearTimeout(timer)
+  }, [searchQuery])
+
   const handleLogout = () => {
     localStorage.removeItem('token')
     localStorage.removeItem('user')
@@ -104,64 +144,43 @@ export default function BrowsePage() {
     router.push('/')
   }
 
-  const loadData = async () => {
+  const loadCategories = async () => {
     try {
-      setLoading(true)
-      
-      // Load categories
       const categoriesRes = await fetch('http://localhost:8000/skills/categories')
       if (categoriesRes.ok) {
         const cats = await categoriesRes.json()
         setCategories(cats)
       }
+    } catch (error) {
+      console.error('Error loading categories:', error)
+    }
+  }
 
-      // Load all users
-      const usersRes = await fetch('http://localhost:8000/users/')
-      if (usersRes.ok) {
-        const users = await usersRes.json()
-        setProfessionals(users)
-        
-        // Load skills for all users
-        const skillsPromises = users.map((user: Professional) =>
-          fetch(`http://localhost:8000/skills/user/${user.id}`).then(r => r.json()).catch(() => [])
-        )
-        const skillsArrays = await Promise.all(skillsPromises)
-        const allSkillsFlat = skillsArrays.flat()
-        setAllSkills(allSkillsFlat)
+  const loadProfessionals = async () => {
+    try {
+      const params = new URLSearchParams({ limit: '60' })
+      if (searchQuery.trim()) params.set('q', searchQuery.trim())
+      if (selectedCategory !== 'all') params.append('category', selectedCategory)
+      // Rates are filtered and sorted server-side in one base currency
+      if (minRate) params.set('min_rate', minRate)
+      if (maxRate) params.set('max_rate', maxRate)
+      if (sortBy) params.set('sort', sortBy)
+
+      const res = await fetch(`http://localhost:8000/search/professionals?${params}`)
+      if (res.ok) {
+        const data = await res.json()
+        setProfessionals(data.results)
+        setTotal(data.total)
+        setCurrency(data.currency)
+        setFacets(data.facets)
       }
     } catch (error) {
-      console.error('Error loading data:', error)
+      console.error('Error loading professionals:', error)
     } finally {
       setLoading(false)
     }
   }
 
-  // Get skills for a specific user
-  const getUserSkills = (userId: string) => {
-    return allSkills.filter(skill => skill.user_id === userId)
-  }
-
-  // Filter professionals based on search criteria
-  const filteredProfessionals = professionals.filter(prof => {
-    const userSkills = getUserSkills(prof.id)
-    
-    // Search by name or skill (case-insensitive, trim whitespace)
-    const searchLower = searchQuery.trim().toLowerCase()
-    const matchesSearch = searchQuery === '' || 
-      prof.full_name.toLowerCase().includes(searchLower) ||
-      userSkills.some(skill => skill.skill_name.toLowerCase().includes(searchLower)) ||
-      userSkills.some(skill => skill.description?.toLowerCase().includes(searchLower))
-    
-    // Filter by category
-    const matchesCategory = selectedCategory === 'all' ||
-      userSkills.some(skill => skill.category_name === selectedCategory)
-    
-    // Only show professionals with skills
-    const hasSkills = userSkills.length > 0
-    
-    return matchesSearch && matchesCategory && hasSkills
-  })
-
   if (loading) {
     return (
       <div className="min-h-screen bg-gradient-to-br from-purple-50 via-white to-blue-50">
@@ -302,7 +321,7 @@ export default function BrowsePage() {
               Find Skilled Professionals
             </h1>
             <p className="text-xl text-white/90">
-              Browse {professionals.length} verified professional{professionals.length !== 1 ? 's' : ''} with {allSkills.length} skill{allSkills.length !== 1 ? 's' : ''}
+              Browse {total} verified professional{total !== 1 ? 's' : ''}
             </p>
           </motion.div>
 
@@ -321,8 +340,15 @@ export default function BrowsePage() {
                   placeholder="Search by name or skill..."
                   value={searchQuery}
                   onChange={(e) => setSearchQuery(e.target.value)}
+                  list="search-suggestions"
+                  autoComplete="off"
                   className="flex-1 bg-transparent outline-none text-gray-700"
                 />
+                <datalist id="search-suggestions">
+                  {suggestions.map((suggestion) => (
+                    <option key={`${suggestion.kind}:${suggestion.name}`} value={suggestion.name} />
+                  ))}
+                </datalist>
                 {searchQuery && (
                   <button 
                     onClick={() => setSearchQuery('')}
@@ -380,10 +406,38 @@ export default function BrowsePage() {
                           : 'bg-gray-100 text-gray-700 hover:bg-gray-200'
                       }`}
                     >
-                      {cat.icon} {cat.name}
+                      {cat.icon} {cat.name} ({facets?.category[cat.name] ?? 0})
                     </button>
                   ))}
                 </div>
+                <div className="flex flex-wrap items-center gap-3 mt-4">
+                  <span className="text-sm font-semibold text-gray-700">Hourly rate ({currency})</span>
+                  <input
+                    type="number"
+                    min="0"
+                    placeholder="Min"
+                    value={minRate}
+                    onChange={(e) => setMinRate(e.target.value)}
+                    className="w-24 px-3 py-2 bg-gray-100 rounded-lg outline-none text-gray-700"
+                  />
+                  <input
+                    type="number"
+                    min="0"
+                    placeholder="Max"
+                    value={maxRate}
+                    onChange={(e) => setMaxRate(e.target.value)}
+                    className="w-24 px-3 py-2 bg-gray-100 rounded-lg outline-none text-gray-700"
+                  />
+                  <select
+                    value={sortBy}
+                    onChange={(e) => setSortBy(e.target.value)}
+                    className="px-3 py-2 bg-gray-100 rounded-lg outline-none text-gray-700"
+                  >
+                    <option value="">Best match</option>
+                    <option value="rate">Price: low to high</option>
+                    <option value="-rate">Price: high to low</option>
+                  </select>
+                </div>
               </motion.div>
             )}
           </motion.div>
@@ -397,13 +451,15 @@ export default function BrowsePage() {
           {/* Results Header */}
           <div className="flex items-center justify-between mb-8">
             <h2 className="text-2xl font-bold text-gray-900">
-              {filteredProfessionals.length} Professional{filteredProfessionals.length !== 1 ? 's' : ''} Found
+              {total} Professional{total !== 1 ? 's' : ''} Found
             </h2>
-            {(searchQuery || selectedCategory !== 'all') && (
+            {(searchQuery || selectedCategory !== 'all' || minRate || maxRate) && (
               <button
                 onClick={() => {
                   setSearchQuery('')
                   setSelectedCategory('all')
+                  setMinRate('')
+                  setMaxRate('')
                 }}
                 className="flex items-center gap-2 text-purple-600 hover:text-purple-700 font-medium"
               >
@@ -414,7 +470,7 @@ export default function BrowsePage() {
           </div>
 
           {/* Professional Cards Grid */}
-          {filteredProfessionals.length === 0 ? (
+          {professionals.length === 0 ? (
             <div className="text-center py-20">
               <div className="text-6xl mb-4">🔍</div>
               <h3 className="text-2xl font-bold text-gray-900 mb-2">No professionals found</h3>
@@ -427,6 +483,8 @@ export default function BrowsePage() {
                 onClick={() => {
                   setSearchQuery('')
                   setSelectedCategory('all')
+                  setMinRate('')
+                  setMaxRate('')
                 }}
                 className="bg-purple-600 text-white px-6 py-3 rounded-lg font-semibold hover:bg-purple-700 transition"
               >
@@ -435,11 +493,8 @@ export default function BrowsePage() {
             </div>
           ) : (
             <div className="grid md:grid-cols-2 lg:grid-cols-3 gap-6">
-              {filteredProfessionals.map((prof, index) => {
-                const userSkills = getUserSkills(prof.id)
-                const avgRate = userSkills.length > 0
-                  ? userSkills.reduce((sum, s) => sum + s.hourly_rate, 0) / userSkills.length
-                  : 0
+              {professionals.map((prof, index) => {
+                const userSkills = prof.skills
 
                 return (
                   <motion.div
@@ -492,7 +547,9 @@ export default function BrowsePage() {
                     <div className="flex items-center justify-between pt-4 border-t">
                       <div className="flex items-center gap-1 text-gray-600">
                         <DollarSign size={16} />
-                        <span className="text-sm font-semibold">${avgRate.toFixed(0)}/hr</span>
+                        <span className="text-sm font-semibold">
+                          {prof.hourly_rate_from != null ? `from ${prof.hourly_rate_from.toFixed(0)} ${currency}/hr` : 'Rate on request'}
+                        </span>
                       </div>
                       <div className="flex items-center gap-1 text-gray-600">
                         <Clock size={16} />
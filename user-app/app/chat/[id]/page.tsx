@@ -20,6 +20,15 @@ interface ConversationData {
   partner_id: string
   partner_name: string
   messages: Message[]
+  next_before: string | null
+  next_since: string | null
+}
+
+// Adds messages not already shown, keeping the thread in chronological order
+const mergeMessages = (current: Message[], incoming: Message[]) => {
+  const seen = new Set(current.map(m => m.id))
+  const merged = [...current, ...incoming.filter(m => !seen.has(m.id))]
+  return merged.sort((a, b) => a.created_at.localeCompare(b.created_at) || a.id.localeCompare(b.id))
 }
 
 interface LoadingButtonProps {
@@ -55,7 +64,10 @@ export default function ChatPage() {
   const [currentUserId, setCurrentUserId] = useState<string>('')
   const [loading, setLoading] = useState(true)
   const [sending, setSending] = useState(false)
+  const [loadingOlder, setLoadingOlder] = useState(false)
   const messagesEndRef = useRef<HTMLDivElement>(null)
+  // Cursor of the newest message loaded; read from socket callbacks
+  const nextSinceRef = useRef<string | null>(null)
 
   useEffect(() => {
     const userData = localStorage.getItem('user')
@@ -66,9 +78,33 @@ export default function ChatPage() {
     loadConversation()
   }, [params.id])
 
+  useEffect(() => {
+    const token = localStorage.getItem('token')
+    if (!token) return
+
+    // Live updates: new messages from this partner are pushed over the socket
+    const socket = new WebSocket(`ws://localhost:8000/ws?token=${encodeURIComponent(token)}`)
+    // Catch up on anything sent while the socket was not connected
+    socket.onopen = () => { loadNewer() }
+    socket.onmessage = (event) => {
+      const data = JSON.parse(event.data)
+      if (data.type !== 'message') return
+      const msg: Message = data.message
+      if (msg.sender_id !== params.id && msg.receiver_id !== params.id) return
+      setConversation(prev => {
+        if (!prev || prev.messages.some(m => m.id === msg.id)) return prev
+        return { ...prev, messages: mergeMessages(prev.messages, [msg]) }
+      })
+    }
+
+    return () => socket.close()
+  }, [params.id])
+
+  // Follow new messages only; loading older history keeps the scroll position
+  const lastMessageId = conversation?.messages[conversation.messages.length - 1]?.id
   useEffect(() => {
     scrollToBottom()
-  }, [conversation?.messages])
+  }, [lastMessageId])
 
   const scrollToBottom = () => {
     messagesEndRef.current?.scrollIntoView({ behavior: 'smooth' })
@@ -89,7 +125,8 @@ export default function ChatPage() {
       })
 
       if (response.ok) {
-        const data = await response.json()
+        const data: ConversationData = await response.json()
+        nextSinceRef.current = data.next_since
         setConversation(data)
       }
     } catch (error) {
@@ -100,6 +137,47 @@ export default function ChatPage() {
     }
   }
 
+  const fetchPage = async (cursor: 'before' | 'since', value: string) => {
+    const token = localStorage.getItem('token')
+    const response = await fetch(
+      `http://localhost:8000/messages/conversation/${params.id}?${cursor}=${encodeURIComponent(value)}`,
+      { headers: { 'Authorization': `Bearer ${token}` } }
+    )
+    if (!response.ok) throw new Error(`Failed to load messages (${response.status})`)
+    return await response.json() as ConversationData
+  }
+
+  // Messages newer than the newest one loaded, instead of refetching the first page
+  const loadNewer = async () => {
+    const since = nextSinceRef.current
+    if (!since) return
+    try {
+      const data = await fetchPage('since', since)
+      nextSinceRef.current = data.next_since
+      setConversation(prev => prev && { ...prev, messages: mergeMessages(prev.messages, data.messages) })
+    } catch (error) {
+      console.error('Error loading new messages:', error)
+    }
+  }
+
+  const loadOlder = async () => {
+    if (!conversation?.next_before || loadingOlder) return
+    try {
+      setLoadingOlder(true)
+      const data = await fetchPage('before', conversation.next_before)
+      setConversation(prev => prev && {
+        ...prev,
+        messages: mergeMessages(prev.messages, data.messages),
+        next_before: data.next_before
+      })
+    } catch (error) {
+      console.error('Error loading older messages:', error)
+      toast.error('Failed to load older messages')
+    } finally {
+      setLoadingOlder(false)
+    }
+  }
+
   const sendMessage = async (e: React.FormEvent) => {
     e.preventDefault()
     
@@ -123,7 +201,8 @@ export default function ChatPage() {
 
       if (response.ok) {
         setNewMessage('')
-        await loadConversation()
+        // An empty thread has no cursor yet, so its first message reloads it
+        await (nextSinceRef.current ? loadNewer() : loadConversation())
         toast.success('Message sent! 📨')
       } else {
         toast.error('Failed to send message')
@@ -223,6 +302,18 @@ export default function ChatPage() {
 
       <div className="flex-1 overflow-y-auto">
         <div className="max-w-4xl mx-auto px-4 py-6">
+          {conversation.next_before && (
+            <div className="flex justify-center mb-6">
+              <button
+                type="button"
+                onClick={loadOlder}
+                disabled={loadingOlder}
+                className="px-4 py-2 text-sm font-medium text-purple-600 hover:text-purple-700 disabled:opacity-50 transition"
+              >
+                {loadingOlder ? 'Loading...' : 'Load older messages'}
+              </button>
+            </div>
+          )}
           {Object.entries(messagesByDate).map(([date, messages]) => (
             <div key={date} className="mb-6">
               <div className="flex items-center justify-center mb-4">
@@ -11,18 +11,23 @@ interface AddSkillsModalProps {
   onSkillAdded: () => void
 }
 
+const emptyForm = {
+  category_id: '',
+  skill_name: '',
+  description: '',
+  experience_years: '',
+  hourly_rate: '',
+  currency: 'USD',
+  is_available: true
+}
+
 export default function AddSkillsModal({ isOpen, onClose, onSkillAdded }: AddSkillsModalProps) {
   const router = useRouter()
   const [categories, setCategories] = useState<any[]>([])
-  const [formData, setFormData] = useState({
-    category_id: '',
-    skill_name: '',
-    description: '',
-    experience_years: '',
-    hourly_rate: '',
-    currency: 'USD',
-    is_available: true
-  })
+  const [formData, setFormData] = useState(emptyForm)
+  // Skills added with "Add another", sent together with the form in one batch
+  const [queued, setQueued] = useState<any[]>([])
+  const [suggestions, setSuggestions] = useState<any[]>([])
   const [loading, setLoading] = useState(false)
   const [error, setError] = useState('')
 
@@ -42,6 +47,46 @@ export default function AddSkillsModal({ isOpen, onClose, onSkillAdded }: AddSki
     }
   }
 
+  useEffect(() => {
+    const query = formData.skill_name.trim()
+    if (!query) {
+      setSuggestions([])
+      return
+    }
+    // Debounced so fast typing sends one request
+    const timer = setTimeout(async () => {
+      try {
+        const response = await fetch(`http://localhost:8000/skills/suggest?q=${encodeURIComponent(query)}`)
+        if (response.ok) {
+          setSuggestions(await response.json())
+        }
+      } catch (err) {
+        console.error('Error loading suggestions:', err)
+      }
+    }, 150)
+    return () => clearTimeout(timer)
+  }, [formData.skill_name])
+
+  const buildSkill = () => ({
+    category_id: formData.category_id,
+    skill_name: formData.skill_name.trim(),
+    description: formData.description.trim(),
+    experience_years: parseInt(formData.experience_years) || 0,
+    hourly_rate: formData.hourly_rate ? parseFloat(formData.hourly_rate) : null,
+    currency: 'USD',
+    is_available: formData.is_available
+  })
+
+  const handleAddAnother = () => {
+    if (!formData.category_id || !formData.skill_name.trim()) {
+      setError('Choose a category and enter a skill name first')
+      return
+    }
+    setError('')
+    setQueued([...queued, buildSkill()])
+    setFormData({ ...emptyForm, category_id: formData.category_id })
+  }
+
   const handleSubmit = async (e: React.FormEvent) => {
     e.preventDefault()
     setLoading(true)
@@ -59,19 +104,12 @@ export default function AddSkillsModal({ isOpen, onClose, onSkillAdded }: AddSki
         return
       }
 
-      const payload = {
-        category_id: formData.category_id,
-        skill_name: formData.skill_name.trim(),
-        description: formData.description.trim(),
-        experience_years: parseInt(formData.experience_years) || 0,
-        hourly_rate: formData.hourly_rate ? parseFloat(formData.hourly_rate) : null,
-        currency: 'USD',
-        is_available: formData.is_available
-      }
+      const skills = formData.skill_name.trim() ? [...queued, buildSkill()] : queued
+      const payload = { skills }
 
       console.log('Sending payload:', JSON.stringify(payload, null, 2))
 
-      const response = await fetch('http://localhost:8000/skills/', {
+      const response = await fetch('http://localhost:8000/skills/batch', {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -96,15 +134,8 @@ export default function AddSkillsModal({ isOpen, onClose, onSkillAdded }: AddSki
       if (response.ok) {
         onSkillAdded()
         onClose()
-        setFormData({
-          category_id: '',
-          skill_name: '',
-          description: '',
-          experience_years: '',
-          hourly_rate: '',
-          currency: 'USD',
-          is_available: true
-        })
+        setFormData(emptyForm)
+        setQueued([])
       } else {
         if (typeof data.detail === 'string') {
           setError(data.detail)
@@ -164,6 +195,23 @@ export default function AddSkillsModal({ isOpen, onClose, onSkillAdded }: AddSki
                   </div>
                 )}
 
+                {queued.length > 0 && (
+                  <div className="flex flex-wrap gap-2 mb-6">
+                    {queued.map((skill, index) => (
+                      <span key={index} className="inline-flex items-center gap-2 bg-purple-100 text-purple-700 px-3 py-1 rounded-full text-sm">
+                        {skill.skill_name}
+                        <button
+                          type="button"
+                          onClick={() => setQueued(queued.filter((_, i) => i !== index))}
+                          className="hover:text-purple-900"
+                        >
+                          <X size={14} />
+                        </button>
+                      </span>
+                    ))}
+                  </div>
+                )}
+
                 <div className="space-y-6">
                   <div>
                     <label className="block text-sm font-semibold text-gray-700 mb-2">
@@ -172,7 +220,7 @@ export default function AddSkillsModal({ isOpen, onClose, onSkillAdded }: AddSki
                     <select
                       value={formData.category_id}
                       onChange={(e) => setFormData({ ...formData, category_id: e.target.value })}
-                      required
+                      required={queued.length === 0}
                       className="w-full px-4 py-3 border-2 border-gray-200 rounded-xl focus:border-purple-500 focus:ring-4 focus:ring-purple-100 transition outline-none"
                     >
                       <option value="">Select a category</option>
@@ -194,10 +242,17 @@ export default function AddSkillsModal({ isOpen, onClose, onSkillAdded }: AddSki
                         type="text"
                         value={formData.skill_name}
                         onChange={(e) => setFormData({ ...formData, skill_name: e.target.value })}
-                        required
+                        list="skill-name-suggestions"
+                        autoComplete="off"
+                        required={queued.length === 0}
                         className="w-full pl-12 pr-4 py-3 border-2 border-gray-200 rounded-xl focus:border-purple-500 focus:ring-4 focus:ring-purple-100 transition outline-none"
                         placeholder="e.g., Residential Plumbing, Logo Design"
                       />
+                      <datalist id="skill-name-suggestions">
+                        {suggestions.map((suggestion) => (
+                          <option key={`${suggestion.kind}:${suggestion.name}`} value={suggestion.name} />
+                        ))}
+                      </datalist>
                     </div>
                   </div>
 
@@ -225,7 +280,7 @@ export default function AddSkillsModal({ isOpen, onClose, onSkillAdded }: AddSki
                           type="number"
                           value={formData.experience_years}
                           onChange={(e) => setFormData({ ...formData, experience_years: e.target.value })}
-                          required
+                          required={queued.length === 0}
                           min="0"
                           placeholder="0"
                           className="w-full pl-12 pr-4 py-3 border-2 border-gray-200 rounded-xl focus:border-purple-500 focus:ring-4 focus:ring-purple-100 transition outline-none"
@@ -274,6 +329,14 @@ export default function AddSkillsModal({ isOpen, onClose, onSkillAdded }: AddSki
                   >
                     Cancel
                   </button>
+                  <button
+                    type="button"
+                    onClick={handleAddAnother}
+                    disabled={loading}
+                    className="px-6 py-3 bg-purple-50 text-purple-700 rounded-xl font-semibold hover:bg-purple-100 transition disabled:opacity-50 disabled:cursor-not-allowed"
+                  >
+                    Add another
+                  </button>
                   <button
                     type="submit"
                     disabled={loading}
@@ -287,7 +350,7 @@ export default function AddSkillsModal({ isOpen, onClose, onSkillAdded }: AddSki
                     ) : (
                       <>
                         <Plus size={20} />
-                        Add Skill
+                        {queued.length > 0 ? `Add ${queued.length + (formData.skill_name.trim() ? 1 : 0)} Skills` : 'Add Skill'}
                       </>
                     )}
                   </button>
@@ -18,6 +18,15 @@ interface Professional {
   created_at: string
 }
 
+interface SimilarProfessional {
+  id: string
+  full_name: string
+  profile_picture: string | null
+  skills: string[]
+  categories: string[]
+  score: number
+}
+
 interface Skill {
   id: string
   user_id: string
@@ -67,27 +76,25 @@ export default function ProfilePage() {
   const router = useRouter()
   const [professional, setProfessional] = useState<Professional | null>(null)
   const [skills, setSkills] = useState<Skill[]>([])
+  const [similar, setSimilar] = useState<SimilarProfessional[]>([])
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
     if (params.id) {
       loadProfile()
+      loadSimilar()
     }
   }, [params.id])
 
   const loadProfile = async () => {
     try {
       setLoading(true)
-      const userRes = await fetch(`http://localhost:8000/users/${params.id}`)
-      if (userRes.ok) {
-        const user = await userRes.json()
-        setProfessional(user)
-      }
-
-      const skillsRes = await fetch(`http://localhost:8000/skills/user/${params.id}`)
-      if (skillsRes.ok) {
-        const skillsData = await skillsRes.json()
-        setSkills(skillsData)
+      // One precomputed document carries both the profile and its skills
+      const res = await fetch(`http://localhost:8000/profile/${params.id}/public`)
+      if (res.ok) {
+        const data = await res.json()
+        setProfessional(data.user)
+        setSkills(data.skills)
       }
     } catch (error) {
       console.error('Error loading profile:', error)
@@ -96,6 +103,17 @@ export default function ProfilePage() {
     }
   }
 
+  const loadSimilar = async () => {
+    try {
+      const res = await fetch(`http://localhost:8000/profile/${params.id}/similar?limit=4`)
+      if (res.ok) {
+        setSimilar(await res.json())
+      }
+    } catch (error) {
+      console.error('Error loading similar professionals:', error)
+    }
+  }
+
   if (loading) {
     return (
       <div className="min-h-screen bg-gradient-to-br from-purple-50 via-white to-blue-50">
@@ -281,6 +299,29 @@ export default function ProfilePage() {
                   ))}
                 </div>
               </motion.div>
+
+              {similar.length > 0 && (
+                <motion.div initial={{ opacity: 0, y: 20 }} animate={{ opacity: 1, y: 0 }} transition={{ delay: 0.5 }} className="bg-white rounded-2xl shadow-lg p-8">
+                  <h2 className="text-3xl font-bold text-gray-900 mb-6">Similar Professionals</h2>
+                  <div className="grid sm:grid-cols-2 gap-4">
+                    {similar.map((other) => (
+                      <Link key={other.id} href={`/profile/${other.id}`} className="flex items-center gap-4 border-2 border-gray-100 rounded-xl p-4 hover:border-purple-300 transition">
+                        {other.profile_picture ? (
+                          <img src={other.profile_picture} alt={other.full_name} className="w-12 h-12 rounded-full object-cover flex-shrink-0" />
+                        ) : (
+                          <div className="w-12 h-12 bg-gradient-to-br from-purple-400 to-blue-400 rounded-full flex items-center justify-center text-white font-bold flex-shrink-0">
+                            {other.full_name?.charAt(0)}
+                          </div>
+                        )}
+                        <div className="min-w-0">
+                          <div className="font-bold text-gray-900 truncate">{other.full_name}</div>
+                          <div className="text-sm text-gray-600 truncate">{other.skills.join(', ')}</div>
+                        </div>
+                      </Link>
+                    ))}
+                  </div>
+                </motion.div>
+              )}
             </div>
 
             <div className="space-y-6">